@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
+from interact.images import get_rendition_url
 from django.urls import reverse
 from .models import (
     Command, Question, Application, Attachment,
@@ -59,9 +60,10 @@ class AttachmentInline(admin.TabularInline):
             return "—"
         url = obj.file.url.lower()
         if url.endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp')):
+            # Ссылка ведёт на оригинал, а в списке показываем маленькую копию
             return format_html(
                 '<a href="{}" target="_blank"><img src="{}" style="height:50px; border-radius:5px; border:1px solid #ccc;"></a>',
-                obj.file.url, obj.file.url
+                obj.file.url, get_rendition_url(obj.file, 'thumb')
             )
         return format_html('<a href="{}" target="_blank" style="font-weight:bold;">📄 Скачать файл</a>', obj.file.url)
     preview.short_description = "Предпросмотр"
@@ -80,9 +82,10 @@ class BoardAttachmentInline(admin.TabularInline):
             return "—"
         url = obj.file.url.lower()
         if url.endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp')):
+            # Ссылка ведёт на оригинал, а в списке показываем маленькую копию
             return format_html(
                 '<a href="{}" target="_blank"><img src="{}" style="height:50px; border-radius:5px; border:1px solid #ccc;"></a>',
-                obj.file.url, obj.file.url
+                obj.file.url, get_rendition_url(obj.file, 'thumb')
             )
         return format_html('<a href="{}" target="_blank" style="font-weight:bold;">📄 Скачать файл</a>', obj.file.url)
     preview.short_description = "Предпросмотр"
@@ -0,0 +1,80 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from commands.models import Attachment, BoardAttachment
+from commands.uploads import process_attachment
+from interact.images import warm_renditions
+
+# Сколько файл может пробыть в processing, прежде чем его возьмёт другой воркер
+CLAIM_TIMEOUT = timedelta(minutes=15)
+
+
+class Command(BaseCommand):
+    help = (
+        "Фоновая обработка файлов заявок: готовит превью фото и читает параметры видео. "
+        "С --loop работает как постоянный воркер и заодно создаёт недостающие копии картинок (warm_renditions)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=20)
+        parser.add_argument("--loop", action="store_true", help="Не завершаться, опрашивать очередь")
+        parser.add_argument("--interval", type=float, default=5, help="Пауза между опросами в режиме --loop (сек)")
+        parser.add_argument("--renditions-interval", type=float, default=60,
+                            help="Как часто в режиме --loop искать картинки без копий (сек)")
+
+    def handle(self, *args, **options):
+        next_warm = 0
+        while True:
+            if options["loop"] and time.monotonic() >= next_warm:
+                # Сериализаторы копии не создают, а отдают оригинал, пока её нет
+                warm_renditions(on_error=self.stderr.write)
+                next_warm = time.monotonic() + options["renditions_interval"]
+            processed = sum(
+                self._process_batch(model, options["batch_size"]) for model in (Attachment, BoardAttachment)
+            )
+            if processed:
+                self.stdout.write(f"Обработано файлов: {processed}")
+            if not options["loop"]:
+                return
+            if not processed:
+                time.sleep(options["interval"])
+
+    def _claim(self, model, batch_size):
+        """
+        Короткая транзакция: забираем пачку и помечаем её processing. Блокировки
+        строк не держим, пока работают Pillow и ffprobe.
+        """
+        stale_before = timezone.now() - CLAIM_TIMEOUT
+        with transaction.atomic():
+            # skip_locked: несколько воркеров разбирают очередь, не мешая друг другу.
+            # Зависшие в processing (воркер упал посреди обработки) берём заново
+            ids = list(
+                model.objects.select_for_update(skip_locked=True)
+                .filter(
+                    Q(processing_status="pending")
+                    | Q(processing_status="processing", claimed_at__lt=stale_before)
+                )
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            model.objects.filter(id__in=ids).update(processing_status="processing", claimed_at=timezone.now())
+        return list(model.objects.filter(id__in=ids).order_by("id"))
+
+    def _process_batch(self, model, batch_size):
+        batch = self._claim(model, batch_size)
+        for attachment in batch:
+            try:
+                meta = process_attachment(attachment)
+                status = "done"
+            except Exception as e:
+                meta = {"error": str(e)[:500]}
+                status = "failed"
+                self.stderr.write(f"{model.__name__} #{attachment.id}: {e}")
+            # Результат пишем сразу по каждой строке: сбой на следующем файле его не потеряет
+            model.objects.filter(id=attachment.id).update(processing_status=status, meta=meta)
+        return len(batch)
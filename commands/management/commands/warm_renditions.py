@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from interact.images import RENDITION_SIZES, warm_renditions
+
+
+class Command(BaseCommand):
+    help = (
+        "Создаёт недостающие уменьшенные WebP-копии картинок из media для всех моделей "
+        "(interact.images.RENDITION_SOURCES). В фоне то же регулярно делает process_attachments --loop"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", action="append", choices=list(RENDITION_SIZES),
+                            help="Только эти размеры (можно несколько раз)")
+
+    def handle(self, *args, **options):
+        done, failed = warm_renditions(options["size"], on_error=self.stderr.write)
+        self.stdout.write(self.style.SUCCESS(f"Готово: {done} копий, ошибок: {failed}"))
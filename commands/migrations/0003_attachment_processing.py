@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-19 17:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commands', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attachment',
+            name='meta',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Параметры файла'),
+        ),
+        migrations.AddField(
+            model_name='attachment',
+            name='processing_status',
+            field=models.CharField(choices=[('pending', 'Ожидает обработки'), ('done', 'Обработан'), ('failed', 'Ошибка обработки')], db_index=True, default='pending', max_length=10, verbose_name='Обработка'),
+        ),
+    ]
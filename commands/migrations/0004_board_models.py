@@ -0,0 +1,114 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:04
+
+import commands.models
+import django.db.models.deletion
+import interact.slugs
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_missing_board_tables(apps, schema_editor):
+    """
+    На рабочих базах таблицы Борда уже есть (модели жили без миграции) — их не трогаем.
+    На новой базе (свежий стенд, тесты) создаём их по состоянию из этой миграции.
+    """
+    existing = set(schema_editor.connection.introspection.table_names())
+    for name in ("BoardPosition", "BoardApplication", "BoardQuestion", "BoardAttachment"):
+        model = apps.get_model("commands", name)
+        if model._meta.db_table not in existing:
+            schema_editor.create_model(model)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commands', '0003_attachment_processing'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Таблицы Борда в том виде, в каком они уже существуют: только состояние
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='BoardApplication',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('answers', models.JSONField(verbose_name='Ответы')),
+                        ('status', models.CharField(choices=[('pending', 'Ожидает'), ('accepted', 'Принят'), ('rejected', 'Отклонен')], default='pending', max_length=20, verbose_name='Статус')),
+                        ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата подачи')),
+                        ('volunteer', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='board_applications', to=settings.AUTH_USER_MODEL, verbose_name='Кандидат')),
+                    ],
+                    options={
+                        'verbose_name': 'Заявка в Борд',
+                        'verbose_name_plural': 'Заявки в Борд',
+                    },
+                ),
+                migrations.CreateModel(
+                    name='BoardAttachment',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('file', models.FileField(upload_to=commands.models.board_attachment_upload_to, verbose_name='Файл')),
+                        ('label', models.CharField(max_length=255, verbose_name='Вопрос')),
+                        ('application', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='files', to='commands.boardapplication', verbose_name='Заявка')),
+                    ],
+                    options={
+                        'verbose_name': 'Файл Борда',
+                        'verbose_name_plural': 'Файлы Борда',
+                    },
+                ),
+                migrations.CreateModel(
+                    name='BoardPosition',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('title', models.CharField(max_length=255, verbose_name='Название позиции в Борде')),
+                        ('slug', models.SlugField(allow_unicode=True, blank=True, help_text='Генерируется автоматически', max_length=255, unique=True, verbose_name='URL')),
+                        ('description', models.TextField(blank=True, verbose_name='Описание')),
+                        ('start_date', models.DateTimeField(blank=True, null=True, verbose_name='Начало набора')),
+                        ('end_date', models.DateTimeField(blank=True, null=True, verbose_name='Конец набора')),
+                        ('leader', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='led_board_positions', to=settings.AUTH_USER_MODEL, verbose_name='Руководитель позиции')),
+                        ('members', models.ManyToManyField(blank=True, related_name='board_positions', to=settings.AUTH_USER_MODEL, verbose_name='Члены Борда')),
+                    ],
+                    options={
+                        'verbose_name': 'Позиция Борда',
+                        'verbose_name_plural': 'Позиции Борда',
+                    },
+                    bases=(interact.slugs.UniqueSlugMixin, models.Model),
+                ),
+                migrations.AddField(
+                    model_name='boardapplication',
+                    name='board_position',
+                    field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='applications', to='commands.boardposition', verbose_name='Позиция'),
+                ),
+                migrations.CreateModel(
+                    name='BoardQuestion',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('label', models.CharField(max_length=500, verbose_name='Текст вопроса')),
+                        ('field_type', models.CharField(choices=[('short_text', 'Короткий текст'), ('long_text', 'Длинный текст'), ('number', 'Число'), ('photo', 'Фото'), ('video', 'Видео'), ('select', 'Выбор варианта')], max_length=20, verbose_name='Тип поля')),
+                        ('required', models.BooleanField(default=True, verbose_name='Обязательный')),
+                        ('order', models.PositiveIntegerField(blank=True, null=True, verbose_name='Порядок')),
+                        ('options', models.JSONField(blank=True, default=list, help_text='Для select')),
+                        ('board_position', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='questions', to='commands.boardposition', verbose_name='Позиция Борда')),
+                    ],
+                    options={
+                        'verbose_name': 'Вопрос Борда',
+                        'verbose_name_plural': 'Вопросы Борда',
+                        'ordering': ['order'],
+                    },
+                ),
+            ],
+        ),
+        migrations.RunPython(create_missing_board_tables, migrations.RunPython.noop),
+        # Новые поля фоновой обработки — настоящие изменения схемы
+        migrations.AddField(
+            model_name='boardattachment',
+            name='meta',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Параметры файла'),
+        ),
+        migrations.AddField(
+            model_name='boardattachment',
+            name='processing_status',
+            field=models.CharField(choices=[('pending', 'Ожидает обработки'), ('done', 'Обработан'), ('failed', 'Ошибка обработки')], db_index=True, default='pending', max_length=10, verbose_name='Обработка'),
+        ),
+    ]
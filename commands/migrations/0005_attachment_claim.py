@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commands', '0004_board_models'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attachment',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Взят в обработку'),
+        ),
+        migrations.AddField(
+            model_name='boardattachment',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Взят в обработку'),
+        ),
+        migrations.AlterField(
+            model_name='attachment',
+            name='processing_status',
+            field=models.CharField(choices=[('pending', 'Ожидает обработки'), ('processing', 'Обрабатывается'), ('done', 'Обработан'), ('failed', 'Ошибка обработки')], db_index=True, default='pending', max_length=10, verbose_name='Обработка'),
+        ),
+        migrations.AlterField(
+            model_name='boardattachment',
+            name='processing_status',
+            field=models.CharField(choices=[('pending', 'Ожидает обработки'), ('processing', 'Обрабатывается'), ('done', 'Обработан'), ('failed', 'Ошибка обработки')], db_index=True, default='pending', max_length=10, verbose_name='Обработка'),
+        ),
+    ]
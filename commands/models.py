@@ -1,11 +1,13 @@
 from django.db import models
-from django.utils.text import slugify
 import uuid
 import os
 from directions.models import VolunteerDirection
+from interact.slugs import UniqueSlugMixin
 from users.models import Volunteer
 
-class Command(models.Model):
+class Command(UniqueSlugMixin, models.Model):
+    slug_fallback_prefix = "command"
+
     title = models.CharField("Название команды", max_length=255)
     slug = models.SlugField(
         "URL",
@@ -49,21 +51,6 @@ class Command(models.Model):
         verbose_name = "Команда"
         verbose_name_plural = "Команды"
 
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            base_slug = slugify(self.title, allow_unicode=True)
-            if not base_slug:
-                base_slug = "command-" + uuid.uuid4().hex[:6]
-
-            slug = base_slug
-            counter = 1
-            while Command.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
-            
-        super().save(*args, **kwargs)
-
     def __str__(self):
         return self.title
 
@@ -161,6 +148,15 @@ def attachment_upload_to(instance, filename):
     return f'applications/{instance.application.id}/{name}.{ext}'
 
 
+# Статус фоновой обработки вложений (manage.py process_attachments)
+PROCESSING_CHOICES = [
+    ('pending', 'Ожидает обработки'),
+    ('processing', 'Обрабатывается'),
+    ('done', 'Обработан'),
+    ('failed', 'Ошибка обработки'),
+]
+
+
 class Attachment(models.Model):
     application = models.ForeignKey(
         Application,
@@ -170,6 +166,13 @@ class Attachment(models.Model):
     )
     file = models.FileField("Файл", upload_to=attachment_upload_to)
     label = models.CharField("Вопрос", max_length=255)
+    processing_status = models.CharField(
+        "Обработка", max_length=10, choices=PROCESSING_CHOICES, default='pending', db_index=True
+    )
+    # Размер, разрешение фото/видео, длительность видео
+    meta = models.JSONField("Параметры файла", default=dict, blank=True)
+    # Когда воркер взял файл; зависшие в processing дольше таймаута берутся снова
+    claimed_at = models.DateTimeField("Взят в обработку", null=True, blank=True)
 
     class Meta:
         verbose_name = "Файл"
@@ -179,7 +182,10 @@ class Attachment(models.Model):
         return self.label
 
 
-class BoardPosition(models.Model):
+class BoardPosition(UniqueSlugMixin, models.Model):
+
+    slug_fallback_prefix = "board"
+
 
     title = models.CharField(
         "Название позиции в Борде",
@@ -239,51 +245,6 @@ class BoardPosition(models.Model):
 
 
 
-    def save(self,*args,**kwargs):
-
-        if not self.slug:
-
-            base_slug = slugify(
-                self.title,
-                allow_unicode=True
-            )
-
-
-            if not base_slug:
-
-                base_slug = (
-                    "board-" +
-                    uuid.uuid4().hex[:6]
-                )
-
-
-
-            slug = base_slug
-            counter = 1
-
-
-
-            while BoardPosition.objects.filter(
-                slug=slug
-            ).exists():
-
-                slug = f"{base_slug}-{counter}"
-
-                counter += 1
-
-
-
-            self.slug = slug
-
-
-
-        super().save(
-            *args,
-            **kwargs
-        )
-
-
-
     def __str__(self):
 
         return self.title
@@ -519,6 +480,29 @@ class BoardAttachment(models.Model):
     )
 
 
+    processing_status = models.CharField(
+        "Обработка",
+        max_length=10,
+        choices=PROCESSING_CHOICES,
+        default="pending",
+        db_index=True
+    )
+
+
+    meta = models.JSONField(
+        "Параметры файла",
+        default=dict,
+        blank=True
+    )
+
+
+    claimed_at = models.DateTimeField(
+        "Взят в обработку",
+        null=True,
+        blank=True
+    )
+
+
 
     class Meta:
 
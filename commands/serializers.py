@@ -1,6 +1,64 @@
 from rest_framework import serializers
+
+from interact.images import RenditionsField
 from .models import Command, Question, Application, Attachment, BoardApplication, BoardAttachment, BoardPosition, BoardQuestion
 
+def _question_ids(answers):
+    """id вопросов из ключей формата q_123."""
+    if not answers or not isinstance(answers, dict):
+        return set()
+    return {int(key[2:]) for key in answers if key.startswith('q_') and key[2:].isdigit()}
+
+
+class QuestionLabelListSerializer(serializers.ListSerializer):
+    """
+    Список заявок: подписи вопросов для всей страницы одним запросом,
+    а не отдельным запросом в get_formatted_answers для каждой заявки.
+    """
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, 'all') else data)
+
+        q_ids = set()
+        for obj in items:
+            q_ids |= _question_ids(obj.answers)
+
+        labels = {}
+        if q_ids:
+            labels = dict(self.child.question_model.objects.filter(id__in=q_ids).values_list('id', 'label'))
+
+        self.child.question_labels = labels
+        try:
+            return super().to_representation(items)
+        finally:
+            self.child.question_labels = None
+
+
+class FormattedAnswersMixin:
+    """Заменяет ключи q_XXX в answers на тексты вопросов (question_model.label)."""
+    question_model = None
+    question_labels = None  # заполняет QuestionLabelListSerializer
+
+    def get_formatted_answers(self, obj):
+        if not obj.answers or not isinstance(obj.answers, dict):
+            return {}
+
+        labels = self.question_labels
+        if labels is None:
+            # Одиночная заявка (смена статуса и т.п.) — один запрос, как и раньше
+            labels = dict(
+                self.question_model.objects.filter(id__in=_question_ids(obj.answers)).values_list('id', 'label')
+            )
+
+        readable_answers = {}
+        for key, value in obj.answers.items():
+            # Заменяем ключ на текст вопроса (если вопрос есть в базе)
+            q_id = int(key[2:]) if key.startswith('q_') and key[2:].isdigit() else None
+            question_text = labels.get(q_id, key)
+            readable_answers[question_text] = value
+            
+        return readable_answers
+
+
 class QuestionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Question
@@ -16,10 +74,12 @@ class CommandSerializer(serializers.ModelSerializer):
         
 class AttachmentSerializer(serializers.ModelSerializer):
     file = serializers.SerializerMethodField()
+    # Превью для фото; для видео и документов — None
+    renditions = RenditionsField(source='file', sizes=('thumb', 'medium'))
 
     class Meta:
         model = Attachment
-        fields = ['id', 'file', 'label']
+        fields = ['id', 'file', 'renditions', 'label']
 
     def get_file(self, obj):
         if not obj.file:
@@ -30,13 +90,14 @@ class AttachmentSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.file.url)
         return obj.file.url
 
-class ApplicationSerializer(serializers.ModelSerializer):
+class ApplicationSerializer(FormattedAnswersMixin, serializers.ModelSerializer):
     command_title = serializers.CharField(source='command.title', read_only=True)
     # Используем 'files', так как в твоей модели Attachment прописано related_name='files'
     files = AttachmentSerializer(many=True, read_only=True) 
     
     # Поле для красивых ответов
     formatted_answers = serializers.SerializerMethodField()
+    question_model = Question
 
     class Meta:
         model = Application
@@ -52,28 +113,7 @@ class ApplicationSerializer(serializers.ModelSerializer):
             'created_at',
             'files'
         ]
-        
-    def get_formatted_answers(self, obj):
-        if not obj.answers or not isinstance(obj.answers, dict):
-            return {}
-        
-        q_ids = []
-        for key in obj.answers.keys():
-            # Ищем ключи формата q_123
-            if key.startswith('q_') and key[2:].isdigit():
-                q_ids.append(int(key[2:]))
-        
-        # Вытаскиваем тексты вопросов из твоей модели Question (поле label)
-        questions = Question.objects.filter(id__in=q_ids)
-        q_map = {f"q_{q.id}": q.label for q in questions}
-        
-        readable_answers = {}
-        for key, value in obj.answers.items():
-            # Заменяем ключ на текст вопроса (если вопрос есть в базе)
-            question_text = q_map.get(key, key)
-            readable_answers[question_text] = value
-            
-        return readable_answers
+        list_serializer_class = QuestionLabelListSerializer
 
 class BoardQuestionSerializer(serializers.ModelSerializer):
 
@@ -95,6 +135,12 @@ class BoardQuestionSerializer(serializers.ModelSerializer):
 
 class BoardAttachmentSerializer(serializers.ModelSerializer):
 
+    renditions = RenditionsField(
+        source="file",
+        sizes=("thumb", "medium")
+    )
+
+
     class Meta:
 
         model = BoardAttachment
@@ -102,6 +148,7 @@ class BoardAttachmentSerializer(serializers.ModelSerializer):
         fields = [
             "id",
             "file",
+            "renditions",
             "label"
         ]
 
@@ -134,19 +181,22 @@ class BoardPositionSerializer(serializers.ModelSerializer):
 
 
 
-class BoardApplicationSerializer(serializers.ModelSerializer):
+class BoardApplicationSerializer(FormattedAnswersMixin, serializers.ModelSerializer):
     board_title = serializers.CharField(source='board_position.title', read_only=True)
-    files = BoardAttachmentSerializer(source='attachments', many=True, read_only=True)
+    files = BoardAttachmentSerializer(many=True, read_only=True)
     
     applicant_name = serializers.SerializerMethodField()
     applicant_phone = serializers.SerializerMethodField()
     
     # 🔥 НОВОЕ: Поле для красивых ответов в Борде
     formatted_answers = serializers.SerializerMethodField()
+    # Для борда берем вопросы из BoardQuestion
+    question_model = BoardQuestion
 
     class Meta:
         model = BoardApplication
         fields = '__all__'
+        list_serializer_class = QuestionLabelListSerializer
 
     def get_applicant_name(self, obj):
         if obj.answers and isinstance(obj.answers, dict):
@@ -160,26 +210,3 @@ class BoardApplicationSerializer(serializers.ModelSerializer):
                 if 'phone' in key.lower() or 'телефон' in key.lower() or 'номер' in key.lower():
                     return str(value)
         return 'Нет данных'
-        
-    # 🔥 НОВЫЙ МЕТОД: Расшифровка q_XXX для Борда
-    def get_formatted_answers(self, obj):
-        if not obj.answers or not isinstance(obj.answers, dict):
-            return {}
-        
-        q_ids = []
-        for key in obj.answers.keys():
-            if key.startswith('q_') and key[2:].isdigit():
-                q_ids.append(int(key[2:]))
-        
-        # Для борда берем вопросы из BoardQuestion
-        questions = BoardQuestion.objects.filter(id__in=q_ids)
-        q_map = {f"q_{q.id}": q.label for q in questions}
-        
-        readable_answers = {}
-        for key, value in obj.answers.items():
-            question_text = q_map.get(key, key)
-            readable_answers[question_text] = value
-            
-        return readable_answers
-        
-
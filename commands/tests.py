@@ -1,3 +1,53 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+
+from commands.models import Application, Attachment, Command
+
+PROCESS = "commands.management.commands.process_attachments.process_attachment"
+
+
+class ProcessAttachmentsTests(TestCase):
+    def setUp(self):
+        command = Command.objects.create(title="Медиа")
+        self.application = Application.objects.create(command=command, answers={})
+
+    def _attachment(self, **kwargs):
+        return Attachment.objects.create(application=self.application, file="applications/1/a.jpg", label="Фото", **kwargs)
+
+    def _run(self, side_effect):
+        with mock.patch(PROCESS, side_effect=side_effect):
+            call_command("process_attachments", stdout=mock.Mock(), stderr=mock.Mock())
+
+    def test_claimed_before_processing_and_saved_per_row(self):
+        first, second = self._attachment(), self._attachment()
+        seen = []
+
+        def process(attachment):
+            # Во время обработки строка уже помечена, а результат предыдущей записан
+            seen.append(Attachment.objects.filter(pk=first.pk).values_list("processing_status", flat=True).get())
+            if attachment.pk == second.pk:
+                raise ValueError("битый файл")
+            return {"width": 10}
+
+        self._run(process)
+
+        self.assertEqual(seen, ["processing", "done"])
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.processing_status, first.meta), ("done", {"width": 10}))
+        self.assertEqual((second.processing_status, second.meta), ("failed", {"error": "битый файл"}))
+
+    def test_stale_claim_is_taken_again(self):
+        stale = self._attachment(processing_status="processing", claimed_at=timezone.now() - timedelta(hours=1))
+        fresh = self._attachment(processing_status="processing", claimed_at=timezone.now())
+
+        self._run(lambda attachment: {})
 
-# Create your tests here.
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual(stale.processing_status, "done")
+        self.assertEqual(fresh.processing_status, "processing")
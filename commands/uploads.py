@@ -0,0 +1,157 @@
+"""
+Приём файлов к заявкам (команды и Борд).
+
+1. ApplicationUploadLimitHandler стоит первым в цепочке upload handlers и проверяет
+   размер и тип по мере чтения потока: Content-Length — до чтения тела, расширение —
+   на заголовке файла, размер — на каждом чанке. Превышение обрывает приём сразу,
+   а не после того, как 50 МБ уже легли на диск.
+2. Дальше работает только TemporaryFileUploadHandler: файл пишется чанками во временный
+   файл в FILE_UPLOAD_TEMP_DIR (тот же диск, что и media), поэтому при сохранении
+   FileSystemStorage просто переименовывает его.
+3. Строки вложений создаются одним bulk_create со статусом pending, а превью фото
+   и чтение параметров видео делает фоновый `manage.py process_attachments`.
+   Оригинал загрузки не меняется: уменьшенные копии пишутся отдельными файлами
+   (interact/images.py).
+"""
+import json
+import os
+import shutil
+import subprocess
+
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload, TemporaryFileUploadHandler
+from django.http import QueryDict
+from django.utils.datastructures import MultiValueDict
+
+from interact.images import ensure_rendition
+
+IMAGE_EXTENSIONS = {'jpg', 'jpeg', 'png', 'webp', 'heic', 'heif', 'gif'}
+VIDEO_EXTENSIONS = {'mp4', 'mov', 'avi', 'mkv', 'webm', '3gp', 'm4v'}
+DOCUMENT_EXTENSIONS = {'pdf', 'doc', 'docx'}
+ALLOWED_EXTENSIONS = IMAGE_EXTENSIONS | VIDEO_EXTENSIONS | DOCUMENT_EXTENSIONS
+
+# Форматы, которые Pillow умеет пересохранять без плагинов
+RESIZABLE_IMAGE_EXTENSIONS = {'jpg', 'jpeg', 'png', 'webp'}
+# Копии, которые отдают сериализаторы вложений (RenditionsField), — готовим заранее
+PREVIEW_SIZES = ('thumb', 'medium')
+FFPROBE_TIMEOUT = 30
+
+
+def file_extension(name):
+    return os.path.splitext(name or '')[1].lstrip('.').lower()
+
+
+class ApplicationUploadLimitHandler(FileUploadHandler):
+    """Ранняя проверка загрузки. Ошибку кладёт в self.error и останавливает разбор."""
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.error = None
+        self.total_size = 0
+        self.file_size = 0
+        self.max_file_size = settings.APPLICATION_UPLOAD_MAX_FILE_SIZE
+        self.max_total_size = settings.APPLICATION_UPLOAD_MAX_TOTAL_SIZE
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length and content_length > self.max_total_size:
+            self.error = "Слишком большой объём файлов"
+            # Тело даже не читаем: отдаём пустые данные, view вернёт 400
+            return QueryDict(), MultiValueDict()
+        return None
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        if file_extension(file_name) not in ALLOWED_EXTENSIONS:
+            self._reject(f"Недопустимый тип файла: {file_name}")
+        self.file_size = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.file_size += len(raw_data)
+        self.total_size += len(raw_data)
+        if self.file_size > self.max_file_size:
+            self._reject(f"Файл {self.file_name} больше {self.max_file_size // (1024 * 1024)} МБ")
+        if self.total_size > self.max_total_size:
+            self._reject("Слишком большой объём файлов")
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None  # сам файл собирает следующий handler
+
+    def _reject(self, message):
+        self.error = message
+        raise StopUpload(connection_reset=False)
+
+
+def install_upload_handlers(request):
+    """Вызывать до первого обращения к request.data / request.FILES (Django HttpRequest)."""
+    request.upload_handlers = [ApplicationUploadLimitHandler(request), TemporaryFileUploadHandler(request)]
+
+
+def get_upload_error(request):
+    """Разбирает тело запроса (если ещё не разобрано) и возвращает ошибку лимитов или None."""
+    request.FILES
+    for handler in request.upload_handlers:
+        if isinstance(handler, ApplicationUploadLimitHandler):
+            return handler.error
+    return None
+
+
+def save_uploaded_files(application, files, model, label_for=lambda key: key):
+    """
+    Сохраняет все файлы запроса как вложения заявки: перенос временных файлов в media
+    и один bulk_create. Обработку запускает фоновый process_attachments.
+    """
+    attachments = []
+    for key in files:
+        for uploaded in files.getlist(key):
+            attachment = model(application=application, label=label_for(key)[:255])
+            attachment.file.save(uploaded.name, uploaded, save=False)
+            attachments.append(attachment)
+
+    model.objects.bulk_create(attachments)
+    return attachments
+
+
+def process_attachment(attachment):
+    """Фоновая обработка одного вложения. Возвращает meta для сохранения в строке."""
+    path = attachment.file.path
+    ext = file_extension(path)
+    meta = {"size": os.path.getsize(path)}
+
+    if ext in IMAGE_EXTENSIONS:
+        meta.update(_image_size(path))
+        if ext in RESIZABLE_IMAGE_EXTENSIONS:
+            # Превью для админки и списка заявок готовы до первого просмотра
+            for size in PREVIEW_SIZES:
+                ensure_rendition(attachment.file, size)
+    elif ext in VIDEO_EXTENSIONS:
+        meta.update(_probe_video(path))
+    return meta
+
+
+def _image_size(path):
+    from PIL import Image
+
+    with Image.open(path) as image:
+        width, height = image.size
+    return {"width": width, "height": height}
+
+
+def _probe_video(path):
+    ffprobe = shutil.which('ffprobe')
+    if not ffprobe:
+        return {}
+
+    result = subprocess.run(
+        [ffprobe, '-v', 'error', '-select_streams', 'v:0',
+         '-show_entries', 'stream=width,height:format=duration', '-of', 'json', path],
+        capture_output=True, text=True, timeout=FFPROBE_TIMEOUT, check=True,
+    )
+    data = json.loads(result.stdout or '{}')
+    stream = (data.get('streams') or [{}])[0]
+    duration = (data.get('format') or {}).get('duration')
+    return {
+        "width": stream.get('width'),
+        "height": stream.get('height'),
+        "duration": float(duration) if duration else None,
+    }
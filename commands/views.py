@@ -1,5 +1,6 @@
 import json
 import os
+from django.db import transaction
 from django.utils import timezone
 from django.shortcuts import render, get_object_or_404, redirect
 from rest_framework import generics, status
@@ -19,6 +20,8 @@ from .serializers import (
     BoardPositionSerializer, BoardApplicationSerializer
 )
 
+from .uploads import get_upload_error, install_upload_handlers, save_uploaded_files
+
 try:
     from users.models import Volunteer
 except ImportError:
@@ -66,6 +69,12 @@ class CommandDetailView(generics.RetrieveAPIView):
 
 class ApplicationListCreateView(generics.ListCreateAPIView):
     serializer_class = ApplicationSerializer
+
+    def initialize_request(self, request, *args, **kwargs):
+        # Лимиты на файлы ставим до того, как DRF начнёт разбирать тело запроса
+        if request.method == 'POST':
+            install_upload_handlers(request)
+        return super().initialize_request(request, *args, **kwargs)
     
     # 🔥 РАЗДЕЛЯЕМ ПРАВА: POST для всех (чтобы волонтеры могли подать заявку), GET для своих
     def get_permissions(self):
@@ -80,7 +89,8 @@ class ApplicationListCreateView(generics.ListCreateAPIView):
         if not user.is_authenticated:
             return Application.objects.none()
 
-        queryset = Application.objects.all().order_by("-created_at")
+        # command.title и файлы — сразу для всей страницы, без запроса на каждую заявку
+        queryset = Application.objects.select_related("command").prefetch_related("files").order_by("-created_at")
 
         # Проверяем роль (безопасно)
         is_management = user.is_superuser or getattr(user, "role", "") in ["admin", "president"]
@@ -96,6 +106,10 @@ class ApplicationListCreateView(generics.ListCreateAPIView):
 
     def post(self, request, *args, **kwargs):
         try:
+            upload_error = get_upload_error(request)
+            if upload_error:
+                return Response({"error": upload_error}, status=status.HTTP_400_BAD_REQUEST)
+
             command_slug = request.data.get('command_slug')
             command = get_object_or_404(Command, slug=command_slug)
             now = timezone.now()
@@ -108,15 +122,9 @@ class ApplicationListCreateView(generics.ListCreateAPIView):
             answers_raw = request.data.get('answers', '{}')
             answers = json.loads(answers_raw)
 
-            app = Application.objects.create(command=command, answers=answers)
-
-            for key in request.FILES:
-                for f in request.FILES.getlist(key):
-                    Attachment.objects.create(
-                        application=app,
-                        file=f,
-                        label=key.replace('TEXT__','')
-                    )
+            with transaction.atomic():
+                app = Application.objects.create(command=command, answers=answers)
+                save_uploaded_files(app, request.FILES, Attachment, label_for=lambda key: key.replace('TEXT__', ''))
 
             return Response({"status": "success", "id": app.id}, status=status.HTTP_201_CREATED)
         except Exception as e:
@@ -188,6 +196,11 @@ class BoardPositionDetailView(generics.RetrieveAPIView):
 class BoardApplicationListCreateView(generics.ListCreateAPIView):
     serializer_class = BoardApplicationSerializer
 
+    def initialize_request(self, request, *args, **kwargs):
+        if request.method == 'POST':
+            install_upload_handlers(request)
+        return super().initialize_request(request, *args, **kwargs)
+
     # 🔥 ТО ЖЕ САМОЕ ДЛЯ БОРДА
     def get_permissions(self):
         if self.request.method == 'POST':
@@ -201,7 +214,7 @@ class BoardApplicationListCreateView(generics.ListCreateAPIView):
             return BoardApplication.objects.none()
 
         # При необходимости здесь тоже можно добавить фильтрацию по лидеру борда
-        return BoardApplication.objects.all().order_by("-created_at")
+        return BoardApplication.objects.select_related("board_position").prefetch_related("files").order_by("-created_at")
 
 
 
@@ -209,6 +222,19 @@ class BoardApplicationListCreateView(generics.ListCreateAPIView):
 
         try:
 
+            upload_error = get_upload_error(request)
+
+            if upload_error:
+
+                return Response(
+                    {
+                        "error":upload_error
+                    },
+                    status=400
+                )
+
+
+
             board_slug = request.data.get(
                 "board_slug"
             )
@@ -253,29 +279,22 @@ class BoardApplicationListCreateView(generics.ListCreateAPIView):
 
 
 
-            application = BoardApplication.objects.create(
-
-                board_position=board_position,
-
-                answers=answers
-
-            )
-
-
-
-            for key in request.FILES:
+            with transaction.atomic():
 
-                for file in request.FILES.getlist(key):
+                application = BoardApplication.objects.create(
 
-                    BoardAttachment.objects.create(
+                    board_position=board_position,
 
-                        application=application,
+                    answers=answers
 
-                        file=file,
+                )
 
-                        label=key
 
-                    )
+                save_uploaded_files(
+                    application,
+                    request.FILES,
+                    BoardAttachment
+                )
 
 
 
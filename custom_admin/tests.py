@@ -1,3 +1,42 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from users.models import AppSettings, Volunteer
+
+
+@override_settings(ROOT_URLCONF="custom_admin.urls")
+class ToggleSettingsTests(TestCase):
+    def setUp(self):
+        self.client.force_login(Volunteer.objects.create_superuser("admin", "pw"))
+
+    def _toggle(self, setting_type, value):
+        return self.client.post(
+            reverse("toggle_settings"), json.dumps({"type": setting_type, "value": value}),
+            content_type="application/json",
+        )
+
+    def test_string_false_closes(self):
+        self.assertEqual(self._toggle("registration", "false").status_code, 200)
+        self.assertFalse(AppSettings.objects.get(pk=1).is_registration_open)
+
+        self.assertEqual(self._toggle("registration", True).status_code, 200)
+        self.assertTrue(AppSettings.objects.get(pk=1).is_registration_open)
+
+    def test_only_toggled_field_is_written(self):
+        AppSettings.objects.create(pk=1, is_direction_selection_open=True)
+        # Копия в памяти процесса устарела: в ней выбор направлений ещё закрыт
+        AppSettings.objects.filter(pk=1).update(is_direction_selection_open=False)
+        AppSettings.get_settings()
+        AppSettings.objects.filter(pk=1).update(is_direction_selection_open=True)
+
+        self._toggle("points", False)
+
+        settings = AppSettings.objects.get(pk=1)
+        self.assertFalse(settings.is_points_submission_open)
+        self.assertTrue(settings.is_direction_selection_open)
+
+    def test_bad_input(self):
+        self.assertEqual(self._toggle("unknown", True).status_code, 400)
+        self.assertEqual(self._toggle("points", "maybe").status_code, 400)
@@ -5,7 +5,9 @@ from django.contrib.auth.mixins import UserPassesTestMixin
 from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import user_passes_test
 from django.shortcuts import get_object_or_404
+from django.db import transaction
 from django.db.models import Count, Q
+from rest_framework import serializers
 
 from users.models import Volunteer, VolunteerApplication, AppSettings, ActivitySubmission
 from projects.models import Project  # Убедись, что путь к модели Project правильный!
@@ -57,6 +59,13 @@ class AdminDashboardView(UserPassesTestMixin, TemplateView):
 
 # --- AJAX API ЕНДПОИНТЫ ---
 
+SETTINGS_TOGGLES = {
+    'registration': 'is_registration_open',
+    'direction': 'is_direction_selection_open',
+    'points': 'is_points_submission_open',
+}
+
+
 @require_POST
 @user_passes_test(is_admin_or_curator)
 def toggle_settings(request):
@@ -64,11 +73,22 @@ def toggle_settings(request):
     setting_type = data.get('type')
     value = data.get('value')
     
-    settings = AppSettings.get_settings()
-    if setting_type == 'registration': settings.is_registration_open = value
-    elif setting_type == 'direction': settings.is_direction_selection_open = value
-    elif setting_type == 'points': settings.is_points_submission_open = value
-    settings.save()
+    field = SETTINGS_TOGGLES.get(setting_type)
+    if field is None:
+        return JsonResponse({"status": "error", "message": "Неизвестная настройка"}, status=400)
+    # Явный разбор: bool("false") был бы True
+    try:
+        value = serializers.BooleanField().to_internal_value(value)
+    except serializers.ValidationError:
+        return JsonResponse({"status": "error", "message": "Значение должно быть true или false"}, status=400)
+
+    # Свежая строка под блокировкой, а не копия из памяти процесса: иначе save()
+    # перезапишет устаревшими значениями рубильники, переключённые с другого воркера.
+    # save() после коммита меняет версию в кэше — остальные воркеры перечитают настройки.
+    with transaction.atomic():
+        settings, _ = AppSettings.objects.select_for_update().get_or_create(pk=1)
+        setattr(settings, field, value)
+        settings.save(update_fields=[field])
     
     return JsonResponse({"status": "success"})
 
@@ -0,0 +1,35 @@
+"""
+Сброс кэша направлений в Telegram-боте.
+
+Бот держит справочники направлений в памяти с TTL (telegram_bot/common/ref_cache.py).
+Чтобы правки из админки появлялись сразу, после коммита изменения backend шлёт
+боту POST на TELEGRAM_BOT_CACHE_URL. Запрос идёт в фоновом потоке с коротким
+таймаутом: недоступный бот не задерживает сохранение, кэш просто дождётся TTL.
+"""
+import logging
+import threading
+
+import requests
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+BOT_CACHE_TIMEOUT = 2
+
+
+def _post(name):
+    try:
+        requests.post(
+            settings.TELEGRAM_BOT_CACHE_URL,
+            json={"name": name},
+            headers={"X-Bot-Token": settings.TELEGRAM_BOT_INTERNAL_TOKEN},
+            timeout=BOT_CACHE_TIMEOUT,
+        )
+    except requests.RequestException as e:
+        logger.warning("Не удалось сбросить кэш бота %s: %s", name, e)
+
+
+def notify_bot_cache(name):
+    if not settings.TELEGRAM_BOT_CACHE_URL:
+        return
+    threading.Thread(target=_post, args=(name,), daemon=True).start()
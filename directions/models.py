@@ -1,5 +1,9 @@
 # directions/models.py
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .bot_cache import notify_bot_cache
 
 class VolunteerDirection(models.Model):
     name = models.CharField(max_length=100, verbose_name="Направление для волонтёров")
@@ -29,3 +33,14 @@ class ProjectDirection(models.Model):
     class Meta:
         verbose_name = "Направление проекта"
         verbose_name_plural = "Направления проектов"
+
+
+# Бот кэширует направления — после изменения просим его перечитать
+@receiver([post_save, post_delete], sender=VolunteerDirection)
+def reset_bot_volunteer_directions(sender, **kwargs):
+    transaction.on_commit(lambda: notify_bot_cache("volunteer_directions"))
+
+
+@receiver([post_save, post_delete], sender=ProjectDirection)
+def reset_bot_project_directions(sender, **kwargs):
+    transaction.on_commit(lambda: notify_bot_cache("project_directions"))
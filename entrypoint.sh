@@ -12,6 +12,9 @@ echo "PostgreSQL запущен!"
 echo "Проверка прав доступа..."
 
 # Подготовка
+# Временные файлы загрузок — на томе media, чтобы сохранение было переименованием
+mkdir -p "${FILE_UPLOAD_TEMP_DIR:-/app/media/tmp_uploads}"
+
 echo "Применение миграций Django..."
 python manage.py migrate --noinput
 
@@ -1,9 +1,21 @@
 # admin.py
 from django.contrib import admin
+
+from projects.utils import add_payment_to_year_result, remove_payment_from_year_result
 from .models import Payment, PaymentLog, ProjectPayment
+from .status_events import notify_payment_status
+
+
+class PaymentStatusAdminMixin:
+    """Статус, изменённый вручную, тоже доходит до страницы оплаты (кэш опроса и SSE)."""
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if "status" in form.changed_data:
+            notify_payment_status(obj.payment_id, obj.status)
 
 @admin.register(Payment)
-class PaymentAdmin(admin.ModelAdmin):
+class PaymentAdmin(PaymentStatusAdminMixin, admin.ModelAdmin):
     list_display = ("payment_id", "first_name", "last_name", "amount", "status", "created_at")
     list_filter = ("status", "created_at")
     search_fields = ("payment_id", "first_name", "last_name", "phone", "comment")
@@ -25,9 +37,23 @@ class PaymentLogAdmin(admin.ModelAdmin):
 
 
 @admin.register(ProjectPayment)
-class ProjectPaymentAdmin(admin.ModelAdmin):
+class ProjectPaymentAdmin(PaymentStatusAdminMixin, admin.ModelAdmin):
     list_display = ("payment_id", "project", "first_name", "last_name", "amount", "status", "created_at")
     list_filter = ("status", "project", "created_at")
     search_fields = ("payment_id", "first_name", "last_name", "phone", "comment", "project__name")
     readonly_fields = ("payment_id", "created_at", "payment_url")
     ordering = ("-created_at",)
+
+    def save_model(self, request, obj, form, change):
+        # Ручная смена статуса (например, возврат) поправляет и YearResult.
+        # Админка сохраняет в транзакции: строка заблокирована до конца, вебхук подождёт
+        previous_status = None
+        if change:
+            previous_status = (
+                ProjectPayment.objects.select_for_update().values_list("status", flat=True).get(pk=obj.pk)
+            )
+        super().save_model(request, obj, form, change)
+        if obj.status == "success" and previous_status != "success":
+            add_payment_to_year_result(obj)
+        elif previous_status == "success" and obj.status != "success":
+            remove_payment_from_year_result(obj)
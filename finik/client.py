@@ -0,0 +1,61 @@
+import time
+from urllib.parse import urljoin
+
+import requests
+from authorizer import Signer
+from django.conf import settings
+
+FINIK_TIMEOUT = 15
+STATUS_MAP = {"SUCCEEDED": "success", "FAILED": "failed"}
+
+
+class FinikError(Exception):
+    pass
+
+
+def get_payment_status(payment_id, session=None):
+    """
+    Запрашивает статус платежа у Finik (подпись та же, что при создании платежа).
+    Возвращает "success" / "failed" / "pending" или None, если Finik ответил 404.
+    None — «неизвестно», а не «не оплачен»: 404 бывает и от неверного
+    FINIK_PAYMENT_STATUS_PATH, поэтому по нему статус платежа не меняют.
+    """
+    path = settings.FINIK_PAYMENT_STATUS_PATH.format(payment_id=payment_id)
+    timestamp = str(int(time.time() * 1000))
+    request_data = {
+        "http_method": "GET",
+        "path": path,
+        "headers": {
+            "Host": settings.FINIK_HOST,
+            "x-api-key": settings.FINIK_API_KEY,
+            "x-api-timestamp": timestamp,
+        },
+        "query_string_parameters": None,
+        "body": None,
+    }
+    signature = Signer(**request_data).sign(settings.FINIK_PRIVATE_PEM)
+
+    try:
+        resp = (session or requests).get(
+            urljoin(settings.FINIK_BASE_URL, path),
+            headers={
+                "x-api-key": settings.FINIK_API_KEY,
+                "x-api-timestamp": timestamp,
+                "signature": signature,
+            },
+            timeout=FINIK_TIMEOUT,
+        )
+    except requests.RequestException as e:
+        raise FinikError(str(e)) from e
+
+    if resp.status_code == 404:
+        return None
+    if resp.status_code != 200:
+        raise FinikError(f"Finik вернул {resp.status_code}: {resp.text[:200]}")
+
+    try:
+        status = resp.json().get("status") or ""
+    except ValueError as e:
+        raise FinikError("Некорректный JSON от Finik") from e
+
+    return STATUS_MAP.get(status.upper(), "pending")
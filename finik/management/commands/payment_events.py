@@ -0,0 +1,134 @@
+import asyncio
+import json
+import logging
+import signal
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+
+from finik.status_events import NOTIFY_CHANNEL, TERMINAL_STATUSES, read_payment_status
+
+logger = logging.getLogger("finik_webhook")
+
+STREAM_PATH = "/finik/api/payment-status/{payment_id}/events/"
+HEARTBEAT_INTERVAL = 15     # комментарий в поток, чтобы nginx и браузер не рвали соединение
+STREAM_TIMEOUT = 10 * 60    # дальше закрываем — EventSource сам переподключится
+
+
+def _sse(payment_id, status):
+    data = json.dumps({"payment_id": payment_id, "status": status, "is_final": status in TERMINAL_STATUSES})
+    return f"event: status\ndata: {data}\n\n".encode()
+
+
+class Command(BaseCommand):
+    help = (
+        "SSE-сервер статусов платежей: слушает NOTIFY от вебхуков (Postgres LISTEN) "
+        "и пушит статус открытым EventSource страницы оплаты. Воркеры gunicorn не занимает"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="0.0.0.0")
+        parser.add_argument("--port", type=int, default=8002)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("payment_events работает только с PostgreSQL (LISTEN/NOTIFY)")
+        logging.basicConfig(level=logging.INFO)
+        asyncio.run(self.serve(options["host"], options["port"]))
+
+    async def serve(self, host, port):
+        loop = asyncio.get_running_loop()
+        # payment_id -> очереди открытых потоков
+        self.subscribers = {}
+        # ORM синхронный: начальный статус читаем в отдельных потоках
+        self.db_pool = ThreadPoolExecutor(max_workers=4)
+
+        listener = connection.get_new_connection(connection.get_connection_params())
+        listener.autocommit = True
+        with listener.cursor() as cursor:
+            cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+
+        stop = asyncio.Event()
+        loop.add_reader(listener.fileno(), self._dispatch, listener, stop)
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+
+        app = web.Application()
+        app.router.add_get(STREAM_PATH, self.stream)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        logger.info(f"[payment_events] SSE на {host}:{port}, канал {NOTIFY_CHANNEL}")
+
+        try:
+            await stop.wait()
+        finally:
+            loop.remove_reader(listener.fileno())
+            await runner.cleanup()
+            listener.close()
+            self.db_pool.shutdown(wait=False)
+
+    def _dispatch(self, listener, stop):
+        try:
+            listener.poll()
+        except Exception:
+            # Соединение с БД потеряно — выходим, docker перезапустит сервис
+            logger.exception("[payment_events] LISTEN-соединение потеряно")
+            stop.set()
+            return
+        while listener.notifies:
+            notify = listener.notifies.pop(0)
+            try:
+                data = json.loads(notify.payload)
+            except ValueError:
+                continue
+            for queue in self.subscribers.get(data.get("payment_id"), ()):
+                queue.put_nowait(data.get("status"))
+
+    def _read_status(self, payment_id):
+        close_old_connections()
+        return read_payment_status(payment_id)
+
+    async def stream(self, request):
+        loop = asyncio.get_running_loop()
+        payment_id = request.match_info["payment_id"]
+
+        # Подписываемся до чтения из БД: NOTIFY между SELECT и подпиской не потеряется
+        queue = asyncio.Queue()
+        self.subscribers.setdefault(payment_id, set()).add(queue)
+        try:
+            status = await loop.run_in_executor(self.db_pool, self._read_status, payment_id)
+            if status is None:
+                return web.json_response({"error": "Payment not found"}, status=404)
+
+            response = web.StreamResponse(headers={
+                "Content-Type": "text/event-stream",
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no",
+            })
+            await response.prepare(request)
+            deadline = loop.time() + STREAM_TIMEOUT
+
+            await response.write(_sse(payment_id, status))
+            while status not in TERMINAL_STATUSES:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    new_status = await asyncio.wait_for(queue.get(), min(HEARTBEAT_INTERVAL, remaining))
+                except asyncio.TimeoutError:
+                    await response.write(b": ping\n\n")
+                    continue
+                if new_status != status:
+                    status = new_status
+                    await response.write(_sse(payment_id, status))
+            return response
+        finally:
+            # Закрытую страницу замечаем на ближайшей записи (не позже пинга): aiohttp
+            # гасит ConnectionResetError сам, а мы здесь снимаем подписку
+            queues = self.subscribers.get(payment_id)
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[payment_id]
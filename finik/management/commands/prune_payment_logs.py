@@ -0,0 +1,47 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from finik.models import PaymentLog
+
+
+class Command(BaseCommand):
+    help = "Удаляет старые логи платежей (PaymentLog) пачками"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.PAYMENT_LOG_RETENTION_DAYS,
+            help="Сколько последних дней логов оставить",
+        )
+        parser.add_argument(
+            "--errors-days",
+            type=int,
+            default=None,
+            help="Отдельный срок хранения для ERROR (по умолчанию как --days)",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        cutoff = now - timedelta(days=options["days"])
+        errors_cutoff = now - timedelta(days=options["errors_days"] or options["days"])
+        batch_size = options["batch_size"]
+
+        deleted = self._prune(PaymentLog.objects.filter(created_at__lt=cutoff).exclude(level="ERROR"), batch_size)
+        deleted += self._prune(PaymentLog.objects.filter(created_at__lt=errors_cutoff, level="ERROR"), batch_size)
+
+        self.stdout.write(self.style.SUCCESS(f"Удалено логов платежей: {deleted}"))
+
+    def _prune(self, queryset, batch_size):
+        # Удаляем по id пачками (индекс по created_at), чтобы не держать долгую блокировку таблицы
+        deleted = 0
+        while True:
+            ids = list(queryset.order_by("id").values_list("id", flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            count, _ = PaymentLog.objects.filter(id__in=ids).delete()
+            deleted += count
@@ -0,0 +1,118 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from finik.client import FinikError, get_payment_status
+from finik.models import Payment, ProjectPayment
+from finik.utils import log_payment, set_payment_status, set_project_payment_status
+
+
+class Command(BaseCommand):
+    help = (
+        "Сверяет зависшие pending-платежи с Finik (вебхук не пришёл) "
+        "и удаляет брошенные черновики ProjectPayment"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than", type=int, default=30,
+                            help="Проверять pending-платежи старше N минут")
+        parser.add_argument("--expire-after", type=int, default=24,
+                            help="Через N часов платёж, который Finik всё ещё считает pending, считаем failed")
+        parser.add_argument("--draft-ttl", type=int, default=24,
+                            help="Удалять черновики ProjectPayment (не отправленные в Finik) старше N часов")
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--concurrency", type=int, default=8,
+                            help="Сколько запросов к Finik выполнять параллельно")
+        parser.add_argument("--dry-run", action="store_true", help="Только показать, ничего не менять")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        self.dry_run = options["dry_run"]
+        self.batch_size = options["batch_size"]
+        self.expire_before = now - timedelta(hours=options["expire_after"])
+        stale_before = now - timedelta(minutes=options["older_than"])
+
+        summary = Counter()
+        session = requests.Session()
+
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            self._reconcile(
+                Payment.objects.filter(status="pending", created_at__lt=stale_before),
+                set_payment_status, pool, session, summary,
+            )
+            # Черновик (submitted_at пуст) в Finik не отправлялся — его не сверяем
+            self._reconcile(
+                ProjectPayment.objects.filter(
+                    status="pending", created_at__lt=stale_before, submitted_at__isnull=False
+                ),
+                set_project_payment_status, pool, session, summary,
+            )
+
+        summary["drafts_deleted"] = self._delete_drafts(now - timedelta(hours=options["draft_ttl"]))
+
+        if not self.dry_run:
+            log_payment("INFO", "Сверка платежей с Finik", dict(summary))
+        self.stdout.write(self.style.SUCCESS(f"Сверка завершена: {dict(summary)}"))
+
+    def _reconcile(self, queryset, apply_status, pool, session, summary):
+        last_id = 0
+        while True:
+            # Keyset-пагинация по id: пачки не съезжают, пока мы меняем статусы
+            batch = list(
+                queryset.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", "payment_id", "created_at")[:self.batch_size]
+            )
+            if not batch:
+                return
+            last_id = batch[-1][0]
+
+            results = pool.map(lambda row: self._fetch_status(row[1], session), batch)
+
+            for (_, payment_id, created_at), (status, error) in zip(batch, results):
+                if error:
+                    summary["errors"] += 1
+                    self.stderr.write(f"{payment_id}: {error}")
+                    continue
+
+                if status is None:
+                    # 404: неверный путь или неизвестный id — не повод считать платёж неудачным
+                    summary["unknown"] += 1
+                    continue
+                if status in ("success", "failed"):
+                    new_status = status
+                elif created_at < self.expire_before:
+                    # Finik знает платёж, но он так и висит в ожидании — закрываем
+                    new_status = "failed"
+                else:
+                    summary["still_pending"] += 1
+                    continue
+
+                summary[new_status] += 1
+                if not self.dry_run:
+                    apply_status(payment_id, new_status)
+
+    def _fetch_status(self, payment_id, session):
+        try:
+            return get_payment_status(payment_id, session=session), None
+        except FinikError as e:
+            return None, str(e)
+
+    def _delete_drafts(self, draft_before):
+        drafts = ProjectPayment.objects.filter(
+            status="pending", submitted_at__isnull=True, created_at__lt=draft_before
+        )
+        if self.dry_run:
+            return drafts.count()
+
+        deleted = 0
+        while True:
+            ids = list(drafts.order_by("id").values_list("id", flat=True)[:self.batch_size])
+            if not ids:
+                return deleted
+            count, _ = ProjectPayment.objects.filter(id__in=ids).delete()
+            deleted += count
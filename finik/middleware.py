@@ -0,0 +1,19 @@
+from .utils import start_payment_log_buffer, stop_payment_log_buffer
+
+
+class PaymentLogMiddleware:
+    """
+    Копит вызовы log_payment за время запроса и записывает их одним bulk_create
+    после ответа view. ERROR-события пишутся сразу в момент вызова, а если view
+    в этот момент внутри transaction.atomic — здесь, после её коммита или отката.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = start_payment_log_buffer()
+        try:
+            return self.get_response(request)
+        finally:
+            stop_payment_log_buffer(token)
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.4 on 2026-10-19 17:16
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finik', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='paymentlog',
+            name='created_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Дата создания'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.4 on 2026-10-19 17:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finik', '0002_paymentlog_created_at_index'),
+        ('projects', '0003_yearresult_defaults'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', 'created_at'], name='finik_payment_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectpayment',
+            index=models.Index(fields=['status', 'created_at'], name='finik_projpay_status_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:02
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_existing_submitted(apps, schema_editor):
+    # Старые платежи из CreateProjectPaymentAPIView не отличить от черновиков,
+    # поэтому все существующие считаем отправленными: сверка их не удалит
+    ProjectPayment = apps.get_model('finik', 'ProjectPayment')
+    ProjectPayment.objects.update(submitted_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finik', '0003_payment_status_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectpayment',
+            name='submitted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Отправлен в Finik'),
+        ),
+        migrations.RunPython(mark_existing_submitted, migrations.RunPython.noop),
+    ]
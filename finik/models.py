@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from projects.models import Project
 import uuid
 
@@ -23,6 +24,9 @@ class Payment(models.Model):
     class Meta:
         verbose_name = "Платёж"
         verbose_name_plural = "Платежи"
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="finik_payment_status_idx"),
+        ]
 
 
 class ProjectPayment(models.Model):
@@ -45,6 +49,9 @@ class ProjectPayment(models.Model):
         default="pending"
     )
     payment_url = models.URLField("Ссылка на оплату", blank=True, null=True)
+    # Когда платёж отправлен в Finik. None — черновик из ProjectPaymentInitAPIView,
+    # Finik о нём не знает (payment_url для этого не годится: Finik может её не вернуть)
+    submitted_at = models.DateTimeField("Отправлен в Finik", blank=True, null=True)
     created_at = models.DateTimeField("Дата создания", auto_now_add=True)
 
     def __str__(self):
@@ -53,6 +60,9 @@ class ProjectPayment(models.Model):
     class Meta:
         verbose_name = "Платёж проекта"
         verbose_name_plural = "Платежи проектов"
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="finik_projpay_status_idx"),
+        ]
 
 
 class PaymentLog(models.Model):
@@ -61,7 +71,9 @@ class PaymentLog(models.Model):
         ("WARNING", "Предупреждение"),
         ("ERROR", "Ошибка"),
     )
-    created_at = models.DateTimeField("Дата создания", auto_now_add=True)
+    # default вместо auto_now_add: логи пишутся пачкой в конце запроса,
+    # а время должно остаться временем события (см. finik/utils.py)
+    created_at = models.DateTimeField("Дата создания", default=timezone.now, db_index=True)
     level = models.CharField("Уровень", max_length=20, choices=LEVEL_CHOICES)
     message = models.TextField("Сообщение")
     extra = models.JSONField("Дополнительно", null=True, blank=True)
@@ -0,0 +1,69 @@
+"""
+Статусы платежей для страницы оплаты.
+
+Каждый, кто меняет статус (вебхуки, сверка, админка, ошибки создания платежа),
+вызывает notify_payment_status внутри своей транзакции. После COMMIT:
+- статус кладётся в кэш, откуда его читает короткий опрос (запасной путь);
+- Postgres доставляет NOTIFY на канал NOTIFY_CHANNEL, его слушает SSE-сервер
+  (manage.py payment_events) и сразу пушит статус открытым EventSource.
+"""
+import json
+import uuid
+
+from django.db import transaction
+
+from interact.cache import shared_cache
+
+from .models import Payment, ProjectPayment
+
+TERMINAL_STATUSES = ("success", "failed")
+NOTIFY_CHANNEL = "finik_payment_status"
+
+# Сколько держим последний статус в кэше — с запасом на время оплаты по QR
+STATUS_CACHE_TIMEOUT = 60 * 60
+
+
+def _status_cache_key(payment_id):
+    return f"finik:payment_status:{payment_id}"
+
+
+def notify_payment_status(payment_id, status):
+    """
+    Сообщает о новом статусе. Вызывать внутри транзакции, которая его записала:
+    и кэш, и NOTIFY срабатывают только после COMMIT, откат ничего не отправит.
+    """
+    payment_id = str(payment_id)
+    transaction.on_commit(lambda: shared_cache.set(_status_cache_key(payment_id), status, STATUS_CACHE_TIMEOUT))
+
+    connection = transaction.get_connection()
+    if connection.vendor == "postgresql":
+        # NOTIFY в транзакции Postgres доставляет слушателям только после COMMIT
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_notify(%s, %s)",
+                [NOTIFY_CHANNEL, json.dumps({"payment_id": payment_id, "status": status})],
+            )
+
+
+def get_cached_status(payment_id):
+    return shared_cache.get(_status_cache_key(payment_id))
+
+
+def remember_status(payment_id, status):
+    """
+    Статус, прочитанный из БД при промахе кэша. add, а не set: если вебхук успел
+    записать более свежий статус между нашим SELECT и этим вызовом, он не затрётся.
+    """
+    shared_cache.add(_status_cache_key(payment_id), status, STATUS_CACHE_TIMEOUT)
+
+
+def read_payment_status(payment_id):
+    """Статус Payment или ProjectPayment из БД; None — платежа нет."""
+    status = Payment.objects.filter(payment_id=payment_id).values_list("status", flat=True).first()
+    if status is not None:
+        return status
+    try:
+        project_payment_id = uuid.UUID(str(payment_id))
+    except ValueError:
+        return None
+    return ProjectPayment.objects.filter(payment_id=project_payment_id).values_list("status", flat=True).first()
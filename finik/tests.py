@@ -1,3 +1,263 @@
-from django.test import TestCase
+import uuid
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from finik import client
+from finik.models import Payment, PaymentLog, ProjectPayment
+from finik.status_events import get_cached_status
+from finik.utils import (
+    log_payment, set_payment_status, set_project_payment_status, start_payment_log_buffer, stop_payment_log_buffer,
+)
+from projects.models import Project, YearResult
+
+COMMAND = "finik.management.commands.reconcile_payments"
+
+
+class ReconcilePaymentsTests(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(
+            image="project/test.jpg",
+            name="Сбор макулатуры",
+            title="Описание",
+            price=500,
+            category="education",
+            phone_number="+996555000000",
+            address="Бишкек",
+            time_start=timezone.now(),
+            time_end=timezone.now() + timedelta(hours=2),
+        )
+
+    def _project_payment(self, hours_ago, submitted=True, **fields):
+        payment = ProjectPayment.objects.create(project=self.project, amount=500, **fields)
+        created_at = timezone.now() - timedelta(hours=hours_ago)
+        # auto_now_add не даёт задать дату при создании
+        ProjectPayment.objects.filter(pk=payment.pk).update(
+            created_at=created_at,
+            submitted_at=created_at if submitted else None,
+        )
+        payment.refresh_from_db()
+        return payment
+
+    def _payment(self, hours_ago, payment_id):
+        payment = Payment.objects.create(
+            payment_id=payment_id, amount=100, first_name="Айбек", last_name="Асанов", phone="0555"
+        )
+        Payment.objects.filter(pk=payment.pk).update(created_at=timezone.now() - timedelta(hours=hours_ago))
+        return payment
+
+    def _reconcile(self, statuses, *args):
+        def fake_status(payment_id, session=None):
+            return statuses.get(str(payment_id))
+
+        with mock.patch(f"{COMMAND}.get_payment_status", side_effect=fake_status) as fetch:
+            call_command("reconcile_payments", "--concurrency", "1", *args, stdout=StringIO(), stderr=StringIO())
+        return {str(c.args[0]) for c in fetch.call_args_list}
+
+    def test_real_payment_without_url_is_reconciled_not_deleted(self):
+        # CreateProjectPaymentAPIView не сохраняет payment_url — платёж всё равно настоящий
+        real = self._project_payment(hours_ago=48)
+        statuses = {str(real.payment_id): "success"}
+
+        with self.captureOnCommitCallbacks(execute=True):
+            fetched = self._reconcile(statuses)
+
+        self.assertEqual(fetched, {str(real.payment_id)})
+        real.refresh_from_db()
+        self.assertEqual(real.status, "success")
+
+    def test_only_unsubmitted_drafts_are_deleted(self):
+        old_draft = self._project_payment(hours_ago=48, submitted=False)
+        fresh_draft = self._project_payment(hours_ago=1, submitted=False)
+        real = self._project_payment(hours_ago=48)
+
+        fetched = self._reconcile({str(real.payment_id): "pending"}, "--expire-after", "72")
+
+        # Черновики в Finik не запрашиваются
+        self.assertEqual(fetched, {str(real.payment_id)})
+        self.assertFalse(ProjectPayment.objects.filter(pk=old_draft.pk).exists())
+        self.assertTrue(ProjectPayment.objects.filter(pk=fresh_draft.pk).exists())
+        self.assertTrue(ProjectPayment.objects.filter(pk=real.pk, status="pending").exists())
+
+    def test_unknown_status_leaves_payment_pending(self):
+        # 404 / None: неверный FINIK_PAYMENT_STATUS_PATH или неизвестный id — не failed,
+        # даже если платёж давно старше --expire-after
+        project_payment = self._project_payment(hours_ago=100)
+        payment = self._payment(hours_ago=100, payment_id="donation-1")
+
+        self._reconcile({})
+
+        project_payment.refresh_from_db()
+        payment.refresh_from_db()
+        self.assertEqual(project_payment.status, "pending")
+        self.assertEqual(payment.status, "pending")
+
+    def test_pending_in_finik_expires_to_failed(self):
+        expired = self._payment(hours_ago=30, payment_id="donation-old")
+        recent = self._payment(hours_ago=2, payment_id="donation-new")
+
+        self._reconcile({"donation-old": "pending", "donation-new": "pending"})
+
+        expired.refresh_from_db()
+        recent.refresh_from_db()
+        self.assertEqual(expired.status, "failed")
+        self.assertEqual(recent.status, "pending")
+
+    def _racing_webhook(self, setter):
+        # Сверка уже прочитала pending, но до записи её результата успел вебхук с success
+        def webhook_first(payment_id, status):
+            setter(payment_id, "success")
+            return setter(payment_id, status)
+
+        return mock.patch(f"{COMMAND}.{setter.__name__}", side_effect=webhook_first)
+
+    def test_webhook_success_before_expiry_is_kept(self):
+        payment = self._payment(hours_ago=30, payment_id="donation-race")
+
+        with self._racing_webhook(set_payment_status):
+            self._reconcile({"donation-race": "pending"})
+
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, "success")
+
+    def test_project_webhook_before_reconcile_counts_once(self):
+        payment = self._project_payment(hours_ago=30)
+
+        with self._racing_webhook(set_project_payment_status):
+            self._reconcile({str(payment.payment_id): "success"})
+
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, "success")
+        year = YearResult.objects.get(year=timezone.localtime(payment.created_at).year)
+        self.assertEqual((year.total_amount, year.education), (500, 1))
+
+    def test_dry_run_changes_nothing(self):
+        draft = self._project_payment(hours_ago=48, submitted=False)
+        payment = self._payment(hours_ago=48, payment_id="donation-2")
+
+        self._reconcile({"donation-2": "success"}, "--dry-run")
+
+        self.assertTrue(ProjectPayment.objects.filter(pk=draft.pk).exists())
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, "pending")
+
+
+class PaymentStatusTransitionTests(TestCase):
+    """success и failed окончательные: вебхуки и сверка меняют только pending."""
+
+    def setUp(self):
+        self.payment = Payment.objects.create(
+            payment_id="donation-1", amount=100, first_name="Айбек", last_name="Асанов", phone="0555"
+        )
+        project = Project.objects.create(
+            image="project/test.jpg", name="Сбор макулатуры", title="Описание", price=500,
+            category="education", phone_number="+996555000000", address="Бишкек",
+            time_start=timezone.now(), time_end=timezone.now() + timedelta(hours=2),
+        )
+        self.project_payment = ProjectPayment.objects.create(
+            project=project, amount=500, submitted_at=timezone.now()
+        )
+
+    def test_late_failed_webhook_keeps_success(self):
+        self.assertTrue(set_payment_status("donation-1", "success"))
+        self.assertTrue(set_payment_status("donation-1", "failed"))
+        self.assertTrue(set_payment_status("donation-1", "pending"))
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "success")
+
+    def test_failed_is_final(self):
+        set_payment_status("donation-1", "failed")
+        set_payment_status("donation-1", "success")
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "failed")
+
+    def test_unknown_payment(self):
+        self.assertFalse(set_payment_status("missing", "success"))
+        self.assertFalse(set_project_payment_status(uuid.uuid4(), "success"))
+
+    def test_project_payment_flip_is_counted_once(self):
+        payment_id = self.project_payment.payment_id
+        set_project_payment_status(payment_id, "success")
+        set_project_payment_status(payment_id, "failed")
+        set_project_payment_status(payment_id, "success")
+
+        self.project_payment.refresh_from_db()
+        self.assertEqual(self.project_payment.status, "success")
+        year = YearResult.objects.get(year=timezone.localtime(self.project_payment.created_at).year)
+        self.assertEqual((year.total_amount, year.education), (500, 1))
+
+    def test_every_writer_updates_cached_status(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            set_payment_status("donation-1", "success")
+            set_project_payment_status(self.project_payment.payment_id, "failed")
+
+        self.assertEqual(get_cached_status("donation-1"), "success")
+        self.assertEqual(get_cached_status(self.project_payment.payment_id), "failed")
+
+    def test_pending_webhook_changes_nothing(self):
+        set_project_payment_status(self.project_payment.payment_id, "pending")
+
+        self.project_payment.refresh_from_db()
+        self.assertEqual(self.project_payment.status, "pending")
+        self.assertFalse(YearResult.objects.exists())
+
+
+class PaymentLogBufferTests(TestCase):
+    def test_error_outside_transaction_is_written_at_once(self):
+        token = start_payment_log_buffer()
+        try:
+            log_payment("INFO", "Получен webhook")
+            log_payment("ERROR", "Платеж не найден")
+            self.assertEqual(PaymentLog.objects.count(), 2)
+        finally:
+            stop_payment_log_buffer(token)
+
+    def test_error_survives_rollback(self):
+        token = start_payment_log_buffer()
+        try:
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    log_payment("ERROR", "Ошибка при запросе к Finik")
+                    raise RuntimeError
+            self.assertFalse(PaymentLog.objects.exists())
+        finally:
+            stop_payment_log_buffer(token)
+
+        self.assertEqual(list(PaymentLog.objects.values_list("level", flat=True)), ["ERROR"])
+
+
+@override_settings(
+    FINIK_BASE_URL="https://finik.test",
+    FINIK_HOST="finik.test",
+    FINIK_API_KEY="key",
+    FINIK_PRIVATE_PEM="pem",
+    FINIK_PAYMENT_STATUS_PATH="/v1/payment/{payment_id}",
+)
+class FinikClientTests(TestCase):
+    def _get_status(self, status_code, payload=None):
+        response = mock.Mock(status_code=status_code, text="")
+        response.json.return_value = payload or {}
+        session = mock.Mock()
+        session.get.return_value = response
+        with mock.patch.object(client, "Signer") as signer:
+            signer.return_value.sign.return_value = "signature"
+            return client.get_payment_status("abc", session=session)
+
+    def test_not_found_is_unknown(self):
+        self.assertIsNone(self._get_status(404))
+
+    def test_statuses_are_mapped(self):
+        self.assertEqual(self._get_status(200, {"status": "SUCCEEDED"}), "success")
+        self.assertEqual(self._get_status(200, {"status": "FAILED"}), "failed")
+        self.assertEqual(self._get_status(200, {"status": "PROCESSING"}), "pending")
+
+    def test_server_error_raises(self):
+        with self.assertRaises(client.FinikError):
+            self._get_status(500)
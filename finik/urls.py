@@ -1,7 +1,7 @@
 # urls.py
 from django.urls import path
 from .views import PaymentListCreateAPIView, CreatePaymentAPIView, FinikWebhookAPIView, \
-        PaymentStatusAPIView, CreateProjectPaymentAPIView, FinikProjectWebhookAPIView, ProjectPaymentInitAPIView, \
+        PaymentStatusAPIView, PaymentStatusPollAPIView, CreateProjectPaymentAPIView, FinikProjectWebhookAPIView, ProjectPaymentInitAPIView, \
         ProjectPaymentConfirmAPIView
 
 urlpatterns = [
@@ -9,6 +9,7 @@ urlpatterns = [
     path("api/pay/", CreatePaymentAPIView.as_view(), name="create-payment"),
     path("payments/callback/", FinikWebhookAPIView.as_view(), name="payments-callback"),
     path("api/payment-status/<str:payment_id>/", PaymentStatusAPIView.as_view(), name="payment-status"),
+    path("api/payment-status/<str:payment_id>/poll/", PaymentStatusPollAPIView.as_view(), name="payment-status-poll"),
 
     path("project/<int:project_id>/pay/", CreateProjectPaymentAPIView.as_view(), name="project-pay"),
     path("project-webhook/", FinikProjectWebhookAPIView.as_view(), name="project-webhook"),
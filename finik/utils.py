@@ -1,8 +1,131 @@
-from .models import PaymentLog
+import contextvars
+import logging
+
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from projects.utils import add_payment_to_year_result
+from .models import Payment, PaymentLog, ProjectPayment
+from .status_events import notify_payment_status
+
+logger = logging.getLogger("finik_webhook")
+
+# Буфер логов текущего запроса. None — мы вне запроса (shell, команды), пишем сразу.
+_payment_log_buffer = contextvars.ContextVar("payment_log_buffer", default=None)
+
+
+class _LogBuffer(list):
+    """Логи запроса. depth — вложенность транзакций в момент начала запроса."""
+
+    def __init__(self, depth):
+        super().__init__()
+        self.depth = depth
+
+
+def _atomic_depth():
+    return len(transaction.get_connection().atomic_blocks)
+
 
 def log_payment(level, message, extra=None):
-    PaymentLog.objects.create(
+    entry = PaymentLog(
         level=level,
         message=message,
-        extra=extra or {}
+        extra=extra or {},
+        created_at=timezone.now(),
     )
+
+    buffer = _payment_log_buffer.get()
+    if buffer is None:
+        entry.save()
+        return
+
+    buffer.append(entry)
+
+    # Ошибки не ждут конца запроса: пишем их (и всё, что накопилось до них) сразу.
+    # Кроме случая, когда view открыл транзакцию: при её откате запись пропала бы.
+    # Тогда ошибка ждёт в буфере, и stop_payment_log_buffer пишет её уже после отката
+    if level == "ERROR" and _atomic_depth() <= buffer.depth:
+        flush_payment_logs()
+
+
+def start_payment_log_buffer():
+    return _payment_log_buffer.set(_LogBuffer(_atomic_depth()))
+
+
+def flush_payment_logs():
+    """Записывает накопленные логи одним INSERT через bulk_create."""
+    buffer = _payment_log_buffer.get()
+    if not buffer:
+        return
+
+    entries = buffer[:]
+    buffer.clear()
+    PaymentLog.objects.bulk_create(entries)
+
+
+def stop_payment_log_buffer(token):
+    try:
+        flush_payment_logs()
+    except DatabaseError:
+        # Ответ уже сформирован — не превращаем успешный платёж в 500 из-за логов
+        logger.exception("Не удалось записать логи платежей")
+    finally:
+        _payment_log_buffer.reset(token)
+
+
+def _ignore_final_status(model, payment_id, current_status, status):
+    if status != current_status:
+        log_payment("WARNING", "Статус завершённого платежа не меняем", {
+            "model": model, "payment_id": str(payment_id), "status": current_status, "received": status,
+        })
+
+
+def set_payment_status(payment_id, status):
+    """
+    Применяет статус к Payment (вебхук, сверка). False — платёж не найден.
+    Меняется только pending: success и failed окончательные, поэтому поздний
+    FAILED-вебхук или просроченная сверка не перепишут уже успешный платёж.
+    """
+    with transaction.atomic():
+        updated = 0
+        if status != "pending":
+            updated = Payment.objects.filter(payment_id=payment_id, status="pending").update(status=status)
+        if updated:
+            notify_payment_status(payment_id, status)
+            return True
+        current_status = Payment.objects.filter(payment_id=payment_id).values_list("status", flat=True).first()
+
+    if current_status is None:
+        return False
+    _ignore_final_status("Payment", payment_id, current_status, status)
+    return True
+
+
+def set_project_payment_status(payment_id, status):
+    """
+    Применяет статус к ProjectPayment (вебхук, сверка). False — платёж не найден.
+    Строка платежа блокируется, а меняется только pending: повторный вебхук или
+    сверка дождутся нас и увидят уже success, поэтому в YearResult платёж попадает
+    ровно один раз, и поздний FAILED его оттуда не уберёт.
+    """
+    with transaction.atomic():
+        payment = (
+            ProjectPayment.objects.select_for_update(of=("self",))
+            .select_related("project")
+            .filter(payment_id=payment_id)
+            .first()
+        )
+        if payment is None:
+            return False
+
+        previous_status = payment.status
+        if previous_status == "pending" and status != "pending":
+            payment.status = status
+            payment.save(update_fields=["status"])
+            notify_payment_status(payment_id, status)
+            if status == "success":
+                add_payment_to_year_result(payment)
+            return True
+
+    _ignore_final_status("ProjectPayment", payment_id, previous_status, status)
+    return True
@@ -8,15 +8,17 @@ from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
 from django.http import JsonResponse
+from django.utils import timezone
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.generics import ListCreateAPIView
 from authorizer import Signer
 from .models import Payment, ProjectPayment
-from projects.models import Project, YearResult
+from projects.models import Project
 from .serializers import PaymentSerializer, ProjectPaymentSerializer
 from projects.serializers import ProjectSerializer
-from .utils import log_payment
+from .utils import log_payment, set_payment_status, set_project_payment_status
+from .status_events import TERMINAL_STATUSES, get_cached_status, notify_payment_status, read_payment_status, remember_status
 
 
 # Обычный логгер для консоли/файла
@@ -75,15 +77,12 @@ class FinikWebhookAPIView(APIView):
         status_map = {"SUCCEEDED": "success", "FAILED": "failed"}
         payment_status = status_map.get(status.upper(), "pending")
 
-        try:
-            payment = Payment.objects.get(payment_id=payment_id)
-            payment.status = payment_status
-            payment.save()
+        if set_payment_status(payment_id, payment_status):
             log_payment("INFO", "Статус платежа обновлен", {"payment_id": payment_id, "status": payment_status})
             return JsonResponse({"success": True})
-        except Payment.DoesNotExist:
-            log_payment("ERROR", "Платеж не найден", {"payment_id": payment_id})
-            return JsonResponse({"error": "Payment not found"}, status=404)
+
+        log_payment("ERROR", "Платеж не найден", {"payment_id": payment_id})
+        return JsonResponse({"error": "Payment not found"}, status=404)
 
 
 class CreatePaymentAPIView(APIView):
@@ -163,6 +162,7 @@ class CreatePaymentAPIView(APIView):
             })
             payment.status = "failed"
             payment.save()
+            notify_payment_status(payment.payment_id, payment.status)
             return JsonResponse({"error": "Ошибка при запросе к Finik"}, status=500)
 
         if resp.status_code in [200, 302]:
@@ -183,6 +183,7 @@ class CreatePaymentAPIView(APIView):
             })
             payment.status = "failed"
             payment.save()
+            notify_payment_status(payment.payment_id, payment.status)
             return JsonResponse({"error": resp.text}, status=resp.status_code)
 
 
@@ -194,11 +195,8 @@ class PaymentListCreateAPIView(ListCreateAPIView):
 class PaymentStatusAPIView(APIView):
     def get(self, request, payment_id):
         try:
+            # Статус опрашивается фронтом часто — без записи в PaymentLog на каждый запрос
             payment = Payment.objects.get(payment_id=payment_id)
-            log_payment("INFO", "Запрос статуса платежа", {
-                "payment_id": payment_id,
-                "status": payment.status
-            })
             return Response({
                 "payment_id": payment.payment_id,
                 "status": payment.status,
@@ -211,6 +209,35 @@ class PaymentStatusAPIView(APIView):
             return Response({"error": "Payment not found"}, status=404)
 
 
+class PaymentStatusPollAPIView(APIView):
+    """
+    Запасной путь для страницы оплаты, если EventSource недоступен. Основной —
+    push через SSE: /finik/api/payment-status/<id>/events/ (manage.py payment_events).
+    Короткий опрос читает только кэш, который обновляют все, кто меняет статус,
+    и отвечает сразу — воркер gunicorn не держится. В БД идём лишь при промахе кэша.
+    poll_after — через сколько секунд фронту спросить снова.
+    """
+
+    def get(self, request, payment_id):
+        status = get_cached_status(payment_id)
+        if status is None:
+            status = read_payment_status(payment_id)
+            if status is None:
+                log_payment("WARNING", "Попытка получить несуществующий платеж", {
+                    "payment_id": payment_id
+                })
+                return Response({"error": "Payment not found"}, status=404)
+            remember_status(payment_id, status)
+
+        is_final = status in TERMINAL_STATUSES
+        return Response({
+            "payment_id": payment_id,
+            "status": status,
+            "is_final": is_final,
+            "poll_after": None if is_final else settings.FINIK_STATUS_POLL_INTERVAL,
+        })
+
+
 class CreateProjectPaymentAPIView(APIView):
     def post(self, request, project_id):
         try:
@@ -232,6 +259,7 @@ class CreateProjectPaymentAPIView(APIView):
             project=project,
             amount=amount,
             status="pending",
+            submitted_at=timezone.now(),
         )
 
         body = {
@@ -282,6 +310,7 @@ class CreateProjectPaymentAPIView(APIView):
             })
             payment.status = "failed"
             payment.save()
+            notify_payment_status(payment.payment_id, payment.status)
             return JsonResponse({"error": "Ошибка при запросе к Finik"}, status=500)
 
         if resp.status_code in [200, 302]:
@@ -293,6 +322,7 @@ class CreateProjectPaymentAPIView(APIView):
         else:
             payment.status = "failed"
             payment.save()
+            notify_payment_status(payment.payment_id, payment.status)
             return JsonResponse({"error": resp.text}, status=resp.status_code)
         
 
@@ -338,33 +368,11 @@ class FinikProjectWebhookAPIView(APIView):
         payment_id = json_data.get("transactionId")
         status = json_data.get("status")
 
-        try:
-            payment = ProjectPayment.objects.get(payment_id=payment_id)
-        except ProjectPayment.DoesNotExist:
-            return JsonResponse({"error": "Project payment not found"}, status=404)
-
         status_map = {"SUCCEEDED": "success", "FAILED": "failed"}
         payment_status = status_map.get(status.upper(), "pending")
-        payment.status = payment_status
-        payment.save()
-
-        if payment_status == "success":
-            project = payment.project
-            yr, _ = YearResult.objects.get_or_create(id=1)
 
-            if project.category == "sport":
-                yr.sport += 1
-            elif project.category == "cyber_sport":
-                yr.cyber_sport += 1
-            elif project.category == "education":
-                yr.education += 1
-            elif project.category == "fundraising":
-                yr.fundraising += 1
-            elif project.category == "cultural":
-                yr.cultural += 1
-
-            yr.total_amount += int(project.price)
-            yr.save()
+        if not set_project_payment_status(payment_id, payment_status):
+            return JsonResponse({"error": "Project payment not found"}, status=404)
 
         return JsonResponse({"success": True})
 
@@ -408,6 +416,8 @@ class ProjectPaymentConfirmAPIView(APIView):
         payment.last_name = request.data.get("last_name")
         payment.phone = request.data.get("phone")
         payment.comment = request.data.get("comment")
+        # Отмечаем до запроса: если ответ Finik потеряется, платёж всё равно сверим, а не удалим
+        payment.submitted_at = timezone.now()
         payment.save()
 
         # --- Создание платежа в Finik ---
@@ -468,4 +478,5 @@ class ProjectPaymentConfirmAPIView(APIView):
         else:
             payment.status = "failed"
             payment.save()
+            notify_payment_status(payment.payment_id, payment.status)
             return Response({"error": resp.text}, status=resp.status_code)
\ No newline at end of file
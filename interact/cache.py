@@ -0,0 +1,29 @@
+"""
+Общий для всех воркеров gunicorn кэш (CACHES['shared']).
+
+Кэш по умолчанию — в памяти процесса. Здесь то, что должно быть видно
+всем воркерам сразу: версии настроек и каталога, статусы платежей, YearResult.
+
+Версионный ключ: данные кэшируются под ключом с текущей версией (или сверяются
+с ней), а bump_cache_version после изменения делает старые записи невидимыми.
+"""
+import uuid
+
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+
+shared_cache = ConnectionProxy(caches, "shared")
+
+
+def bump_cache_version(key):
+    """Новая версия под ключом key: всё, что кэшировалось со старой, перестаёт читаться."""
+    shared_cache.set(key, uuid.uuid4().hex, None)
+
+
+def get_cache_version(key):
+    """Текущая версия под ключом key. Первой её создаёт add — воркеры не затрут друг друга."""
+    version = shared_cache.get(key)
+    if version is None:
+        shared_cache.add(key, uuid.uuid4().hex, None)
+        version = shared_cache.get(key)
+    return version
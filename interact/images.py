@@ -0,0 +1,192 @@
+"""
+Уменьшенные копии (рендиции) картинок из /media/.
+
+Оригиналы не трогаем. Копии нужного размера в WebP (или JPEG) лежат рядом,
+в media/renditions/, и создаются только в фоне: media_worker
+(`manage.py process_attachments --loop`) регулярно вызывает warm_renditions,
+а разово то же делает `manage.py warm_renditions`. Запрос к API копии не
+создаёт: пока её нет, отдаётся URL оригинала.
+
+Имя копии строится из имени оригинала в storage. Замена картинки в админке
+сохраняет файл под новым именем, поэтому новый URL получается сам собой
+(кэш браузера и nginx не мешает); если оригинал всё же перезаписан под тем же
+именем, воркер пересоздаст копию по mtime.
+
+Какие копии уже готовы, запоминается в общем кэше одной записью на файл:
+сериализатору не нужно ни обращаться к диску, ни читать кэш на каждый размер.
+"""
+import hashlib
+import io
+import logging
+import os
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from rest_framework import serializers
+
+from interact.cache import shared_cache
+
+logger = logging.getLogger(__name__)
+
+# Размер = ограничение по большей стороне, px. Увеличения не бывает
+RENDITION_SIZES = {
+    "thumb": 160,
+    "small": 480,
+    "medium": 1024,
+    "large": 1920,
+}
+RENDITION_FORMATS = {
+    "webp": ("WEBP", "webp"),
+    "jpeg": ("JPEG", "jpg"),
+}
+RENDITIONS_DIR = "renditions"
+RENDITION_QUALITY = 80
+
+# (модель, поле, размеры) — те же, что отдают сериализаторы и админка
+RENDITION_SOURCES = [
+    ("projects.Project", "image", ("thumb", "small", "medium", "large")),
+    ("projects.HeroSlide", "image", ("medium", "large")),
+    ("projects.TeamMember", "photo", ("small", "medium")),
+    ("projects.Partner", "logo", ("small",)),
+    ("users.Volunteer", "image", ("thumb", "small")),
+    ("commands.Attachment", "file", ("thumb", "medium")),
+    ("commands.BoardAttachment", "file", ("thumb", "medium")),
+]
+
+# Сколько помним, что копии ещё нет: после этого снова смотрим на диск
+MISSING_CACHE_TIMEOUT = 60
+# Картинку, которую не удалось обработать, фоновый проход пропускает столько времени
+FAILED_CACHE_TIMEOUT = 24 * 60 * 60
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+
+
+def is_image_name(name):
+    return (name or '').lower().endswith(IMAGE_EXTENSIONS)
+
+
+def rendition_name(name, size="medium", fmt="webp"):
+    """Имя копии в storage. Считается без обращения к диску."""
+    digest = hashlib.sha1(name.encode()).hexdigest()
+    return f"{RENDITIONS_DIR}/{digest[:2]}/{digest}_{size}.{RENDITION_FORMATS[fmt][1]}"
+
+
+def _ready_cache_key(name, fmt):
+    return f"images:ready:{fmt}:{name}"
+
+
+def ready_renditions(field_file, sizes, fmt="webp"):
+    """
+    {размер: готова ли копия}. Одно чтение кэша на файл; на диск смотрим только
+    для размеров, о которых ещё не знаем, и для отсутствующих — не чаще
+    раза в MISSING_CACHE_TIMEOUT.
+    """
+    key = _ready_cache_key(field_file.name, fmt)
+    ready = shared_cache.get(key) or {}
+    unknown = [size for size in sizes if size not in ready]
+    if unknown:
+        for size in unknown:
+            ready[size] = default_storage.exists(rendition_name(field_file.name, size, fmt))
+        # Готовые копии не пропадают — запись вечная, пока чего-то не хватает — короткая
+        shared_cache.set(key, ready, None if all(ready.values()) else MISSING_CACHE_TIMEOUT)
+    return ready
+
+
+def ensure_rendition(field_file, size="medium", fmt="webp"):
+    """Создаёт копию, если её нет или оригинал новее. Возвращает имя файла в storage."""
+    from PIL import Image, ImageOps
+
+    max_side = RENDITION_SIZES[size]
+    pil_format = RENDITION_FORMATS[fmt][0]
+    name = rendition_name(field_file.name, size, fmt)
+    path = default_storage.path(name)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(field_file.path):
+        return name
+
+    with Image.open(field_file.path) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_side, max_side))
+        if pil_format == "JPEG":
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+        elif image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+
+        buffer = io.BytesIO()
+        image.save(buffer, format=pil_format, quality=RENDITION_QUALITY, optimize=True)
+
+    # Пишем во временный файл и переименовываем: параллельный запрос не увидит недописанную копию
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(buffer.getvalue())
+    os.replace(tmp_path, path)
+    return name
+
+
+def warm_renditions(sizes=None, on_error=None):
+    """
+    Создаёт недостающие копии для всех RENDITION_SOURCES. Уже готовые стоят
+    два stat на размер, поэтому проход можно повторять в фоне.
+    Возвращает (создано или проверено, ошибок).
+    """
+    done = failed = 0
+    for label, field, source_sizes in RENDITION_SOURCES:
+        model = apps.get_model(label)
+        if sizes:
+            source_sizes = [size for size in source_sizes if size in sizes]
+        queryset = model.objects.exclude(**{field: ""}).only("id", field)
+        for obj in queryset.iterator(chunk_size=500):
+            field_file = getattr(obj, field)
+            if not is_image_name(field_file.name):
+                continue
+            failed_key = f"images:failed:{field_file.name}"
+            if shared_cache.get(failed_key):
+                continue
+            for size in source_sizes:
+                try:
+                    ensure_rendition(field_file, size)
+                    done += 1
+                except Exception as e:
+                    failed += 1
+                    # Битую картинку не пытаемся обработать на каждом проходе
+                    shared_cache.set(failed_key, True, FAILED_CACHE_TIMEOUT)
+                    if on_error:
+                        on_error(f"{model.__name__} #{obj.id} {size}: {e}")
+                    break
+    return done, failed
+
+
+def get_rendition_url(field_file, size="medium", fmt="webp"):
+    """URL уменьшенной копии; пока её нет (или картинку не обработать) — URL оригинала."""
+    if not field_file:
+        return None
+    try:
+        if is_image_name(field_file.name) and ready_renditions(field_file, (size,), fmt)[size]:
+            return default_storage.url(rendition_name(field_file.name, size, fmt))
+        return field_file.url
+    except ValueError:
+        return None
+
+
+class RenditionsField(serializers.ReadOnlyField):
+    """
+    {"thumb": url, "medium": url, ...} для ImageField/FileField.
+    Для не-картинок (видео, pdf во вложениях) — None.
+    """
+
+    def __init__(self, sizes=("thumb", "medium"), fmt="webp", **kwargs):
+        self.sizes = sizes
+        self.fmt = fmt
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value or not is_image_name(value.name):
+            return None
+        request = self.context.get('request')
+        ready = ready_renditions(value, self.sizes, self.fmt)
+        urls = {}
+        for size in self.sizes:
+            url = default_storage.url(rendition_name(value.name, size, self.fmt)) if ready[size] else value.url
+            urls[size] = request.build_absolute_uri(url) if request else url
+        return urls
@@ -99,6 +99,14 @@ FINIK_ACCOUNT_ID = os.getenv("FINIK_ACCOUNT_ID")
 FINIK_QR_NAME = os.getenv("FINIK_QR_NAME")
 FINIK_REDIRECT_URL = os.getenv("FINIK_REDIRECT_URL")
 FINIK_WEBHOOK_URL = os.getenv("FINIK_WEBHOOK_URL")
+# Путь проверки статуса платежа (используется командой reconcile_payments)
+FINIK_PAYMENT_STATUS_PATH = os.getenv("FINIK_PAYMENT_STATUS_PATH", "/v1/payment/{payment_id}")
+
+# Через сколько секунд фронту повторить опрос /finik/api/payment-status/<id>/poll/
+FINIK_STATUS_POLL_INTERVAL = float(os.getenv("FINIK_STATUS_POLL_INTERVAL", "2"))
+
+# Сколько дней хранить PaymentLog (чистится командой prune_payment_logs)
+PAYMENT_LOG_RETENTION_DAYS = int(os.getenv("PAYMENT_LOG_RETENTION_DAYS", "90"))
 
 
 # settings.py
@@ -172,6 +180,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     "logs.middleware.AdminPageLoggingMiddleware",
+    "finik.middleware.PaymentLogMiddleware",
 ]
 
 ROOT_URLCONF = 'interact.urls'
@@ -244,6 +253,19 @@ DATABASES = {
     }
 }
 
+# default — в памяти процесса, как и раньше. shared (interact/cache.py) — общий для всех
+# воркеров gunicorn: по умолчанию файловый (один контейнер), для Redis задать
+# SHARED_CACHE_BACKEND/SHARED_CACHE_LOCATION в .env
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': os.getenv('SHARED_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('SHARED_CACHE_LOCATION', '/tmp/interact_cache'),
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -296,6 +318,20 @@ STATICFILES_DIRS = [
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# Файлы к заявкам (команды и Борд). Все загрузки пишутся во временный файл на том же
+# диске, что и media — при сохранении файл просто переименовывается, а не копируется.
+# Папку создаёт entrypoint.sh; если её нет (локальный запуск) — системный /tmp,
+# сохранение станет копированием, но работать будет
+FILE_UPLOAD_TEMP_DIR = os.getenv('FILE_UPLOAD_TEMP_DIR', str(MEDIA_ROOT / 'tmp_uploads'))
+if not os.path.isdir(FILE_UPLOAD_TEMP_DIR):
+    FILE_UPLOAD_TEMP_DIR = None
+# Лимиты проверяются по мере приёма потока; nginx пропускает до 50M (client_max_body_size)
+APPLICATION_UPLOAD_MAX_FILE_SIZE = int(os.getenv('APPLICATION_UPLOAD_MAX_FILE_SIZE', 50 * 1024 * 1024))
+APPLICATION_UPLOAD_MAX_TOTAL_SIZE = int(os.getenv('APPLICATION_UPLOAD_MAX_TOTAL_SIZE', 50 * 1024 * 1024))
+# Хук бота для сброса кэша направлений (telegram_bot/common/ref_cache.py); пусто — не вызывать
+TELEGRAM_BOT_CACHE_URL = os.getenv('TELEGRAM_BOT_CACHE_URL', '')
+TELEGRAM_BOT_INTERNAL_TOKEN = os.getenv('BOT_INTERNAL_TOKEN', '')
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
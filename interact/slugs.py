@@ -0,0 +1,65 @@
+"""
+Уникальные slug для Command, BoardPosition и Project.
+
+Свободный суффикс ищется одним запросом: берём base и все base-N, занятые в
+таблице, и выдаём base-(max N + 1). Если параллельное сохранение успело занять
+тот же slug, база ответит IntegrityError по unique — тогда выбираем заново.
+"""
+import re
+import uuid
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+# Сколько раз перевыбираем slug после гонки за unique
+SLUG_SAVE_ATTEMPTS = 3
+# Запас длины под суффикс «-123»
+SLUG_SUFFIX_RESERVE = 8
+
+
+def allocate_unique_slug(model, source, fallback_prefix, exclude_pk=None):
+    max_length = model._meta.get_field('slug').max_length
+    base = slugify(source or '', allow_unicode=True)[:max_length - SLUG_SUFFIX_RESERVE].strip('-')
+    if not base:
+        # Название из одних символов/эмодзи — slugify вернул пустую строку
+        base = f"{fallback_prefix}-{uuid.uuid4().hex[:6]}"
+
+    taken = model._default_manager.filter(Q(slug=base) | Q(slug__startswith=f"{base}-"))
+    if exclude_pk is not None:
+        taken = taken.exclude(pk=exclude_pk)
+    taken = set(taken.values_list('slug', flat=True))
+
+    if base not in taken:
+        return base
+
+    suffix = re.compile(rf"^{re.escape(base)}-(\d+)$")
+    numbers = [int(match.group(1)) for slug in taken if (match := suffix.match(slug))]
+    return f"{base}-{max(numbers, default=0) + 1}"
+
+
+class UniqueSlugMixin:
+    """
+    Заполняет пустой slug из slug_source_field при сохранении.
+    Ставится первым в списке родителей: class Command(UniqueSlugMixin, models.Model).
+    """
+    slug_source_field = 'title'
+    slug_fallback_prefix = 'item'
+
+    def save(self, *args, **kwargs):
+        if self.slug:
+            return super().save(*args, **kwargs)
+
+        model = type(self)
+        for attempt in range(SLUG_SAVE_ATTEMPTS):
+            self.slug = allocate_unique_slug(
+                model, getattr(self, self.slug_source_field), self.slug_fallback_prefix, exclude_pk=self.pk
+            )
+            try:
+                # Точка сохранения: после IntegrityError транзакция снаружи остаётся рабочей
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                slug_taken = model._default_manager.filter(slug=self.slug).exclude(pk=self.pk).exists()
+                if not slug_taken or attempt == SLUG_SAVE_ATTEMPTS - 1:
+                    raise
@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.utils.html import format_html
+from interact.images import get_rendition_url
 from .models import FAQ, Partner, Project, TeamMember, YearResult, HeroSlide
+from .utils import invalidate_year_result_cache
 from django.utils import timezone
 
 @admin.register(Project)
@@ -29,7 +31,7 @@ class ProjectAdmin(admin.ModelAdmin):
 
     def image_tag(self, obj):
         if obj.image:
-            return format_html('<img src="{}" style="width: 100px; height:auto;"/>', obj.image.url)
+            return format_html('<img src="{}" style="width: 100px; height:auto;"/>', get_rendition_url(obj.image, 'thumb'))
         return "-"
     image_tag.short_description = "Обложка"
 
@@ -41,15 +43,24 @@ class ProjectAdmin(admin.ModelAdmin):
 
 @admin.register(YearResult)
 class YearResultAdmin(admin.ModelAdmin):
-    list_display = ("sport", "cyber_sport", "education", "fundraising", "cultural", "total_amount")
-    ordering = ("-id",)
+    list_display = ("year", "sport", "cyber_sport", "education", "fundraising", "cultural", "total_amount")
+    ordering = ("-year",)
 
     fieldsets = (
         ("Результаты года", {
-            "fields": ("sport", "cyber_sport", "education", "fundraising", "cultural", "total_amount")
+            "fields": ("year", "sport", "cyber_sport", "education", "fundraising", "cultural", "total_amount")
         }),
     )
 
+    # Публичный /api/year-results/ отдаётся из кэша — сбрасываем его после ручных правок
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate_year_result_cache()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_year_result_cache()
+
 @admin.register(Partner)
 class PartnerAdmin(admin.ModelAdmin):
     list_display = ('name', 'order', 'is_active')
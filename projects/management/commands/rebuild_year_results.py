@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from projects.utils import rebuild_year_results
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересобирает статистику YearResult указанных лет из успешных платежей проектов. "
+        "Года с данными, внесёнными вручную, не указывайте — они будут перезаписаны"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, action="append", required=True,
+                            help="Год для пересборки (можно несколько раз)")
+
+    def handle(self, *args, **options):
+        totals = rebuild_year_results(options["year"])
+
+        for year in sorted(totals):
+            stats = totals[year]
+            self.stdout.write(f"{year}: {stats}")
+        self.stdout.write(self.style.SUCCESS(f"Пересобрано лет: {len(totals)}"))
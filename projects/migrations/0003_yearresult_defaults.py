@@ -0,0 +1,43 @@
+# Generated by Django 5.1.4 on 2026-10-19 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_teammember_description'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='yearresult',
+            name='cultural',
+            field=models.IntegerField(default=0, verbose_name='Культура'),
+        ),
+        migrations.AlterField(
+            model_name='yearresult',
+            name='cyber_sport',
+            field=models.IntegerField(default=0, verbose_name='Киберспорт'),
+        ),
+        migrations.AlterField(
+            model_name='yearresult',
+            name='education',
+            field=models.IntegerField(default=0, verbose_name='Образование'),
+        ),
+        migrations.AlterField(
+            model_name='yearresult',
+            name='fundraising',
+            field=models.IntegerField(default=0, verbose_name='Фандрайзинг'),
+        ),
+        migrations.AlterField(
+            model_name='yearresult',
+            name='sport',
+            field=models.IntegerField(default=0, verbose_name='Спорт'),
+        ),
+        migrations.AlterField(
+            model_name='yearresult',
+            name='total_amount',
+            field=models.IntegerField(default=0, verbose_name='Общая сумма'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-19 17:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0003_yearresult_defaults'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='project',
+            name='slug',
+            field=models.SlugField(allow_unicode=True, blank=True, max_length=255, unique=True),
+        ),
+    ]
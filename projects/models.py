@@ -3,11 +3,13 @@ from django.urls import reverse
 from directions.models import ProjectDirection
 from logs.loggable_model import LoggableModel
 from django.utils import timezone
-from django.utils.text import slugify
+from interact.slugs import UniqueSlugMixin
 
 
 
-class Project(LoggableModel):
+class Project(UniqueSlugMixin, LoggableModel):
+    slug_source_field = 'name'
+    slug_fallback_prefix = 'project'
     
     CATEGORY_CHOICES = [
         ("sport", "Спорт"),
@@ -19,7 +21,8 @@ class Project(LoggableModel):
     image = models.ImageField(verbose_name='Обложка', upload_to='project/')
     name = models.CharField(verbose_name='Название проекта', max_length=100)
     title = models.TextField(verbose_name='Описание проекта', max_length=5000)
-    slug = models.SlugField(unique=True, blank=True)
+    # allow_unicode: кириллица в ссылках (/projects/сбор-макулатуры/), slug генерируется из name
+    slug = models.SlugField(unique=True, blank=True, max_length=255, allow_unicode=True)
     direction = models.ForeignKey(
         ProjectDirection,
         on_delete=models.CASCADE,
@@ -56,12 +59,7 @@ class Project(LoggableModel):
     def get_absolute_url(self):
         from django.urls import reverse
         return reverse('project-detail', kwargs={'slug': self.slug})
-        
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            # allow_unicode=True позволяет сохранять кириллицу в ссылках (будет /projects/сбор-макулатуры/)
-            self.slug = slugify(self.name) 
-        super().save(*args, **kwargs)
+
 
 class Partner(models.Model):
     name = models.CharField(max_length=200, verbose_name='Название партнера')
@@ -125,12 +123,14 @@ class HeroSlide(models.Model):
 
 class YearResult(models.Model):
     year = models.IntegerField(verbose_name="Год", default=2026, unique=True) # <-- ДОБАВЛЕНО ПОЛЕ ГОДА
-    sport = models.IntegerField(verbose_name='Спорт')
-    cyber_sport = models.IntegerField(verbose_name='Киберспорт')
-    education = models.IntegerField(verbose_name='Образование')
-    fundraising = models.IntegerField(verbose_name='Фандрайзинг')
-    cultural = models.IntegerField(verbose_name='Культура')
-    total_amount = models.IntegerField(verbose_name='Общая сумма')
+    # Счётчики — это агрегат по успешным ProjectPayment за год (см. projects/utils.py).
+    # Года до Finik заполнены вручную; rebuild_year_results --year трогает только указанные года
+    sport = models.IntegerField(verbose_name='Спорт', default=0)
+    cyber_sport = models.IntegerField(verbose_name='Киберспорт', default=0)
+    education = models.IntegerField(verbose_name='Образование', default=0)
+    fundraising = models.IntegerField(verbose_name='Фандрайзинг', default=0)
+    cultural = models.IntegerField(verbose_name='Культура', default=0)
+    total_amount = models.IntegerField(verbose_name='Общая сумма', default=0)
 
     class Meta:
         verbose_name = 'Результат года'
@@ -3,6 +3,8 @@ from .models import FAQ, Partner, Project, TeamMember, YearResult, HeroSlide
 from directions.models import ProjectDirection
 from django.utils import timezone
 
+from interact.images import RenditionsField
+
 class ProjectSerializer(serializers.ModelSerializer):
     # Указываем направление только для чтения (для отображения на фронте/в боте)
     direction_detail = serializers.SerializerMethodField() 
@@ -18,11 +20,13 @@ class ProjectSerializer(serializers.ModelSerializer):
     time_start = serializers.DateTimeField(format="%Y-%m-%d %H:%M:%S")
     time_end = serializers.DateTimeField(format="%Y-%m-%d %H:%M:%S") # Исправлено :S на :%S
     date = serializers.SerializerMethodField()
+    # Уменьшенные WebP-копии обложки для карточек и страницы проекта
+    image_renditions = RenditionsField(source='image', sizes=('small', 'medium', 'large'))
 
     class Meta:
         model = Project
         fields = (
-            'id', 'image', 'name', "slug", 'title', 'price', 'category',
+            'id', 'image', 'image_renditions', 'name', "slug", 'title', 'price', 'category',
             'time_start', 'time_end',
             'direction_detail', 'direction_id',
             'phone_number', 'address',
@@ -76,12 +80,16 @@ class YearResultSerializer(serializers.ModelSerializer):
 
 
 class HeroSlideSerializer(serializers.ModelSerializer):
+    image_renditions = RenditionsField(source='image', sizes=('medium', 'large'))
+
     class Meta:
         model = HeroSlide
-        fields = ['id', 'badge', 'title', 'description', 'image', 'button_text', 'button_url']
+        fields = ['id', 'badge', 'title', 'description', 'image', 'image_renditions', 'button_text', 'button_url']
 
 
 class TeamMemberSerializer(serializers.ModelSerializer):
+    photo_renditions = RenditionsField(source='photo', sizes=('small', 'medium'))
+
     class Meta:
         model = TeamMember
         fields = '__all__'
@@ -92,6 +100,8 @@ class FAQSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 class PartnerSerializer(serializers.ModelSerializer):
+    logo_renditions = RenditionsField(source='logo', sizes=('small',))
+
     class Meta:
         model = Partner
-        fields = ['id', 'name', 'logo', 'link']
\ No newline at end of file
+        fields = ['id', 'name', 'logo', 'logo_renditions', 'link']
\ No newline at end of file
@@ -0,0 +1,11 @@
+from django import template
+
+from interact.images import get_rendition_url
+
+register = template.Library()
+
+
+@register.filter
+def rendition(field_file, size="medium"):
+    """{{ project.image|rendition:"small" }} — URL уменьшенной WebP-копии картинки."""
+    return get_rendition_url(field_file, size) or ""
@@ -1,3 +1,120 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from finik.models import ProjectPayment
+from interact.cache import shared_cache
+from interact.images import RenditionsField, warm_renditions
+from projects.models import Project, YearResult
+from projects.utils import add_payment_to_year_result, rebuild_year_results, remove_payment_from_year_result
+
+
+class YearResultTests(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(
+            image="project/test.jpg",
+            name="Сбор макулатуры",
+            title="Описание",
+            price=500,
+            category="education",
+            phone_number="+996555000000",
+            address="Бишкек",
+            time_start=timezone.now(),
+            time_end=timezone.now() + timedelta(hours=2),
+        )
+
+    def _payment(self, year, status="success"):
+        payment = ProjectPayment.objects.create(project=self.project, amount=500, status=status)
+        # auto_now_add не даёт задать дату при создании
+        created_at = timezone.make_aware(datetime(year, 6, 1, 12, 0))
+        ProjectPayment.objects.filter(pk=payment.pk).update(created_at=created_at)
+        payment.refresh_from_db()
+        return payment
+
+    def test_refund_reverts_increment(self):
+        payment = self._payment(2026)
+
+        add_payment_to_year_result(payment)
+        remove_payment_from_year_result(payment)
+
+        year = YearResult.objects.get(year=2026)
+        self.assertEqual((year.total_amount, year.education), (0, 0))
+
+    def test_rebuild_touches_only_listed_years(self):
+        # 2024 заполнен вручную до Finik, хотя пара платежей за него есть
+        YearResult.objects.create(year=2024, education=40, total_amount=120000)
+        self._payment(2024)
+        self._payment(2025)
+        self._payment(2025)
+        self._payment(2025, status="failed")
+
+        rebuild_year_results([2025])
+
+        self.assertEqual(YearResult.objects.get(year=2024).total_amount, 120000)
+        year = YearResult.objects.get(year=2025)
+        self.assertEqual((year.total_amount, year.education), (1000, 2))
+
+    def test_rebuild_resets_listed_year_without_payments(self):
+        YearResult.objects.create(year=2025, education=3, total_amount=1500)
+
+        rebuild_year_results([2025])
+
+        year = YearResult.objects.get(year=2025)
+        self.assertEqual((year.total_amount, year.education), (0, 0))
+
+
+class RenditionsTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        shared_cache.clear()
+
+        buffer = io.BytesIO()
+        Image.new("RGB", (2000, 1000), "green").save(buffer, format="JPEG")
+        self.project = Project.objects.create(
+            name="Сбор макулатуры",
+            title="Описание",
+            price=500,
+            category="education",
+            phone_number="+996555000000",
+            address="Бишкек",
+            time_start=timezone.now(),
+            time_end=timezone.now() + timedelta(hours=2),
+        )
+        self.project.image.save("project.jpg", ContentFile(buffer.getvalue()))
+        self.field = RenditionsField(sizes=("thumb", "medium"))
+
+    def test_missing_rendition_serves_original_without_generating(self):
+        urls = self.field.to_representation(self.project.image)
+
+        self.assertEqual(urls, {"thumb": self.project.image.url, "medium": self.project.image.url})
+        self.assertFalse(default_storage.exists("renditions"))
+
+    def test_worker_pass_builds_renditions(self):
+        warm_renditions()
+        shared_cache.clear()
+
+        urls = self.field.to_representation(self.project.image)
+
+        self.assertTrue(urls["thumb"].endswith("_thumb.webp"))
+        self.assertTrue(urls["medium"].endswith("_medium.webp"))
+
+    def test_ready_renditions_are_not_checked_on_disk_again(self):
+        warm_renditions()
+        self.field.to_representation(self.project.image)
+
+        with mock.patch.object(default_storage, "exists") as exists:
+            self.field.to_representation(self.project.image)
+
+        exists.assert_not_called()
@@ -32,7 +32,8 @@ urlpatterns = [
     # ИСПРАВЛЕНО: Удалили старый дубль 'project-details' без слага.
     # Оставили только правильные пути для каталога и детальной страницы:
     path('projects/', projects_list_page, name='projects-list-html'),
-    path('projects/<slug:slug>/', project_details_page, name='project-details-html'), 
+    # str, а не slug: конвертер slug не пропускает кириллицу
+    path('projects/<str:slug>/', project_details_page, name='project-details-html'), 
     
     path('donate/', donate_page, name='donate-html'),
     path('about/', about_page, name='about-html'),
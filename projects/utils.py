@@ -0,0 +1,98 @@
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import ExtractYear
+from django.utils import timezone
+
+from interact.cache import shared_cache
+
+from .models import Project, YearResult
+
+YEAR_RESULT_CACHE_KEY = "projects:year_result:latest"
+YEAR_RESULT_CACHE_TIMEOUT = 60 * 60
+
+# Поля YearResult совпадают с ключами Project.CATEGORY_CHOICES
+CATEGORY_FIELDS = [value for value, _ in Project.CATEGORY_CHOICES]
+
+_MISSING = object()
+
+
+def invalidate_year_result_cache():
+    shared_cache.delete(YEAR_RESULT_CACHE_KEY)
+
+
+def get_latest_year_result_data():
+    """Данные для публичного /api/year-results/ — из кэша, в БД ходим только при промахе."""
+    from .serializers import YearResultSerializer
+
+    data = shared_cache.get(YEAR_RESULT_CACHE_KEY, _MISSING)
+    if data is _MISSING:
+        result = YearResult.objects.order_by('year').last()
+        data = YearResultSerializer(result).data if result else None
+        shared_cache.set(YEAR_RESULT_CACHE_KEY, data, YEAR_RESULT_CACHE_TIMEOUT)
+    return data
+
+
+def _change_year_result(payment, sign):
+    year = timezone.localtime(payment.created_at).year
+    category = payment.project.category
+
+    updates = {"total_amount": F("total_amount") + sign * int(payment.amount)}
+    if category in CATEGORY_FIELDS:
+        updates[category] = F(category) + sign
+
+    with transaction.atomic():
+        YearResult.objects.get_or_create(year=year)
+        # F() — атомарный инкремент в БД, параллельные вебхуки не затирают друг друга
+        YearResult.objects.filter(year=year).update(**updates)
+        transaction.on_commit(invalidate_year_result_cache)
+
+
+def add_payment_to_year_result(payment):
+    """
+    Инкрементально учитывает успешный ProjectPayment в статистике его года.
+    Вызывается внутри транзакции, которая перевела платёж в success (вебхук, сверка,
+    админка); вебхуки меняют только pending, поэтому каждый платёж попадает в счётчики один раз.
+    """
+    _change_year_result(payment, 1)
+
+
+def remove_payment_from_year_result(payment):
+    """Обратное add_payment_to_year_result: успешный платёж вручную отменён в админке (возврат)."""
+    _change_year_result(payment, -1)
+
+
+def rebuild_year_results(years):
+    """
+    Пересобирает YearResult указанных лет из успешных ProjectPayment (GROUP BY год, категория).
+    Только явно перечисленные года: в остальных могут быть цифры, внесённые вручную
+    до Finik, и пересборка по одним платежам их бы затёрла.
+    """
+    from finik.models import ProjectPayment
+
+    years = sorted(set(years))
+    with transaction.atomic():
+        # Сначала блокируем строки статистики: вебхук, который в это время
+        # делает инкремент, дождётся нас, и платёж не будет посчитан дважды
+        list(YearResult.objects.select_for_update().filter(year__in=years))
+
+        rows = (
+            ProjectPayment.objects.filter(status="success")
+            .annotate(year=ExtractYear("created_at"))
+            .filter(year__in=years)
+            .values("year", "project__category")
+            .annotate(count=Count("id"), amount=Sum("amount"))
+            .order_by()
+        )
+
+        totals = {year: dict.fromkeys(CATEGORY_FIELDS + ["total_amount"], 0) for year in years}
+        for row in rows:
+            stats = totals[row["year"]]
+            if row["project__category"] in CATEGORY_FIELDS:
+                stats[row["project__category"]] += row["count"]
+            stats["total_amount"] += int(row["amount"] or 0)
+
+        for year, stats in totals.items():
+            YearResult.objects.update_or_create(year=year, defaults=stats)
+        transaction.on_commit(invalidate_year_result_cache)
+
+    return totals
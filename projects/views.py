@@ -6,8 +6,9 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.permissions import AllowAny # Важный импорт
 from rest_framework.views import APIView
 from rest_framework import generics
-from .models import FAQ, HeroSlide, Partner, Project, TeamMember, YearResult
-from .serializers import FAQSerializer, HeroSlideSerializer, PartnerSerializer, ProjectSerializer, TeamMemberSerializer, YearResultSerializer
+from .models import FAQ, HeroSlide, Partner, Project, TeamMember
+from .serializers import FAQSerializer, HeroSlideSerializer, PartnerSerializer, ProjectSerializer, TeamMemberSerializer
+from .utils import get_latest_year_result_data
 
 # --- Вспомогательная функция для архивации ---
 def archive_expired_projects():
@@ -95,10 +96,9 @@ class YearResultListView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
-        result = YearResult.objects.order_by('year').last()
-        if result:
-            serializer = YearResultSerializer(result)
-            return Response(serializer.data)
+        data = get_latest_year_result_data()
+        if data:
+            return Response(data)
         return Response({}, status=404)
     
 class HeroSlideListView(ListAPIView):
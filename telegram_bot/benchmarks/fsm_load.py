@@ -0,0 +1,123 @@
+"""
+Нагрузочная проверка FSM-хранилища на анкете волонтёра.
+
+1000 (--users) заявителей одновременно проходят все шаги ApplicationSteps:
+на каждом шаге — то же, что делают диспетчер и хендлер (get_state,
+update_data с ответом, set_state следующего шага), в конце get_data + clear.
+Потом проверяется, что незаконченные анкеты переживают «рестарт»
+(закрытие и повторное открытие хранилища) и что брошенные удаляются по TTL.
+
+Запуск из каталога telegram_bot:
+    python benchmarks/fsm_load.py
+    python benchmarks/fsm_load.py --users 1000 --backend memory
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from common.sqlite_fsm import SQLiteStorage
+from volunteers.telegram_handlers import ApplicationSteps
+
+BOT_ID = 1
+STEPS = ApplicationSteps.__states__
+ANSWER = "Хочу помогать людям и развивать город, участвую в школьных акциях. " * 3
+
+
+def make_storage(backend, path, ttl=24 * 60 * 60):
+    if backend == "memory":
+        return MemoryStorage()
+    return SQLiteStorage(path, ttl=ttl)
+
+
+def context(storage, user_id):
+    return FSMContext(storage=storage, key=StorageKey(bot_id=BOT_ID, chat_id=user_id, user_id=user_id))
+
+
+async def applicant(storage, user_id, stop_at, latencies, think):
+    ctx = context(storage, user_id)
+    await ctx.set_state(STEPS[0])
+    for index, step in enumerate(STEPS[:stop_at]):
+        await asyncio.sleep(random.random() * think)
+        started = time.perf_counter()
+        assert await ctx.get_state() == step.state
+        await ctx.update_data({step.state.split(":")[-1]: ANSWER, "selected_directions_ids": [1, 2, 3]})
+        next_state = STEPS[index + 1] if index + 1 < len(STEPS) else None
+        await ctx.set_state(next_state)
+        latencies.append(time.perf_counter() - started)
+
+    if stop_at == len(STEPS):
+        data = await ctx.get_data()
+        assert len(data) == len(STEPS) + 1, len(data)
+        await ctx.clear()
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def main(args):
+    path = args.db or os.path.join(tempfile.mkdtemp(), "fsm_load.sqlite3")
+    storage = make_storage(args.backend, path)
+
+    # Половина доходит до конца, половина бросает анкету на случайном шаге
+    plan = {
+        user_id: len(STEPS) if user_id % 2 else random.randint(1, len(STEPS) - 1)
+        for user_id in range(1, args.users + 1)
+    }
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        applicant(storage, user_id, stop_at, latencies, args.think)
+        for user_id, stop_at in plan.items()
+    ))
+    elapsed = time.perf_counter() - started
+
+    steps = len(latencies)
+    print(f"backend={args.backend} users={args.users} steps={steps} ({len(STEPS)} в анкете)")
+    print(f"время {elapsed:.2f} с, {steps / elapsed:.0f} шагов/с, {steps * 3 / elapsed:.0f} операций/с")
+    print(
+        f"задержка шага: p50 {statistics.median(latencies) * 1000:.2f} мс, "
+        f"p95 {percentile(latencies, 0.95) * 1000:.2f} мс, p99 {percentile(latencies, 0.99) * 1000:.2f} мс"
+    )
+
+    if args.backend == "memory":
+        return
+
+    # «Рестарт»: незаконченные анкеты должны остаться на своём шаге
+    await storage.close()
+    storage = make_storage(args.backend, path)
+    unfinished = {user_id: stop_at for user_id, stop_at in plan.items() if stop_at < len(STEPS)}
+    for user_id, stop_at in unfinished.items():
+        ctx = context(storage, user_id)
+        assert await ctx.get_state() == STEPS[stop_at].state
+        assert len(await ctx.get_data()) == stop_at + 1
+    print(f"после рестарта восстановлено анкет: {len(unfinished)}, размер базы {os.path.getsize(path) // 1024} КБ")
+    await storage.close()
+
+    # TTL: брошенные анкеты исчезают
+    storage = make_storage(args.backend, path, ttl=0.5)
+    await asyncio.sleep(1)
+    assert await context(storage, next(iter(unfinished))).get_state() is None
+    print(f"удалено брошенных по TTL: {await storage.purge_expired()}")
+    await storage.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--backend", choices=("sqlite", "memory"), default="sqlite")
+    parser.add_argument("--db", help="файл SQLite (по умолчанию — временный)")
+    parser.add_argument("--think", type=float, default=0.005, help="макс. пауза пользователя между шагами, с")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,87 @@
+"""
+Нагрузочная проверка угадывания в Крокодиле.
+
+--chats активных групп с раундами на словах уровня hard; поток из --messages
+сообщений идёт через CrocodileManager.register_guess, как из check_guess:
+обычная болтовня, длинные сообщения, почти-угадывания (падеж, ё/е, опечатка,
+пунктуация) и точные ответы. Угаданный раунд сразу перезапускается.
+Цель — не меньше 10 000 сообщений/с.
+
+Запуск из каталога telegram_bot:
+    python benchmarks/guess_match.py
+    python benchmarks/guess_match.py --chats 2000 --messages 200000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crocodile.crocodile_game import CrocodileManager
+
+TARGET = 10_000
+CHATTER = [
+    "ну это точно что-то живое", "показывай нормально!", "ахахах", "может животное?",
+    "я не понимаю что он показывает, давай ещё раз медленно и по буквам", "🤔🤔🤔",
+    "это предмет?", "дом", "машина", "кот", "собака", "ещё подсказку плиз",
+]
+
+
+def near_miss(word: str) -> str:
+    variant = random.randrange(4)
+    if variant == 0:
+        return word.capitalize() + "!"
+    if variant == 1:
+        return word.replace("е", "ё", 1) + "?"
+    if variant == 2 and len(word) > 4:
+        i = random.randrange(1, len(word) - 1)
+        return word[:i] + word[i + 1:]
+    return "это " + word + "ы"
+
+
+async def main(args):
+    manager = CrocodileManager()
+    chats = list(range(-1, -args.chats - 1, -1))
+    for chat_id in chats:
+        await manager.start_round(chat_id, 1, "leader", level="hard")
+
+    # Сообщения заготовлены заранее, чтобы мерить только проверку
+    stream = []
+    for _ in range(args.messages):
+        chat_id = random.choice(chats)
+        roll = random.random()
+        if roll < 0.01:
+            stream.append((chat_id, None))  # точный ответ — слово текущего раунда
+        elif roll < 0.06:
+            stream.append((chat_id, near_miss(manager.chats[chat_id]["word"])))
+        else:
+            stream.append((chat_id, random.choice(CHATTER)))
+
+    guessed = 0
+    started = time.perf_counter()
+    for chat_id, text in stream:
+        if chat_id not in manager.chats:
+            await manager.start_round(chat_id, 1, "leader", level="hard")
+        if text is None:
+            text = manager.chats[chat_id]["word"]
+        if await manager.register_guess(chat_id, 2, "player", text):
+            guessed += 1
+    elapsed = time.perf_counter() - started
+
+    rate = len(stream) / elapsed
+    print(f"чатов {args.chats}, сообщений {len(stream)}, угадано раундов {guessed}")
+    print(f"{rate:,.0f} сообщений/с, {elapsed / len(stream) * 1e6:.1f} мкс на сообщение "
+          f"({'OK' if rate >= TARGET else 'НИЖЕ ЦЕЛИ'} {TARGET:,}/с)")
+
+    for session in manager.chats.values():
+        session["task"].cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chats", type=int, default=1000)
+    parser.add_argument("--messages", type=int, default=100_000)
+    asyncio.run(main(parser.parse_args()))
@@ -1,10 +1,14 @@
 import os
 import asyncio
+import fcntl
 import logging
+import signal
 import sys
 
 from aiogram import Bot, Dispatcher, Router
 from aiogram.client.default import DefaultBotProperties
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
 from dotenv import load_dotenv
 
 # ---------- setup ----------
@@ -13,6 +17,17 @@ load_dotenv()
 
 TOKEN = os.getenv("BOT_TOKEN")
 
+# polling — один процесс сам забирает обновления (по умолчанию, удобно локально);
+# webhook — Telegram шлёт обновления на WEBHOOK_BASE_URL + WEBHOOK_PATH через nginx
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+WEBHOOK_BASE_URL = os.getenv("WEBHOOK_BASE_URL", "").rstrip("/")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/tg/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", 8081))
+# Замок единственного экземпляра; в docker-compose лежит на томе bot_data
+BOT_LOCK_PATH = os.getenv("BOT_LOCK_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "bot.lock"))
+
 
 # ---------- routers ----------
 try:
@@ -26,11 +41,75 @@ try:
 except Exception:
     mafia_router = Router()
 
+from common import api_client, ref_cache, send_queue, stats_store
+from common.fsm_storage import build_fsm_storage
 from general.handlers import general_router
 from volunteers.telegram_handlers import application_router
 from volunteers.project_creation import router as project_creation_router
 
 
+def acquire_instance_lock():
+    """
+    Бот работает одним процессом: игры Мафии и Крокодила, таймеры фаз и буфер
+    статистики живут в его памяти. Второй экземпляр (docker compose --scale,
+    polling рядом с webhook) разделил бы игры между процессами, поэтому он не стартует.
+    Файл держим открытым до выхода — flock снимается вместе с процессом.
+    """
+    os.makedirs(os.path.dirname(BOT_LOCK_PATH), exist_ok=True)
+    lock_file = open(BOT_LOCK_PATH, "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        raise RuntimeError(f"Бот уже запущен (занят {BOT_LOCK_PATH}), второй экземпляр не поддерживается")
+    return lock_file
+
+
+async def set_webhook(bot: Bot, dispatcher: Dispatcher):
+    # drop_pending_updates не ставим: при деплое новый процесс подхватывает накопившиеся апдейты
+    await bot.set_webhook(
+        f"{WEBHOOK_BASE_URL}{WEBHOOK_PATH}",
+        secret_token=WEBHOOK_SECRET or None,
+        allowed_updates=dispatcher.resolve_used_update_types(),
+    )
+    logging.info(f"🔗 Webhook: {WEBHOOK_BASE_URL}{WEBHOOK_PATH}")
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot):
+    """
+    aiohttp-сервер за nginx. Каждый апдейт обрабатывается отдельной задачей
+    (handle_in_background), Telegram сразу получает 200.
+    Webhook при остановке не снимаем — его перехватит следующий процесс.
+    SIGTERM (docker stop) и SIGINT завершают сервер штатно: runner.cleanup()
+    вызывает shutdown-хуки диспетчера (сброс игр Мафии, статистики) до выхода.
+    """
+    if not WEBHOOK_BASE_URL:
+        raise RuntimeError("BOT_MODE=webhook требует WEBHOOK_BASE_URL")
+
+    dp.startup.register(set_webhook)
+
+    app = web.Application()
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=WEBHOOK_SECRET or None).register(app, path=WEBHOOK_PATH)
+    # Хук сброса кэша для backend живёт на том же сервере (nginx наружу отдаёт только WEBHOOK_PATH)
+    ref_cache.setup_routes(app)
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT).start()
+    logging.info(f"📡 Webhook server on {WEBHOOK_HOST}:{WEBHOOK_PORT}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await stop.wait()
+        logging.info("🛑 Получен сигнал остановки")
+    finally:
+        await runner.cleanup()
+
+
 async def main():
     logging.basicConfig(level=logging.INFO, stream=sys.stdout)
 
@@ -38,13 +117,32 @@ async def main():
         logging.error("BOT_TOKEN not found")
         return
 
+    instance_lock = acquire_instance_lock()
+
     # ✅ SIMPLE + STABLE BOT (no custom session)
     bot = Bot(
         token=TOKEN,
         default=DefaultBotProperties(parse_mode="HTML")
     )
 
-    dp = Dispatcher()
+    # все исходящие сообщения идут через очередь с лимитами Telegram
+    bot.session.middleware(send_queue.middleware)
+
+    # Состояния диалогов: память процесса или общее хранилище (FSM_STORAGE)
+    dp = Dispatcher(storage=build_fsm_storage())
+
+    # общая статистика игр: пакетная запись в SQLite
+    dp.startup.register(stats_store.start)
+    dp.shutdown.register(stats_store.stop)
+    # общая HTTP-сессия к Django API
+    dp.shutdown.register(api_client.close)
+    # сводка метрик очереди исходящих сообщений
+    dp.startup.register(send_queue.start)
+    dp.shutdown.register(send_queue.stop)
+    # хук сброса кэша справочников для backend (в polling — отдельный порт BOT_INTERNAL_PORT)
+    if BOT_MODE != "webhook":
+        dp.startup.register(ref_cache.start_internal_server)
+        dp.shutdown.register(ref_cache.stop_internal_server)
 
     # inject bot if needed
     if crocodile_manager:
@@ -60,6 +158,10 @@ async def main():
     try:
         logging.info("🚀 Bot starting...")
 
+        if BOT_MODE == "webhook":
+            await run_webhook(dp, bot)
+            return
+
         # safe webhook cleanup
         try:
             await bot.delete_webhook(drop_pending_updates=True)
@@ -70,7 +172,9 @@ async def main():
         await dp.start_polling(bot)
 
     finally:
+        await dp.storage.close()
         await bot.session.close()
+        instance_lock.close()
         logging.info("🧹 Session closed")
 
 
@@ -0,0 +1,141 @@
+"""
+Асинхронный клиент Django API для всех модулей бота.
+
+Одна долгоживущая aiohttp.ClientSession на процесс: соединения с backend
+переиспользуются (пул TCPConnector), потоки executor'а не заняты ожиданием
+сети. Таймауты общие, повторы с экспоненциальной паузой — только там, где это
+безопасно: GET повторяется при любой сетевой ошибке и 502/503/504, а POST —
+лишь если соединение вообще не установилось (иначе заявка может задвоиться).
+
+Файлы передаются file-like объектами и отдаются aiohttp кусками прямо из
+буфера, без копирования в bytes.
+"""
+import asyncio
+import io
+import json
+import logging
+import os
+import random
+
+import aiohttp
+
+API_BASE_URL = (
+    os.getenv("DJANGO_API_BASE_URL")
+    or os.getenv("DJANGO_API_URL")
+    or "http://backend:8000/api/"
+).rstrip("/") + "/"
+
+REQUEST_TIMEOUT = 10
+POOL_SIZE = 20
+RETRIES = 3
+RETRY_BACKOFF = 0.5
+RETRY_STATUSES = {502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+_session = None
+
+
+class ApiResponse:
+    def __init__(self, status: int, content_type: str, text: str):
+        self.status = status
+        self.content_type = content_type
+        self.text = text
+
+    @property
+    def ok(self) -> bool:
+        return self.status in (200, 201, 204)
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def url_for(path: str) -> str:
+    return API_BASE_URL + path.lstrip("/")
+
+
+def get_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=POOL_SIZE, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+        )
+    return _session
+
+
+async def close():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+def _build_form(fields: dict, files: dict) -> aiohttp.FormData:
+    form = aiohttp.FormData()
+    for name, value in fields.items():
+        if value is None:
+            continue
+        values = value if isinstance(value, (list, tuple)) else [value]
+        for item in values:
+            form.add_field(name, str(item))
+    for name, (filename, fileobj, content_type) in files.items():
+        # Повтор запроса читает файл заново
+        fileobj.seek(0)
+        form.add_field(name, fileobj, filename=filename, content_type=content_type)
+    return form
+
+
+async def request(method: str, path: str, *, json=None, fields: dict = None, files: dict = None,
+                  timeout: float = None, retries: int = RETRIES) -> ApiResponse:
+    """
+    Запрос к API. path относительный ("bot-auth/").
+    fields/files — multipart: files = {"photo": ("a.jpg", fileobj, "image/jpeg")}.
+    Сетевые ошибки после всех повторов пробрасываются как aiohttp.ClientError / asyncio.TimeoutError.
+    """
+    method = method.upper()
+    url = url_for(path)
+    client_timeout = aiohttp.ClientTimeout(total=timeout) if timeout else None
+
+    for attempt in range(retries + 1):
+        kwargs = {"json": json} if json is not None else {}
+        if fields is not None or files:
+            kwargs["data"] = _build_form(fields or {}, files or {})
+        if client_timeout:
+            kwargs["timeout"] = client_timeout
+
+        try:
+            async with get_session().request(method, url, **kwargs) as resp:
+                result = ApiResponse(resp.status, resp.content_type, await resp.text())
+        except aiohttp.ClientConnectorError as e:
+            error = e
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if method not in IDEMPOTENT_METHODS:
+                raise
+            error = e
+        else:
+            if result.status not in RETRY_STATUSES or method not in IDEMPOTENT_METHODS or attempt == retries:
+                return result
+            error = None
+
+        if attempt == retries:
+            raise error
+        delay = RETRY_BACKOFF * 2 ** attempt * (1 + random.random() / 2)
+        logging.warning(f"[api] {method} {url}: {error or result.status}, повтор через {delay:.1f} с")
+        await asyncio.sleep(delay)
+
+
+async def get(path: str, **kwargs) -> ApiResponse:
+    return await request("GET", path, **kwargs)
+
+
+async def post(path: str, **kwargs) -> ApiResponse:
+    return await request("POST", path, **kwargs)
+
+
+async def download_telegram_file(bot, file_id: str) -> io.BytesIO:
+    """Скачивает файл из Telegram в буфер, готовый к передаче в files=."""
+    file_info = await bot.get_file(file_id)
+    buffer = io.BytesIO()
+    await bot.download_file(file_info.file_path, destination=buffer)
+    buffer.seek(0)
+    return buffer
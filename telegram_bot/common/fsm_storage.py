@@ -0,0 +1,52 @@
+"""
+Выбор хранилища FSM (состояния диалогов: анкета волонтёра, создание проекта).
+
+FSM_STORAGE:
+- sqlite (по умолчанию) — файл FSM_DB_PATH (common/sqlite_fsm.py): недописанные
+  анкеты переживают рестарт и деплой, брошенные удаляются через FSM_TTL;
+- memory — aiogram MemoryStorage: один процесс, всё теряется при рестарте
+  (годится для разработки и тестов);
+- redis — aiogram RedisStorage по REDIS_URL: состояние вне процесса, переживает
+  деплой. Нужен пакет redis (pip install redis).
+
+Несколько процессов бота это не даёт: игры Мафии и Крокодила и таймеры фаз
+по-прежнему в памяти единственного процесса (см. acquire_instance_lock в bot_runner.py).
+"""
+import logging
+import os
+from pathlib import Path
+
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from common.sqlite_fsm import SQLiteStorage
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+FSM_STORAGE = os.getenv("FSM_STORAGE", "sqlite")
+FSM_DB_PATH = os.getenv("FSM_DB_PATH", str(BASE_DIR / "fsm.sqlite3"))
+REDIS_URL = os.getenv("REDIS_URL", "")
+# Брошенные диалоги удаляются через сутки
+FSM_TTL = int(os.getenv("FSM_TTL", 24 * 60 * 60))
+
+
+def build_fsm_storage(backend: str = None) -> BaseStorage:
+    backend = backend or FSM_STORAGE
+
+    if backend == "redis":
+        try:
+            from aiogram.fsm.storage.redis import RedisStorage
+        except ImportError as e:
+            raise RuntimeError("FSM_STORAGE=redis требует пакет redis") from e
+        if not REDIS_URL:
+            raise RuntimeError("FSM_STORAGE=redis требует REDIS_URL")
+        logging.info("FSM: Redis")
+        return RedisStorage.from_url(REDIS_URL, state_ttl=FSM_TTL, data_ttl=FSM_TTL)
+
+    if backend == "sqlite":
+        logging.info(f"FSM: SQLite {FSM_DB_PATH}")
+        return SQLiteStorage(FSM_DB_PATH, ttl=FSM_TTL)
+
+    if backend != "memory":
+        raise RuntimeError(f"Неизвестное FSM_STORAGE: {backend}")
+    logging.info("FSM: память процесса")
+    return MemoryStorage()
@@ -0,0 +1,129 @@
+"""
+Кэш справочников из Django API (направления волонтёров и проектов).
+
+RefCache(name, loader, ttl):
+- пока значение свежее (моложе ttl) — отдаётся из памяти;
+- устаревшее, но не старше ttl + stale_ttl — отдаётся сразу, а в фоне
+  запускается обновление (stale-while-revalidate);
+- если значения нет — ждём загрузку. Одновременные запросы ждут одну и ту же
+  загрузку (single-flight), API не получает пачку одинаковых GET.
+
+loader — корутина без аргументов; None означает ошибку, старое значение остаётся.
+
+Backend сообщает об изменениях через POST /internal/cache/invalidate
+{"name": "volunteer_directions"} с заголовком X-Bot-Token — кэш помечается
+устаревшим и сразу обновляется в фоне. Сервер поднимается, если задан BOT_INTERNAL_PORT.
+"""
+import asyncio
+import hmac
+import logging
+import os
+import time
+
+from aiohttp import web
+
+INTERNAL_HOST = os.getenv("BOT_INTERNAL_HOST", "0.0.0.0")
+INTERNAL_PORT = os.getenv("BOT_INTERNAL_PORT")
+INTERNAL_TOKEN = os.getenv("BOT_INTERNAL_TOKEN", "")
+INVALIDATE_PATH = "/internal/cache/invalidate"
+
+_registry = {}
+
+
+class RefCache:
+    def __init__(self, name: str, loader, ttl: float = 300, stale_ttl: float = 3600):
+        self.name = name
+        self.loader = loader
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._value = None
+        self._loaded_at = 0.0
+        self._expired = True
+        self._inflight = None
+        _registry[name] = self
+
+    async def get(self):
+        age = time.monotonic() - self._loaded_at
+        if self._value is not None:
+            if not self._expired and age < self.ttl:
+                return self._value
+            if age < self.ttl + self.stale_ttl:
+                self._refresh()
+                return self._value
+        return await asyncio.shield(self._refresh())
+
+    def peek(self):
+        """Текущее значение без обращения к API (может быть None)."""
+        return self._value
+
+    def invalidate(self):
+        self._expired = True
+        self._refresh()
+
+    def _refresh(self) -> asyncio.Task:
+        if self._inflight is None:
+            self._inflight = asyncio.create_task(self._load())
+        return self._inflight
+
+    async def _load(self):
+        try:
+            value = await self.loader()
+            if value is not None:
+                self._value = value
+                self._loaded_at = time.monotonic()
+                self._expired = False
+            return self._value
+        except Exception as e:
+            logging.error(f"[ref_cache] {self.name}: ошибка загрузки: {e}")
+            return self._value
+        finally:
+            self._inflight = None
+
+
+def invalidate(name: str = None) -> list:
+    """Помечает устаревшим кэш name (или все). Возвращает имена сброшенных кэшей."""
+    caches = [_registry[name]] if name in _registry else (list(_registry.values()) if name is None else [])
+    for cache in caches:
+        cache.invalidate()
+    return [cache.name for cache in caches]
+
+
+# ---------- Хук для backend ----------
+
+async def handle_invalidate(request: web.Request) -> web.Response:
+    token = request.headers.get("X-Bot-Token", "")
+    if not INTERNAL_TOKEN or not hmac.compare_digest(token, INTERNAL_TOKEN):
+        return web.json_response({"detail": "forbidden"}, status=403)
+    try:
+        payload = await request.json()
+    except ValueError:
+        payload = {}
+    names = invalidate(payload.get("name"))
+    logging.info(f"[ref_cache] сброшено по запросу backend: {names}")
+    return web.json_response({"invalidated": names})
+
+
+def setup_routes(app: web.Application):
+    app.router.add_post(INVALIDATE_PATH, handle_invalidate)
+
+
+_runner = None
+
+
+async def start_internal_server():
+    global _runner
+    if not INTERNAL_PORT or _runner is not None:
+        return
+    app = web.Application()
+    setup_routes(app)
+    _runner = web.AppRunner(app)
+    await _runner.setup()
+    await web.TCPSite(_runner, INTERNAL_HOST, int(INTERNAL_PORT)).start()
+    logging.info(f"[ref_cache] хук сброса кэша слушает {INTERNAL_HOST}:{INTERNAL_PORT}{INVALIDATE_PATH}")
+
+
+async def stop_internal_server():
+    global _runner
+    if _runner is not None:
+        await _runner.cleanup()
+        _runner = None
@@ -0,0 +1,224 @@
+"""
+Очередь исходящих сообщений бота (middleware сессии aiogram).
+
+Все send_*/edit_*/copy/forward из любых модулей (ночь Мафии, лобби,
+объявления Крокодила) проходят здесь, поэтому хендлеры зовут bot.send_message
+как обычно, а ограничения Telegram соблюдаются в одном месте:
+
+- токен-бакеты: общий на бота (~30 сообщений/с) и свой на каждый чат
+  (группа ~20 в минуту, личка ~1 в секунду). Сообщения одного чата уходят
+  строго по очереди — порядок не перемешивается;
+- TelegramRetryAfter: чат ставится на паузу на retry_after секунд и запрос
+  повторяется (до MAX_RETRIES раз, если пауза не длиннее MAX_RETRY_AFTER);
+- правки одного и того же сообщения (лобби при каждом «Вступить»)
+  схлопываются: пока правка ждёт очереди, её вытесняет более свежая,
+  и в Telegram уходит только последнее состояние;
+- метрики: metrics() и сводка в лог раз в METRICS_INTERVAL секунд.
+
+Прочие методы (answer_callback_query, get_chat, delete_message...) не задерживаются.
+"""
+import asyncio
+import logging
+import time
+from collections import Counter
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import (
+    CopyMessage,
+    EditMessageCaption,
+    EditMessageMedia,
+    EditMessageReplyMarkup,
+    EditMessageText,
+    ForwardMessage,
+    SendAnimation,
+    SendAudio,
+    SendDocument,
+    SendMediaGroup,
+    SendMessage,
+    SendPhoto,
+    SendPoll,
+    SendSticker,
+    SendVideo,
+    SendVoice,
+)
+
+GLOBAL_RATE = 30            # сообщений в секунду на бота
+GLOBAL_BURST = 30
+GROUP_RATE = 20 / 60        # сообщений в секунду на группу
+GROUP_BURST = 10
+PRIVATE_RATE = 1            # сообщений в секунду в личку
+PRIVATE_BURST = 3
+MAX_RETRIES = 3
+MAX_RETRY_AFTER = 60
+METRICS_INTERVAL = 60
+IDLE_TTL = 600              # бакет молчащего чата удаляется
+
+THROTTLED = (
+    SendMessage, SendPhoto, SendDocument, SendAnimation, SendAudio, SendVideo, SendVoice,
+    SendSticker, SendPoll, SendMediaGroup, CopyMessage, ForwardMessage,
+    EditMessageText, EditMessageCaption, EditMessageMedia, EditMessageReplyMarkup,
+)
+COALESCED = (EditMessageText, EditMessageCaption, EditMessageReplyMarkup)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def take(self) -> float:
+        """Забирает токен, дождавшись его. Вызывающий держит lock. Возвращает время ожидания."""
+        waited = 0.0
+        while True:
+            now = time.monotonic()
+            self._refill(now)
+            delay = self.blocked_until - now
+            if delay <= 0 and self.tokens >= 1:
+                self.tokens -= 1
+                return waited
+            delay = max(delay, (1 - self.tokens) / self.rate)
+            await asyncio.sleep(delay)
+            waited += delay
+
+    async def acquire(self) -> float:
+        async with self.lock:
+            return await self.take()
+
+    def refund(self):
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+    def pause(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+    def idle(self, now: float) -> bool:
+        return not self.lock.locked() and now - self.updated > IDLE_TTL and now > self.blocked_until
+
+
+_global = None
+_chats = {}
+_latest_edits = {}  # (метод, чат, сообщение) -> последняя поставленная правка
+_metrics = Counter()
+_queued = 0
+_metrics_task = None
+
+
+def _global_bucket() -> TokenBucket:
+    global _global
+    if _global is None:
+        _global = TokenBucket(GLOBAL_RATE, GLOBAL_BURST)
+    return _global
+
+
+def _chat_bucket(chat_id) -> TokenBucket:
+    bucket = _chats.get(chat_id)
+    if bucket is None:
+        is_group = isinstance(chat_id, str) or chat_id < 0
+        bucket = TokenBucket(*(GROUP_RATE, GROUP_BURST) if is_group else (PRIVATE_RATE, PRIVATE_BURST))
+        _chats[chat_id] = bucket
+    return bucket
+
+
+def _edit_key(method):
+    if not isinstance(method, COALESCED):
+        return None
+    return type(method).__name__, method.chat_id, method.message_id, method.inline_message_id
+
+
+def _superseded(edit_key, method) -> bool:
+    return edit_key is not None and _latest_edits.get(edit_key) is not method
+
+
+class _NoLock:
+    async def __aenter__(self):
+        return None
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+async def middleware(make_request, bot, method):
+    if not isinstance(method, THROTTLED):
+        return await make_request(bot, method)
+
+    global _queued
+    chat_id = getattr(method, "chat_id", None)
+    edit_key = _edit_key(method)
+    if edit_key is not None:
+        _latest_edits[edit_key] = method
+
+    _queued += 1
+    _metrics["queued_peak"] = max(_metrics["queued_peak"], _queued)
+    try:
+        chat = _chat_bucket(chat_id) if chat_id is not None else None
+        # Лок чата держится до ответа Telegram: сообщения чата уходят по порядку
+        async with chat.lock if chat else _NoLock():
+            for attempt in range(MAX_RETRIES + 1):
+                if _superseded(edit_key, method):
+                    _metrics["coalesced"] += 1
+                    return True
+                waited = await chat.take() if chat else 0.0
+                if _superseded(edit_key, method):
+                    chat.refund()
+                    _metrics["coalesced"] += 1
+                    return True
+                waited += await _global_bucket().acquire()
+                if waited:
+                    _metrics["delayed"] += 1
+                    _metrics["wait_ms"] += int(waited * 1000)
+
+                try:
+                    result = await make_request(bot, method)
+                except TelegramRetryAfter as e:
+                    _metrics["retry_after"] += 1
+                    if attempt == MAX_RETRIES or e.retry_after > MAX_RETRY_AFTER:
+                        _metrics["failed"] += 1
+                        raise
+                    logging.warning(f"[send_queue] {type(method).__name__} в {chat_id}: flood wait {e.retry_after} с")
+                    (chat or _global_bucket()).pause(e.retry_after)
+                    continue
+                _metrics["sent"] += 1
+                return result
+    finally:
+        _queued -= 1
+        if edit_key is not None and _latest_edits.get(edit_key) is method:
+            del _latest_edits[edit_key]
+
+
+def metrics() -> dict:
+    return {**_metrics, "queued": _queued, "chats": len(_chats)}
+
+
+async def _report_loop():
+    reported = {}
+    while True:
+        await asyncio.sleep(METRICS_INTERVAL)
+        now = time.monotonic()
+        for chat_id in [chat_id for chat_id, bucket in _chats.items() if bucket.idle(now)]:
+            del _chats[chat_id]
+        current = metrics()
+        if current != reported:
+            logging.info(f"[send_queue] {current}")
+            reported = current
+
+
+async def start():
+    global _metrics_task
+    if _metrics_task is None:
+        _metrics_task = asyncio.create_task(_report_loop())
+
+
+async def stop():
+    global _metrics_task
+    if _metrics_task is not None:
+        _metrics_task.cancel()
+        _metrics_task = None
+    logging.info(f"[send_queue] итог: {metrics()}")
@@ -0,0 +1,153 @@
+"""
+FSM-хранилище aiogram в SQLite (анкета волонтёра на 21 шаг, создание проекта).
+
+Переживает рестарт и деплой: состояние и данные диалога лежат в файле
+(FSM_DB_PATH), а не в памяти процесса. Несколько процессов бота на одном
+томе видят одни и те же диалоги (WAL).
+
+- Одна строка на ключ (бот, чат, пользователь): state + data + updated_at.
+- data — компактный JSON без пробелов; крупные анкеты (> COMPRESS_FROM байт)
+  дополнительно сжимаются zlib. Первый байт — формат: b"j" или b"z".
+- Брошенные диалоги: строка старше ttl считается пустой при чтении, а раз в
+  PURGE_INTERVAL секунд удаляется одним DELETE по индексу updated_at.
+- Все обращения к базе идут через один выделенный поток, поэтому соединение
+  одно и без блокировок.
+"""
+import asyncio
+import json
+import sqlite3
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+
+COMPRESS_FROM = 1024
+PURGE_INTERVAL = 600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fsm (
+    key TEXT PRIMARY KEY,
+    state TEXT,
+    data BLOB,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fsm_updated_at_idx ON fsm (updated_at);
+"""
+
+
+def pack_data(data: Dict[str, Any]) -> Optional[bytes]:
+    if not data:
+        return None
+    raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if len(raw) > COMPRESS_FROM:
+        return b"z" + zlib.compress(raw)
+    return b"j" + raw
+
+
+def unpack_data(blob: Optional[bytes]) -> Dict[str, Any]:
+    if not blob:
+        return {}
+    raw = zlib.decompress(blob[1:]) if blob[:1] == b"z" else blob[1:]
+    return json.loads(raw)
+
+
+class SQLiteStorage(BaseStorage):
+    def __init__(self, path: str, ttl: float = 24 * 60 * 60, key_builder: KeyBuilder = None):
+        self.path = path
+        self.ttl = ttl
+        self.key_builder = key_builder or DefaultKeyBuilder()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fsm-sqlite")
+        self._conn = None
+        self._last_purge = 0.0
+
+    # ---------- Работа в потоке базы ----------
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def _maybe_purge(self, conn, now):
+        if now - self._last_purge >= PURGE_INTERVAL:
+            self._last_purge = now
+            conn.execute("DELETE FROM fsm WHERE updated_at < ?", (now - self.ttl,))
+
+    def _read(self, key: str):
+        now = time.time()
+        row = self._connect().execute(
+            "SELECT state, data, updated_at FROM fsm WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[2] < now - self.ttl:
+            return None, None
+        return row[0], row[1]
+
+    def _write(self, key: str, column: str, value):
+        now = time.time()
+        other = "data" if column == "state" else "state"
+        conn = self._connect()
+        self._maybe_purge(conn, now)
+        # Вторая колонка от просроченного диалога не должна ожить вместе с новой записью
+        conn.execute(
+            f"INSERT INTO fsm (key, {column}, updated_at) VALUES (?, ?, ?) "
+            f"ON CONFLICT (key) DO UPDATE SET {column} = excluded.{column}, "
+            f"{other} = CASE WHEN fsm.updated_at < ? THEN NULL ELSE fsm.{other} END, "
+            f"updated_at = excluded.updated_at",
+            (key, value, now, now - self.ttl),
+        )
+        if value is None:
+            # Пустой диалог (state сброшен, данных нет) не храним
+            conn.execute("DELETE FROM fsm WHERE key = ? AND state IS NULL AND data IS NULL", (key,))
+
+    def _update(self, key: str, patch: Dict[str, Any]) -> Dict[str, Any]:
+        _, blob = self._read(key)
+        data = unpack_data(blob)
+        data.update(patch)
+        self._write(key, "data", pack_data(data))
+        return data
+
+    def _purge(self) -> int:
+        now = time.time()
+        self._last_purge = now
+        return self._connect().execute("DELETE FROM fsm WHERE updated_at < ?", (now - self.ttl,)).rowcount
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    # ---------- BaseStorage ----------
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        value = state.state if isinstance(state, State) else state
+        await self._run(self._write, self.key_builder.build(key), "state", value)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        state, _ = await self._run(self._read, self.key_builder.build(key))
+        return state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        await self._run(self._write, self.key_builder.build(key), "data", pack_data(data))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, data = await self._run(self._read, self.key_builder.build(key))
+        return unpack_data(data)
+
+    async def update_data(self, key: StorageKey, data: Dict[str, Any]) -> Dict[str, Any]:
+        # Чтение и запись за один заход в поток базы (в BaseStorage это два)
+        return (await self._run(self._update, self.key_builder.build(key), data)).copy()
+
+    async def purge_expired(self) -> int:
+        """Удаляет брошенные диалоги сразу (иначе — раз в PURGE_INTERVAL при записи)."""
+        return await self._run(self._purge)
+
+    async def close(self) -> None:
+        def _close():
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        await self._run(_close)
+        self._executor.shutdown(wait=True)
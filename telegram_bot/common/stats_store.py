@@ -0,0 +1,216 @@
+"""
+Общая статистика игр (Крокодил, Мафия) в SQLite.
+
+Хендлеры вызывают inc() — это только прибавка в памяти. Раз в FLUSH_INTERVAL
+секунд накопленные прибавки пишутся одной транзакцией через
+INSERT ... ON CONFLICT DO UPDATE (value = value + excluded.value), так что
+частые события (раунд, угадывание, таймаут) не переписывают файл целиком.
+
+Счётчики лежат строками (game, chat_id, user_id, counter, value), а индекс
+(game, chat_id, counter, value) отдаёт топ-N чата без сортировки в Python.
+Мафия считает по чату, где шла игра.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DB_PATH = os.getenv("GAME_STATS_DB", str(BASE_DIR / "game_stats.sqlite3"))
+FLUSH_INTERVAL = 5.0
+
+# Старые JSON-файлы: переносятся один раз, при создании базы
+LEGACY_CROCODILE_FILE = BASE_DIR / "crocodile" / "crocodile_stats.json"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS game_stat_counters (
+    game TEXT NOT NULL,
+    chat_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    counter TEXT NOT NULL,
+    value INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (game, chat_id, user_id, counter)
+);
+CREATE INDEX IF NOT EXISTS game_stat_leaderboard_idx
+    ON game_stat_counters (game, chat_id, counter, value DESC);
+CREATE TABLE IF NOT EXISTS game_stat_players (
+    game TEXT NOT NULL,
+    chat_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (game, chat_id, user_id)
+);
+"""
+
+UPSERT_COUNTER = """
+INSERT INTO game_stat_counters (game, chat_id, user_id, counter, value) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (game, chat_id, user_id, counter) DO UPDATE SET value = value + excluded.value
+"""
+UPSERT_NAME = """
+INSERT INTO game_stat_players (game, chat_id, user_id, name) VALUES (?, ?, ?, ?)
+ON CONFLICT (game, chat_id, user_id) DO UPDATE SET name = excluded.name
+"""
+
+_pending = defaultdict(int)  # (game, chat_id, user_id, counter) -> прибавка
+_names = {}  # (game, chat_id, user_id) -> имя
+_conn = None
+_db_lock = threading.Lock()
+_flusher_task = None
+
+
+def _connect():
+    global _conn
+    if _conn is None:
+        is_new = not os.path.exists(DB_PATH)
+        _conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.executescript(SCHEMA)
+        if is_new:
+            _import_legacy(_conn)
+    return _conn
+
+
+def _import_legacy(conn):
+    """crocodile_stats.json: {chat_id: {user_id: {name, led, guessed, failed}}}"""
+    if not LEGACY_CROCODILE_FILE.exists():
+        return
+    try:
+        with open(LEGACY_CROCODILE_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return
+
+    counters, names = [], []
+    for chat_key, users in data.items():
+        # Самый старый формат хранил игроков без чата — такие записи пропускаем
+        if not isinstance(users, dict) or "led" in users:
+            continue
+        for user_key, stat in users.items():
+            names.append(("crocodile", int(chat_key), int(user_key), stat.get("name") or f"ID {user_key}"))
+            for counter in ("led", "guessed", "failed"):
+                if stat.get(counter):
+                    counters.append(("crocodile", int(chat_key), int(user_key), counter, stat[counter]))
+    with conn:
+        conn.executemany(UPSERT_COUNTER, counters)
+        conn.executemany(UPSERT_NAME, names)
+    logging.info(f"Stats: перенесено из {LEGACY_CROCODILE_FILE.name} — {len(names)} игроков")
+
+
+def _write(counters, names):
+    with _db_lock:
+        conn = _connect()
+        with conn:
+            conn.executemany(UPSERT_COUNTER, counters)
+            conn.executemany(UPSERT_NAME, names)
+
+
+def _query(sql, params):
+    with _db_lock:
+        return _connect().execute(sql, params).fetchall()
+
+
+# ---------- API ----------
+
+def inc(game: str, chat_id: int, user_id, counter: str, value: int = 1, name: str = None):
+    _pending[(game, int(chat_id), int(user_id), counter)] += value
+    if name:
+        _names[(game, int(chat_id), int(user_id))] = name
+
+
+def set_name(game: str, chat_id: int, user_id, name: str):
+    _names[(game, int(chat_id), int(user_id))] = name
+
+
+async def flush():
+    if not _pending and not _names:
+        return
+    counters = [(*key, value) for key, value in _pending.items() if value]
+    names = [(*key, name) for key, name in _names.items()]
+    _pending.clear()
+    _names.clear()
+    try:
+        await asyncio.to_thread(_write, counters, names)
+    except sqlite3.Error as e:
+        logging.error(f"Stats: ошибка записи: {e}")
+        # Возвращаем прибавки в очередь, чтобы не потерять
+        for game, chat_id, user_id, counter, value in counters:
+            _pending[(game, chat_id, user_id, counter)] += value
+        for game, chat_id, user_id, name in names:
+            _names.setdefault((game, chat_id, user_id), name)
+
+
+async def leaderboard(game: str, chat_id: int, order_by: str, counters, limit: int = 15):
+    """
+    Топ-N игроков чата по счётчику order_by.
+    Возвращает [{"user_id", "name", <counter>: value, ...}] по убыванию order_by.
+    """
+    await flush()
+    top = await asyncio.to_thread(
+        _query,
+        "SELECT user_id FROM game_stat_counters WHERE game = ? AND chat_id = ? AND counter = ? "
+        "ORDER BY value DESC LIMIT ?",
+        (game, int(chat_id), order_by, limit),
+    )
+    user_ids = [row[0] for row in top]
+    if len(user_ids) < limit:
+        # Игроки, у которых order_by ещё ни разу не менялся (например, только вели раунды)
+        rest = await asyncio.to_thread(
+            _query,
+            "SELECT DISTINCT user_id FROM game_stat_counters WHERE game = ? AND chat_id = ? LIMIT ?",
+            (game, int(chat_id), limit * 2),
+        )
+        user_ids += [row[0] for row in rest if row[0] not in user_ids][:limit - len(user_ids)]
+    if not user_ids:
+        return []
+
+    marks = ",".join("?" * len(user_ids))
+    rows = await asyncio.to_thread(
+        _query,
+        f"SELECT c.user_id, c.counter, c.value, p.name FROM game_stat_counters c "
+        f"LEFT JOIN game_stat_players p ON p.game = c.game AND p.chat_id = c.chat_id AND p.user_id = c.user_id "
+        f"WHERE c.game = ? AND c.chat_id = ? AND c.user_id IN ({marks})",
+        (game, int(chat_id), *user_ids),
+    )
+    result = {uid: {"user_id": uid, "name": None, **{c: 0 for c in counters}} for uid in user_ids}
+    for user_id, counter, value, name in rows:
+        entry = result[user_id]
+        entry["name"] = name or entry["name"]
+        if counter in entry:
+            entry[counter] = value
+    return [result[uid] for uid in user_ids]
+
+
+# ---------- Жизненный цикл ----------
+
+async def _flush_loop():
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL)
+        await flush()
+
+
+async def start():
+    global _flusher_task
+    await asyncio.to_thread(_connect_locked)
+    if _flusher_task is None or _flusher_task.done():
+        _flusher_task = asyncio.create_task(_flush_loop())
+
+
+def _connect_locked():
+    with _db_lock:
+        _connect()
+
+
+async def stop():
+    global _flusher_task
+    if _flusher_task is not None:
+        _flusher_task.cancel()
+        try:
+            await _flusher_task
+        except asyncio.CancelledError:
+            pass
+        _flusher_task = None
+    await flush()
@@ -1,137 +1,59 @@
-import random
 import asyncio
-import json
-from pathlib import Path
-from typing import Dict, Optional, List, Any
-
-# ---------- PATHS ----------
-BASE_DIR = Path(__file__).resolve().parent
-STATS_FILE = BASE_DIR / "crocodile_stats.json"
-CACHE_DIR = BASE_DIR / "cache_words"
-CACHE_DIR.mkdir(exist_ok=True)
-
-# ---------- УРОВНИ ----------
-LEVELS = {
-    "easy": ["nouns"],
-    "medium": ["nouns", "adjectives"],
-    "hard": ["nouns", "adjectives", "verbs"]
-}
-
-# ---------- КОЛОДЫ СЛОВ ----------
-class WordDeck:
-    def __init__(self, all_words: List[str]):
-        self._all_words = all_words
-        self._deck = list(all_words)
-        random.shuffle(self._deck)
-
-    def get_word(self) -> str:
-        if not self._deck:
-            self._deck = list(self._all_words)
-            random.shuffle(self._deck)
-            if not self._deck:
-                 raise RuntimeError("Словарь пуст, не могу пополнить колоду.")
-            print("[INFO] Колода слов пополнена и перемешана.")
-            
-        return self._deck.pop()
+from typing import Dict, Optional, List, Tuple
+
+from common import stats_store
+from crocodile.guess_matcher import GuessMatcher
+from crocodile.word_index import WordDeck, WordIndex, load_indexes
+
+# Ключ игры в общей статистике (common/stats_store.py)
+STATS_GAME = "crocodile"
+STATS_COUNTERS = ("led", "guessed", "failed")
+
 
 class CrocodileManager:
     def __init__(self):
         self.chats: Dict[int, dict] = {}
-        # СТРУКТУРА: { "chat_id_str": { "user_id_str": { stats... } } }
-        self.stats: Dict[str, Dict[str, Any]] = {} 
-        self.words_decks: Dict[str, WordDeck] = {} 
+        self.word_indexes: Dict[str, WordIndex] = {}
+        # Своя неповторяющаяся колода у каждого чата и уровня
+        self.decks: Dict[Tuple[int, str], WordDeck] = {}
         self.bot = None
         self.DEFAULT_DURATION = 300 # 5 минут
 
-        self._load_stats()
         self._load_words_from_cache()
 
     # ==========================================================
     #                       СТАТИСТИКА
     # ==========================================================
 
-    def _load_stats(self):
-        if STATS_FILE.exists():
-            try:
-                with open(STATS_FILE, "r", encoding="utf-8") as f:
-                    self.stats = json.load(f)
-            except json.JSONDecodeError:
-                self.stats = {}
-        else:
-            self.stats = {}
-
-    def _save_stats(self):
-        with open(STATS_FILE, "w", encoding="utf-8") as f:
-            json.dump(
-                self.stats,
-                f,
-                ensure_ascii=False,
-                indent=2
-            )
+    def _inc_stat(self, chat_id: int, user_id: int, counter: str, name: Optional[str] = None):
+        """Прибавка копится в памяти, в базу уходит пачкой (см. common/stats_store.py)."""
+        stats_store.inc(STATS_GAME, chat_id, user_id, counter, name=name)
 
-    def _ensure_user(self, chat_id: int, user_id: int, name: Optional[str] = None):
-        """Проверяет наличие записи пользователя ВНУТРИ конкретного чата."""
-        c_key = str(chat_id)
-        u_key = str(user_id)
-
-        # Если чата нет в статистике, создаем
-        if c_key not in self.stats:
-            self.stats[c_key] = {}
-
-        # Если юзера нет в этом чате, создаем
-        if u_key not in self.stats[c_key]:
-            self.stats[c_key][u_key] = {
-                "name": name or f"ID {user_id}",
-                "led": 0,
-                "guessed": 0,
-                "failed": 0
-            }
-        elif name:
-            # Обновляем имя, если оно изменилось
-            self.stats[c_key][u_key]["name"] = name
+    async def top_stats(self, chat_id: int, limit: int = 15) -> List[dict]:
+        return await stats_store.leaderboard(STATS_GAME, chat_id, "guessed", STATS_COUNTERS, limit)
 
     # ==========================================================
     #                           СЛОВА
     # ==========================================================
 
     def _load_words_from_cache(self):
-        raw_words_by_level: Dict[str, List[str]] = {}
-
-        for level, categories in LEVELS.items():
-            combined: list[str] = []
-
-            for cat in categories:
-                file_path = CACHE_DIR / cat / "summary.json"
-                if not file_path.exists():
-                    continue
-                try:
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        data = json.load(f)
-                        combined.extend(
-                            w.lower()
-                            for w in data
-                            if isinstance(w, str) and w.isalpha() and len(w) > 2
-                        )
-                except Exception as e:
-                    print(f"[WARNING] Ошибка загрузки {file_path}: {e}")
-
-            raw_words_by_level[level] = list(set(combined))
-            
-        for level, words in raw_words_by_level.items():
-             if words:
-                 self.words_decks[level] = WordDeck(words)
-        
+        # Слова читаются из скомпилированного индекса (crocodile/word_index.py) через mmap
+        self.word_indexes = load_indexes()
+
         # Если совсем нет слов, добавим заглушку, чтобы бот не падал при старте
-        if not self.words_decks.get("easy"):
+        if not self.word_indexes.get("easy"):
             print("[WARNING] Не найдено слов! Используем резервные.")
-            self.words_decks["easy"] = WordDeck(["крокодил", "солнце", "дерево"])
+            self.word_indexes["easy"] = WordIndex.from_words(["крокодил", "солнце", "дерево"])
 
-    def get_random_word(self, level: str = "easy") -> str:
-        if level not in self.words_decks:
+    def get_random_word(self, level: str = "easy", chat_id: int = 0) -> str:
+        if level not in self.word_indexes:
             level = "easy"
-        deck = self.words_decks.get(level) or self.words_decks.get("easy")
-        if not deck:
-             raise RuntimeError(f"Нет слов для уровня {level}")
+        deck = self.decks.get((chat_id, level))
+        if deck is None:
+            index = self.word_indexes.get(level)
+            if not index:
+                raise RuntimeError(f"Нет слов для уровня {level}")
+            deck = self.decks[(chat_id, level)] = WordDeck(index)
         return deck.get_word()
 
     # ==========================================================
@@ -142,20 +64,20 @@ class CrocodileManager:
         duration = duration or self.DEFAULT_DURATION
 
         # Статистика сохраняется под ключом ID чата
-        self._ensure_user(chat_id, leader_id, leader_name)
-        self.stats[str(chat_id)][str(leader_id)]["led"] += 1
-        self._save_stats()
+        self._inc_stat(chat_id, leader_id, "led", leader_name)
 
         if chat_id in self.chats and self.chats[chat_id].get("task"):
             self.chats[chat_id]["task"].cancel()
 
-        word = self.get_random_word(level)
+        word = self.get_random_word(level, chat_id)
         task = asyncio.create_task(self._timeout(chat_id, duration, self.bot)) 
 
         self.chats[chat_id] = {
             "leader_id": leader_id,
             "leader_name": leader_name,
             "word": word,
+            # Нормальная форма и основа слова считаются один раз на раунд
+            "matcher": GuessMatcher(word),
             "guessed": False,
             "task": task,
             "duration": duration,
@@ -180,9 +102,7 @@ class CrocodileManager:
             leader_id = session["leader_id"]
             
             # Запись проигрыша
-            self._ensure_user(chat_id, leader_id)
-            self.stats[str(chat_id)][str(leader_id)]["failed"] += 1
-            self._save_stats()
+            self._inc_stat(chat_id, leader_id, "failed")
 
             await bot_instance.send_message(
                 chat_id,
@@ -202,7 +122,8 @@ class CrocodileManager:
 
         level = session.get("level", "easy")
         try:
-            session["word"] = self.get_random_word(level)
+            session["word"] = self.get_random_word(level, chat_id)
+            session["matcher"] = GuessMatcher(session["word"])
         except RuntimeError:
             return None
 
@@ -216,14 +137,12 @@ class CrocodileManager:
         if not session or session["guessed"]: return None
         if user_id == session["leader_id"]: return None
 
-        if text.strip().lower() == session["word"].lower():
+        if session["matcher"].matches(text):
             session["guessed"] = True
             if session.get("task"): session["task"].cancel()
 
             # Запись выигрыша
-            self._ensure_user(chat_id, user_id, username)
-            self.stats[str(chat_id)][str(user_id)]["guessed"] += 1
-            self._save_stats()
+            self._inc_stat(chat_id, user_id, "guessed", username)
             
             del self.chats[chat_id] 
             return {"word": session["word"], "user_id": user_id, "username": username}
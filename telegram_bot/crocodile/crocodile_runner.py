@@ -143,8 +143,8 @@ async def stats(msg: types.Message):
     if msg.chat.type == "private": 
         return
 
-    # Берем статистику ТОЛЬКО для текущего чата по chat_id
-    chat_stats = manager.stats.get(str(msg.chat.id))
+    # Топ-15 текущего чата по угаданным: сортирует база по индексу
+    chat_stats = await manager.top_stats(msg.chat.id, limit=15)
 
     if not chat_stats:
         await msg.answer("📊 В этом чате статистика пока пуста. Сыграйте в крокодила!")
@@ -152,15 +152,11 @@ async def stats(msg: types.Message):
 
     lines = ["🏆 <b>Статистика игроков этого чата:</b>\n"]
     
-    # Сортировка: у кого больше угаданных
-    sorted_stats = sorted(chat_stats.items(), key=lambda item: item[1].get("guessed", 0), reverse=True)
-    
-    # Ограничим вывод топ-15, чтобы сообщение не было огромным
-    for user_id, stat in sorted_stats[:15]:
-        display_name = html.escape(stat.get("name", "Игрок"))
-        led = stat.get("led", 0)
-        guessed = stat.get("guessed", 0)
-        failed = stat.get("failed", 0)
+    for stat in chat_stats:
+        display_name = html.escape(stat["name"] or "Игрок")
+        led = stat["led"]
+        guessed = stat["guessed"]
+        failed = stat["failed"]
 
         lines.append(
             f"👤 <b>{display_name}</b>\n" 
@@ -0,0 +1,93 @@
+"""
+Проверка догадок Крокодила.
+
+GuessMatcher строится один раз на раунд (и при смене слова): заранее считает
+нормальную форму и основу загаданного слова. Каждое сообщение группы затем
+проверяется за O(длина сообщения):
+
+- нормализация: нижний регистр, ё -> е, пунктуация/цифры/эмодзи -> пробел
+  («Крокодил!», «крокодил...» засчитываются);
+- основа: отрезаются типичные окончания («крокодилы», «крокодила» == «крокодил»);
+- опечатки: расстояние Левенштейна не больше max_distance (считается полосой
+  ширины 2k+1 с ранним выходом), для коротких слов допуск меньше, чтобы «кот» != «кит».
+
+Засчитывается сообщение не длиннее MAX_WORDS слов, где одно из слов совпало,
+— перечислить полсловаря одним сообщением не выйдет.
+"""
+import os
+import re
+
+MAX_DISTANCE = int(os.getenv("CROCODILE_GUESS_DISTANCE", 1))
+MAX_WORDS = 3
+MAX_MESSAGE_LEN = 80
+MIN_STEM = 3
+
+_NOT_LETTER = re.compile(r"[^a-zа-я]+")
+# Длинные окончания раньше коротких
+_ENDINGS = tuple(sorted((
+    "ами", "ями", "ого", "его", "ому", "ему", "ыми", "ими", "ость", "ться", "тся",
+    "ов", "ев", "ей", "ам", "ям", "ах", "ях", "ом", "ем", "ой", "ый", "ий",
+    "ая", "яя", "ое", "ее", "ые", "ие", "ых", "их", "ым", "им", "ую", "юю", "ть",
+    "а", "я", "ы", "и", "у", "ю", "е", "о", "ь", "й",
+), key=len, reverse=True))
+
+
+def normalize(text: str) -> str:
+    return _NOT_LETTER.sub(" ", text.lower().replace("ё", "е")).strip()
+
+
+def stem(word: str) -> str:
+    for ending in _ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def within_distance(a: str, b: str, k: int) -> bool:
+    """Расстояние Левенштейна между a и b не больше k."""
+    if abs(len(a) - len(b)) > k:
+        return False
+    if a == b:
+        return True
+    if k == 0:
+        return False
+    too_far = k + 1
+    prev = [j if j <= k else too_far for j in range(len(b) + 1)]
+    for i, ca in enumerate(a, 1):
+        lo, hi = max(1, i - k), min(len(b), i + k)
+        cur = [too_far] * (len(b) + 1)
+        cur[0] = i if i <= k else too_far
+        best = cur[0]
+        for j in range(lo, hi + 1):
+            cost = prev[j - 1] + (ca != b[j - 1])
+            cur[j] = min(cost, prev[j] + 1, cur[j - 1] + 1)
+            if cur[j] < best:
+                best = cur[j]
+        if best > k:
+            return False
+        prev = cur
+    return prev[len(b)] <= k
+
+
+class GuessMatcher:
+    def __init__(self, word: str, max_distance: int = MAX_DISTANCE):
+        self.word = normalize(word)
+        self.stem = stem(self.word)
+        # Короткие слова — без опечаток, средние — одна, длинные — сколько разрешено
+        self.max_distance = min(max_distance, max(0, (len(self.word) - 1) // 4))
+
+    def matches_word(self, token: str) -> bool:
+        if token == self.word:
+            return True
+        if abs(len(token) - len(self.word)) > self.max_distance + 3:
+            # Разница больше любого окончания с опечаткой
+            return False
+        return stem(token) == self.stem or within_distance(token, self.word, self.max_distance)
+
+    def matches(self, text: str) -> bool:
+        if len(text) > MAX_MESSAGE_LEN:
+            return False
+        tokens = normalize(text).split()
+        if not tokens or len(tokens) > MAX_WORDS:
+            return False
+        return any(self.matches_word(token) for token in tokens)
@@ -0,0 +1,193 @@
+"""
+Скомпилированный индекс слов Крокодила — по файлу на уровень сложности.
+
+Сборка (в Dockerfile при сборке образа; вручную — из каталога telegram_bot):
+    python crocodile/word_index.py
+
+Из cache_words/<категория>/summary.json слова один раз приводятся к нижнему
+регистру, фильтруются, дедуплицируются и сортируются. Формат <уровень>.idx:
+
+    MAGIC (4 байта) | count (uint32) | offsets (uint32 * (count + 1)) | слова UTF-8 подряд
+
+Бот открывает файл через mmap: ни JSON, ни списка строк в памяти — слово i
+читается срезом blob[offsets[i]:offsets[i + 1]] только когда его вытянули.
+Если индекса нет или summary.json новее, load_indexes() пересобирает его на старте.
+
+WordDeck — колода без копирования списка: порядок задаёт случайная перестановка
+номеров (сеть Фейстеля по ключам колоды), состояние — ключи и позиция.
+Слова не повторяются, пока колода не пройдена целиком; дальше новые ключи.
+"""
+import json
+import logging
+import mmap
+import random
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+BASE_DIR = Path(__file__).resolve().parent
+CACHE_DIR = BASE_DIR / "cache_words"
+INDEX_DIR = BASE_DIR / "word_index"
+
+MAGIC = b"CWI1"
+HEADER = struct.Struct("<4sI")
+
+# ---------- УРОВНИ ----------
+LEVELS = {
+    "easy": ["nouns"],
+    "medium": ["nouns", "adject"],
+    "hard": ["nouns", "adject", "verbs"]
+}
+
+
+# ---------- СБОРКА ----------
+
+def _read_category(cat: str) -> List[str]:
+    file_path = CACHE_DIR / cat / "summary.json"
+    if not file_path.exists():
+        return []
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception as e:
+        logging.warning(f"[crocodile] Ошибка загрузки {file_path}: {e}")
+        return []
+    return [w.lower() for w in data if isinstance(w, str) and w.isalpha() and len(w) > 2]
+
+
+def pack_words(words: Iterable[str]) -> bytes:
+    encoded = [w.encode("utf-8") for w in sorted(set(words))]
+    offsets = array("I", [0])
+    for word in encoded:
+        offsets.append(offsets[-1] + len(word))
+    if sys.byteorder != "little":
+        offsets.byteswap()
+    return HEADER.pack(MAGIC, len(encoded)) + offsets.tobytes() + b"".join(encoded)
+
+
+def index_path(level: str) -> Path:
+    return INDEX_DIR / f"{level}.idx"
+
+
+def is_stale(level: str) -> bool:
+    path = index_path(level)
+    if not path.exists():
+        return True
+    built_at = path.stat().st_mtime
+    return any(
+        (CACHE_DIR / cat / "summary.json").exists() and (CACHE_DIR / cat / "summary.json").stat().st_mtime > built_at
+        for cat in LEVELS[level]
+    )
+
+
+def build_level(level: str) -> int:
+    """Собирает индекс уровня, пишет атомарно. Возвращает число слов."""
+    words = [w for cat in LEVELS[level] for w in _read_category(cat)]
+    data = pack_words(words)
+    INDEX_DIR.mkdir(exist_ok=True)
+    tmp = index_path(level).with_suffix(".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(index_path(level))
+    return HEADER.unpack_from(data)[1]
+
+
+# ---------- ЧТЕНИЕ ----------
+
+class WordIndex:
+    """Только для чтения: len(index), index[i]. buffer — mmap файла или bytes."""
+
+    def __init__(self, buffer):
+        magic, count = HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError("Не индекс слов Крокодила")
+        self._buffer = buffer
+        self._count = count
+        offsets = memoryview(buffer)[HEADER.size:HEADER.size + 4 * (count + 1)]
+        if sys.byteorder == "little":
+            self._offsets = offsets.cast("I")
+        else:
+            self._offsets = array("I", offsets)
+            self._offsets.byteswap()
+        self._blob = HEADER.size + 4 * (count + 1)
+
+    @classmethod
+    def open(cls, path: Path) -> "WordIndex":
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def from_words(cls, words: Iterable[str]) -> "WordIndex":
+        return cls(pack_words(words))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int) -> str:
+        start = self._blob + self._offsets[i]
+        return self._buffer[start:self._blob + self._offsets[i + 1]].decode("utf-8")
+
+
+def load_indexes() -> Dict[str, WordIndex]:
+    indexes = {}
+    for level in LEVELS:
+        try:
+            if is_stale(level):
+                logging.info(f"[crocodile] Пересобираем индекс слов {level}: {build_level(level)} слов")
+            index = WordIndex.open(index_path(level))
+        except (OSError, ValueError) as e:
+            # Например, каталог только для чтения — собираем тот же индекс в памяти
+            logging.warning(f"[crocodile] Индекс {level} недоступен ({e}), собираем в памяти")
+            index = WordIndex.from_words(w for cat in LEVELS[level] for w in _read_category(cat))
+        if len(index):
+            indexes[level] = index
+    return indexes
+
+
+# ---------- КОЛОДА ----------
+
+class WordDeck:
+    """
+    Неповторяющаяся колода над WordIndex. Хранит только ключи перестановки и
+    позицию, поэтому у каждого чата своя колода почти без затрат памяти.
+    """
+    ROUNDS = 4
+
+    def __init__(self, index: WordIndex):
+        self.index = index
+        half_bits = max(1, ((len(index) - 1).bit_length() + 1) // 2)
+        self._half_bits = half_bits
+        self._mask = (1 << half_bits) - 1
+        # Область перестановки — 4^half_bits >= len(index); номера за пределами пропускаются
+        self._domain = 1 << (2 * half_bits)
+        self._shuffle()
+
+    def _shuffle(self):
+        self._keys = [random.getrandbits(32) for _ in range(self.ROUNDS)]
+        self._position = 0
+
+    def _permute(self, x: int) -> int:
+        left, right = x >> self._half_bits, x & self._mask
+        for key in self._keys:
+            mixed = ((right ^ key) * 0x9E3779B1) & 0xFFFFFFFF
+            left, right = right, left ^ ((mixed ^ (mixed >> 15)) & self._mask)
+        return (left << self._half_bits) | right
+
+    def next_index(self) -> int:
+        while True:
+            if self._position >= self._domain:
+                self._shuffle()
+            i = self._permute(self._position)
+            self._position += 1
+            if i < len(self.index):
+                return i
+
+    def get_word(self) -> str:
+        return self.index[self.next_index()]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, stream=sys.stdout)
+    for level in LEVELS:
+        print(f"{level}: {build_level(level)} слов -> {index_path(level)} ({index_path(level).stat().st_size // 1024} КБ)")
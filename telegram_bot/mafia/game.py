@@ -30,6 +30,12 @@ class MafiaGame:
         self.doctor_target = None
         self.sheriff_target = None
         self.sheriff_action_type = None 
+
+        # Таймер текущей фазы (см. mafia/scheduler.py): что и когда (unix-время) сработает
+        self.phase_action = None
+        self.phase_deadline = None
+        # Последний выполненный переход "action:deadline": повтор после сбоя его не повторит
+        self.completed_step = None
         
         # Настройки по умолчанию
         self.settings = {
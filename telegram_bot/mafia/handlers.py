@@ -1,4 +1,3 @@
-import asyncio
 import html
 from collections import Counter
 from aiogram import Router, types, Bot, F
@@ -9,13 +8,27 @@ from typing import Optional
 
 # !!! ВАЖНОЕ ИСПРАВЛЕНИЕ: Нужен импорт MafiaGame, storage, stats !!!
 from mafia.game import MafiaGame, MAFIA_TEAM, ROLE_NAMES
-from mafia import storage, stats
+from mafia import scheduler, storage, stats
 
 # !!! ИМПОРТ: Добавляем games_menu_kb для обработки /start в группе !!!
 from mafia.keyboards import join_kb, settings_kb, players_kb, sheriff_choice_kb, games_menu_kb
 
 mafia_router = Router()
 
+
+# Игры держатся в памяти, на диск их пишет фоновый flusher (см. mafia/storage.py).
+# Таймеры фаз восстанавливаются из сохранённых игр (см. mafia/scheduler.py).
+@mafia_router.startup()
+async def on_startup(bot: Bot):
+    await storage.start()
+    await scheduler.start(bot)
+
+
+@mafia_router.shutdown()
+async def on_shutdown():
+    await scheduler.stop()
+    await storage.stop()
+
 # ---------- ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ (без изменений) ----------
 
 def generate_lobby_text(game: MafiaGame) -> str:
@@ -79,14 +92,14 @@ async def check_end_game(bot: Bot, game: MafiaGame) -> bool:
     
     # -----------------------
 
-    await bot.send_message(game.chat_id, final_text, parse_mode="HTML")
-    
+    # Итоги записываем до рассылки: повтор перехода после сбоя не засчитает победу дважды
     for uid, p in game.players.items():
         if (winner == "mafia" and p["role"] in MAFIA_TEAM) or \
            (winner == "civilian" and p["role"] not in MAFIA_TEAM):
-            stats.inc(uid, "wins")
+            stats.inc(game.chat_id, uid, "wins", name=p["name"])
             
     storage.delete_game(game.chat_id)
+    await bot.send_message(game.chat_id, final_text, parse_mode="HTML")
     return True
 
 # -----------------------------------------------
@@ -103,10 +116,16 @@ async def start_mafia_from_menu_callback(call: types.CallbackQuery):
     creator_user = call.from_user
     creator_id = str(creator_user.id)
     
-    if storage.load_game(chat_id):
-        await call.answer("⚠️ В этом чате уже есть активная игра.", show_alert=True)
-        return
+    async with storage.game_lock(chat_id):
+        if storage.load_game(chat_id):
+            await call.answer("⚠️ В этом чате уже есть активная игра.", show_alert=True)
+            return
+        await _create_lobby_from_menu(call, chat_id, creator_user, creator_id)
+
+    await call.answer("Лобби Мафии создано!")
 
+
+async def _create_lobby_from_menu(call: types.CallbackQuery, chat_id: int, creator_user, creator_id: str):
     # 1. Редактируем сообщение, чтобы убрать меню (если оно было)
     try:
         await call.message.edit_text("🚀 Создаем лобби Мафии...")
@@ -134,10 +153,7 @@ async def start_mafia_from_menu_callback(call: types.CallbackQuery):
          sent_msg = call.message 
          
     game.lobby_message_id = sent_msg.message_id
-    storage.save_game(game)
-    asyncio.create_task(lobby_cycle(call.bot, chat_id))
-
-    await call.answer("Лобби Мафии создано!")
+    scheduler.schedule(game, "lobby_end", game.settings["lobby_time"])
 # -----------------------------------------------
 
 
@@ -147,26 +163,26 @@ async def start_lobby(msg: types.Message):
     chat_id = msg.chat.id
     creator_id = str(msg.from_user.id)
     
-    if storage.load_game(chat_id):
-        await msg.answer("⚠️ В этом чате уже есть активная игра.")
-        return
+    async with storage.game_lock(chat_id):
+        if storage.load_game(chat_id):
+            await msg.answer("⚠️ В этом чате уже есть активная игра.")
+            return
 
-    game = MafiaGame(chat_id)
-    game.add_player(creator_id, msg.from_user.full_name) 
-    game.creator_id = creator_id
-    storage.save_game(game)
+        game = MafiaGame(chat_id)
+        game.add_player(creator_id, msg.from_user.full_name) 
+        game.creator_id = creator_id
+        storage.save_game(game)
 
-    text = generate_lobby_text(game)
+        text = generate_lobby_text(game)
 
-    # При создании лобби is_creator = True
-    sent_msg = await msg.answer(
-        text,
-        reply_markup=join_kb(is_creator=True), 
-        parse_mode="HTML"
-    )
-    game.lobby_message_id = sent_msg.message_id
-    storage.save_game(game)
-    asyncio.create_task(lobby_cycle(msg.bot, chat_id))
+        # При создании лобби is_creator = True
+        sent_msg = await msg.answer(
+            text,
+            reply_markup=join_kb(is_creator=True), 
+            parse_mode="HTML"
+        )
+        game.lobby_message_id = sent_msg.message_id
+        scheduler.schedule(game, "lobby_end", game.settings["lobby_time"])
 
 # ---------- НОВАЯ КОМАНДА: ОТМЕНА ЛОББИ ----------
 @mafia_router.message(Command("cancel_mafia"), F.chat.type.in_({"group", "supergroup"}))
@@ -222,18 +238,16 @@ async def stop_mafia(msg: types.Message):
         await msg.answer("⚠️ Игра была принудительно остановлена. Данные удалены.")
 
 
-async def lobby_cycle(bot: Bot, chat_id: int):
-    """Цикл ожидания лобби"""
-    game = storage.load_game(chat_id)
-    if not game: return
-    
-    await asyncio.sleep(game.settings["lobby_time"])
-    
-    game = storage.load_game(chat_id)
-    if not game or not game.lobby_open: return
+async def lobby_timeout(bot: Bot, chat_id: int):
+    """Время лобби вышло или создатель начал досрочно (таймер lobby_end)"""
+    async with storage.game_lock(chat_id):
+        game = storage.load_game(chat_id)
+        if not game: return
 
-    game.lobby_open = False
-    storage.save_game(game)
+        # Лобби уже закрыто, если это повтор после рестарта посреди старта игры
+        if game.lobby_open:
+            game.lobby_open = False
+            storage.save_game(game)
 
     if len(game.players) < game.settings["min_players"]:
         await bot.send_message(chat_id, "❌ Недостаточно игроков. Игра отменена.")
@@ -246,50 +260,59 @@ async def lobby_cycle(bot: Bot, chat_id: int):
 async def join_game(call: types.CallbackQuery):
     chat_id = call.message.chat.id
     uid = str(call.from_user.id)
-    game = storage.load_game(chat_id)
 
-    if not game or not game.lobby_open:
-        await call.answer("Лобби закрыто", show_alert=True)
-        return
-    if uid in game.players:
-        await call.answer("Вы уже в игре", show_alert=True)
-        return
+    async with storage.game_lock(chat_id):
+        game = storage.load_game(chat_id)
 
-    game.add_player(uid, call.from_user.full_name)
-    storage.save_game(game)
-    
-    # ❗️ ИСПРАВЛЕНИЕ: Всегда передаем is_creator=True, чтобы кнопка "Начать сейчас" оставалась видимой
-    
-    text = generate_lobby_text(game)
+        if not game or not game.lobby_open:
+            await call.answer("Лобби закрыто", show_alert=True)
+            return
+        if uid in game.players:
+            await call.answer("Вы уже в игре", show_alert=True)
+            return
 
-    try:
+        game.add_player(uid, call.from_user.full_name)
+        storage.save_game(game)
+        
+        # ❗️ ИСПРАВЛЕНИЕ: Всегда передаем is_creator=True, чтобы кнопка "Начать сейчас" оставалась видимой
+        
+        text = generate_lobby_text(game)
         # Проверяем, является ли текущий пользователь создателем, чтобы отобразить кнопку "Начать сейчас"
         is_creator_now = str(game.creator_id) == uid 
+
+    await call.answer("✅ Вы вступили")
+
+    # Правка лобби — вне замка: пока она ждёт лимита чата, другие успевают вступить,
+    # и очередь (common/send_queue.py) отправит только последний список
+    try:
         await call.message.edit_text(text, reply_markup=join_kb(is_creator=is_creator_now), parse_mode="HTML")
     except TelegramBadRequest: 
         pass 
     
-    await call.answer("✅ Вы вступили")
-    
 # ---------- МГНОВЕННЫЙ СТАРТ ----------
 @mafia_router.callback_query(F.data == "start_now")
 async def instant_start_game(call: types.CallbackQuery):
     chat_id = call.message.chat.id
     uid = str(call.from_user.id)
-    game = storage.load_game(chat_id)
 
-    if not game or not game.lobby_open:
-        return await call.answer("Лобби закрыто.")
-    
-    # ⚠️ Эта проверка гарантирует, что только создатель может нажать кнопку.
-    if str(game.creator_id) != uid:
-        return await call.answer("❌ Только создатель игры может начать досрочно!", show_alert=True)
+    # Под замком: двойное нажатие или истёкший таймер лобби не запустят игру дважды
+    async with storage.game_lock(chat_id):
+        game = storage.load_game(chat_id)
 
-    if len(game.players) < game.settings["min_players"]:
-        return await call.answer(f"❌ Нельзя начать! Минимум {game.settings['min_players']} игрока.", show_alert=True)
+        if not game or not game.lobby_open:
+            return await call.answer("Лобби закрыто.")
+        
+        # ⚠️ Эта проверка гарантирует, что только создатель может нажать кнопку.
+        if str(game.creator_id) != uid:
+            return await call.answer("❌ Только создатель игры может начать досрочно!", show_alert=True)
 
-    game.lobby_open = False
-    storage.save_game(game)
+        if len(game.players) < game.settings["min_players"]:
+            return await call.answer(f"❌ Нельзя начать! Минимум {game.settings['min_players']} игрока.", show_alert=True)
+
+        game.lobby_open = False
+        # Старт идёт через таймер с нулевой задержкой: если бот перезапустится
+        # посреди раздачи ролей, scheduler повторит старт, а не бросит игру
+        scheduler.schedule(game, "lobby_end", 0)
     
     await call.message.edit_text(
         f"🚀 Создатель <b>{call.from_user.full_name}</b> начал игру досрочно!",
@@ -298,16 +321,18 @@ async def instant_start_game(call: types.CallbackQuery):
     )
     
     await call.answer("Игра начинается!")
-    
-    await start_game_logic(call.bot, game)
 
 
 async def start_game_logic(bot: Bot, game: MafiaGame):
-    game.assign_roles()
-    storage.save_game(game)
+    # При повторе после рестарта роли уже розданы — не перераздаём и не считаем игру дважды
+    first_run = any(p["role"] is None for p in game.players.values())
+    if first_run:
+        game.assign_roles()
+        storage.save_game(game)
 
     for uid, p in game.players.items():
-        stats.inc(uid, "games")
+        if first_run:
+            stats.inc(game.chat_id, uid, "games", name=p["name"])
         role_name = ROLE_NAMES.get(p["role"], p["role"])
         try:
             await bot.send_message(uid, f"🎭 Ваша роль: <b>{role_name}</b>", parse_mode="HTML")
@@ -324,6 +349,12 @@ async def night_phase(bot: Bot, chat_id: int):
     game = storage.load_game(chat_id)
     if not game: return
 
+    # Повтор после сбоя: ночь уже объявлена, осталось поставить таймер
+    if game.phase == "night":
+        if game.phase_action != "night_end":
+            scheduler.schedule(game, "night_end", game.settings["night_time"])
+        return
+
     game.phase = "night"
     game.mafia_votes = {}
     game.doctor_target = None
@@ -331,6 +362,7 @@ async def night_phase(bot: Bot, chat_id: int):
     game.sheriff_action_type = None
     game.night_messages = []
     storage.save_game(game)
+    await storage.flush()
 
     status_msg = []
 
@@ -380,10 +412,7 @@ async def night_phase(bot: Bot, chat_id: int):
     if status_msg:
         await bot.send_message(chat_id, "\n".join(set(status_msg)))
     
-    storage.save_game(game)
-    
-    await asyncio.sleep(game.settings["night_time"])
-    await resolve_night(bot, chat_id)
+    scheduler.schedule(game, "night_end", game.settings["night_time"])
 
 # ---------- ДЕЙСТВИЯ НОЧЬЮ (CALLBACKS) ----------
 
@@ -474,11 +503,13 @@ async def doctor_heal(call: types.CallbackQuery):
 async def resolve_night(bot: Bot, chat_id: int):
     game = storage.load_game(chat_id)
     if not game: return
-    
-    # Удаляем сообщения ночи
-    for mid in game.night_messages:
-        try: await bot.delete_message(chat_id=chat_id, message_id=mid)
-        except: pass
+
+    # Повтор после сбоя (см. mafia/scheduler.py): смерти уже применены, идём дальше
+    step = f"night_end:{game.phase_deadline}"
+    if game.completed_step == step:
+        if await check_end_game(bot, game): return
+        await day_phase(bot, chat_id)
+        return
 
     dead_players = []
 
@@ -509,9 +540,17 @@ async def resolve_night(bot: Bot, chat_id: int):
             game.players[uid]["alive"] = False
             
             result_text += f"💀 Был убит: <b>{game.players[uid]['name']}</b> ({ROLE_NAMES[game.players[uid]['role']]})\n"
-            stats.inc(uid, "games")
 
+    # Отметку пишем на диск до сообщений: что бы ни упало дальше, ночь не посчитается дважды
+    game.completed_step = step
     storage.save_game(game)
+    await storage.flush()
+
+    # Удаляем сообщения ночи
+    for mid in game.night_messages:
+        try: await bot.delete_message(chat_id=chat_id, message_id=mid)
+        except: pass
+
     await bot.send_message(chat_id, result_text, parse_mode="HTML")
     
     if await check_end_game(bot, game): return
@@ -521,10 +560,18 @@ async def resolve_night(bot: Bot, chat_id: int):
 # ---------- ДЕНЬ (ГОЛОСОВАНИЕ) ----------
 async def day_phase(bot: Bot, chat_id: int):
     game = storage.load_game(chat_id)
-    
+    if not game: return
+
+    # Повтор после сбоя: голосование уже объявлено (и голоса не сбрасываем), осталось поставить таймер
+    if game.phase == "vote":
+        if game.phase_action != "vote_end":
+            scheduler.schedule(game, "vote_end", game.settings["vote_time"])
+        return
+
     game.phase = "vote"
     game.vote_votes = {}
     storage.save_game(game)
+    await storage.flush()
     
     await bot.send_message(chat_id, "🗣 Объявляется дневное обсуждение! У вас есть время, чтобы вычислить мафию.")
     
@@ -539,8 +586,7 @@ async def day_phase(bot: Bot, chat_id: int):
         except Exception: 
             pass
 
-    await asyncio.sleep(game.settings["vote_time"])
-    await resolve_vote(bot, chat_id)
+    scheduler.schedule(game, "vote_end", game.settings["vote_time"])
 
 @mafia_router.callback_query(F.data.startswith("vote:"))
 async def vote_handler(call: types.CallbackQuery):
@@ -564,17 +610,22 @@ async def vote_handler(call: types.CallbackQuery):
 async def resolve_vote(bot: Bot, chat_id: int):
     game = storage.load_game(chat_id)
     if not game: return
-    
-    await bot.send_message(chat_id, "🗳 Голосование завершено. Подсчитываем голоса...")
-    
+
+    # Повтор после сбоя: изгнание уже применено, идём дальше
+    step = f"vote_end:{game.phase_deadline}"
+    if game.completed_step == step:
+        if await check_end_game(bot, game): return
+        await night_phase(bot, chat_id)
+        return
+
     if not game.vote_votes:
-        await bot.send_message(chat_id, "🤷‍♂️ Никто не голосовал. Никто не выгнан.")
+        result_text = "🤷‍♂️ Никто не голосовал. Никто не выгнан."
     else:
         counter = Counter(game.vote_votes.values())
         most_common = counter.most_common(2)
         
         if len(most_common) > 1 and most_common[0][1] == most_common[1][1]:
-            await bot.send_message(chat_id, "⚖️ Ничья по голосам. Никто не выгнан.")
+            result_text = "⚖️ Ничья по голосам. Никто не выгнан."
         else:
             kicked_id = most_common[0][0]
             kicked_player = game.players[kicked_id]
@@ -582,19 +633,24 @@ async def resolve_vote(bot: Bot, chat_id: int):
             # НОВОЕ: Разрешаем одно "последнее слово"
             game.players[kicked_id]["last_word_allowed"] = True 
             game.players[kicked_id]["alive"] = False
-            storage.save_game(game)
-            
-            await bot.send_message(
-                chat_id, 
-                f"⚖️ Решением города был изгнан: <b>{kicked_player['name']}</b>\nЕго роль: <b>{ROLE_NAMES[kicked_player['role']]}</b>",
-                parse_mode="HTML"
-            )
+            result_text = f"⚖️ Решением города был изгнан: <b>{kicked_player['name']}</b>\nЕго роль: <b>{ROLE_NAMES[kicked_player['role']]}</b>"
+
+    game.completed_step = step
+    storage.save_game(game)
+    await storage.flush()
+
+    await bot.send_message(chat_id, "🗳 Голосование завершено. Подсчитываем голоса...")
+    await bot.send_message(chat_id, result_text, parse_mode="HTML")
 
     if await check_end_game(bot, game): return
     
     await bot.send_message(chat_id, "🏙 Город засыпает...")
     await night_phase(bot, chat_id)
 
+scheduler.register("lobby_end", lobby_timeout)
+scheduler.register("night_end", resolve_night)
+scheduler.register("vote_end", resolve_vote)
+
 # ---------- НАСТРОЙКИ - без изменений ----------
 @mafia_router.message(Command("settings_mafia"), F.chat.type.in_({"group", "supergroup"}))
 async def settings_mafia(msg: types.Message):
@@ -642,6 +698,24 @@ async def adjust_settings(call: types.CallbackQuery):
     await call.answer("✅ Настройки обновлены")
 
 
+# ---------- /stats_mafia (СТАТИСТИКА ТЕКУЩЕГО ЧАТА) ----------
+@mafia_router.message(Command("stats_mafia"), F.chat.type.in_({"group", "supergroup"}))
+async def stats_mafia(msg: types.Message):
+    # Топ-15 текущего чата по победам: сортирует база по индексу
+    chat_stats = await stats.top(msg.chat.id, limit=15)
+
+    if not chat_stats:
+        await msg.answer("📊 В этом чате статистика пока пуста. Сыграйте в мафию!")
+        return
+
+    lines = ["🏆 <b>Статистика Мафии в этом чате:</b>\n"]
+    for stat in chat_stats:
+        display_name = html.escape(stat["name"] or "Игрок")
+        lines.append(f"👤 <b>{display_name}</b> — 🎲 Игр: {stat['games']} | 🏅 Побед: {stat['wins']}")
+
+    await msg.answer("\n".join(lines), parse_mode="HTML")
+
+
 # ---------- УДАЛЕНИЕ СООБЩЕНИЙ НОЧЬЮ И ОТ МЕРТВЫХ - без изменений ----------
 @mafia_router.message(F.chat.type != ChatType.PRIVATE)
 async def delete_messages_check(msg: types.Message):
@@ -0,0 +1,164 @@
+"""
+Таймеры фаз Мафии (конец лобби, ночи, голосования).
+
+Вместо asyncio.sleep в каждом хендлере срок фазы пишется в саму игру
+(game.phase_action + game.phase_deadline, unix-время) и сохраняется вместе с ней.
+Одна задача-цикл держит кучу ближайших сроков и, когда срок наступил, запускает
+зарегистрированный переход. После перезапуска бота rehydrate() заново ставит
+сроки всех восстановленных игр — просроченные срабатывают сразу.
+
+Запись в куче считается устаревшей, если у игры уже другой срок или действие
+(досрочный старт, /stop_mafia) — такие записи просто пропускаются.
+
+Если переход упал (например, Telegram не ответил), он повторяется через
+RETRY_DELAYS. Переходы идемпотентны (game.completed_step), поэтому повтор
+продолжает с того места, где остановился. Когда попытки кончились, игра
+останавливается и чат об этом узнаёт.
+"""
+import asyncio
+import heapq
+import logging
+import time
+
+from mafia import storage
+
+STOP_TIMEOUT = 10
+RETRY_DELAYS = (5, 15, 60)
+
+_heap = []  # (когда запустить, chat_id, action, deadline)
+_transitions = {}
+_running = {}  # task -> (chat_id, action, deadline)
+_attempts = {}  # (chat_id, action, deadline) -> сколько раз переход уже упал
+_wakeup = None
+_loop_task = None
+_bot = None
+
+
+def register(action: str, handler):
+    """handler(bot, chat_id) — корутина перехода для действия action."""
+    _transitions[action] = handler
+
+
+def schedule(game, action: str, delay: float):
+    """Назначает переход action через delay секунд и сохраняет срок в игре."""
+    game.phase_action = action
+    game.phase_deadline = time.time() + delay
+    storage.save_game(game)
+    _push(game.phase_deadline, game.chat_id, action, game.phase_deadline)
+
+
+def cancel(game):
+    game.phase_action = None
+    game.phase_deadline = None
+    storage.save_game(game)
+
+
+def _push(fire_at, chat_id, action, deadline):
+    heapq.heappush(_heap, (fire_at, chat_id, action, deadline))
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+def rehydrate():
+    for game in storage.get_all_games().values():
+        if game.phase_action and game.phase_deadline:
+            _push(game.phase_deadline, game.chat_id, game.phase_action, game.phase_deadline)
+
+
+def _fire(chat_id, action, deadline):
+    game = storage.load_game(chat_id)
+    if not game or game.phase_action != action or game.phase_deadline != deadline:
+        return
+    if (chat_id, action, deadline) in _running.values():
+        return
+    handler = _transitions.get(action)
+    if handler is None:
+        logging.error(f"Mafia: нет перехода для {action}")
+        return
+
+    # Срок остаётся в игре, пока переход не закончится: если процесс перезапустится
+    # посреди перехода (рассылка ролей), rehydrate() снова его запустит, а не оставит
+    # игру без таймера. Следующую фазу переход ставит сам через schedule().
+    task = asyncio.create_task(handler(_bot, chat_id))
+    _running[task] = (chat_id, action, deadline)
+    task.add_done_callback(_on_done)
+
+
+def _on_done(task):
+    key = _running.pop(task)
+    chat_id, action, deadline = key
+    if task.cancelled():
+        return
+    if task.exception():
+        logging.error("Mafia: ошибка в переходе фазы", exc_info=task.exception())
+        attempt = _attempts.get(key, 0)
+        if attempt < len(RETRY_DELAYS):
+            # Срок в игре остаётся прежним — повтор (и после рестарта тоже) его узнает
+            _attempts[key] = attempt + 1
+            _push(time.time() + RETRY_DELAYS[attempt], chat_id, action, deadline)
+        else:
+            _attempts.pop(key, None)
+            asyncio.create_task(_give_up(chat_id, action, deadline))
+        return
+    _attempts.pop(key, None)
+
+    game = storage.load_game(chat_id)
+    if game and game.phase_action == action and game.phase_deadline == deadline:
+        # Переход завершился, не назначив следующую фазу (например, конец игры)
+        game.phase_action = None
+        game.phase_deadline = None
+        storage.save_game(game)
+
+
+async def _give_up(chat_id, action, deadline):
+    game = storage.load_game(chat_id)
+    if not game or game.phase_action != action or game.phase_deadline != deadline:
+        return
+    storage.delete_game(chat_id)
+    logging.error(f"Mafia: переход {action} в чате {chat_id} не удался (попыток: {len(RETRY_DELAYS) + 1}), игра остановлена")
+    try:
+        await _bot.send_message(chat_id, "⚠️ Игра остановлена из-за ошибки. Начните новую: /start_mafia")
+    except Exception as e:
+        logging.error(f"Mafia: не удалось сообщить об остановке игры в {chat_id}: {e}")
+
+
+async def _run():
+    while True:
+        _wakeup.clear()
+        now = time.time()
+        while _heap and _heap[0][0] <= now:
+            _, chat_id, action, deadline = heapq.heappop(_heap)
+            _fire(chat_id, action, deadline)
+
+        timeout = _heap[0][0] - now if _heap else None
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def start(bot):
+    """Вызывается после storage.start(): игры уже в памяти."""
+    global _bot, _wakeup, _loop_task
+    _bot = bot
+    _wakeup = asyncio.Event()
+    _heap.clear()
+    _attempts.clear()
+    rehydrate()
+    if _loop_task is None or _loop_task.done():
+        _loop_task = asyncio.create_task(_run())
+
+
+async def stop():
+    global _loop_task
+    if _loop_task is not None:
+        _loop_task.cancel()
+        try:
+            await _loop_task
+        except asyncio.CancelledError:
+            pass
+        _loop_task = None
+    # Уже запущенные переходы дожидаемся; не успевшие закончиться сохранят свой срок
+    # и повторятся после рестарта
+    if _running:
+        await asyncio.wait(list(_running), timeout=STOP_TIMEOUT)
@@ -1,26 +1,14 @@
 # mafia/stats.py
-import json
+# Статистика игроков Мафии по чатам. Хранение и пакетная запись — в common/stats_store.py
+from common import stats_store
 
-PLAYER_STATS = {}
-STATS_FILE = "stats_data.json"
+GAME = "mafia"
+COUNTERS = ("games", "wins")
 
-def load_stats():
-    global PLAYER_STATS
-    try:
-        with open(STATS_FILE, 'r', encoding='utf-8') as f:
-            PLAYER_STATS = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        PLAYER_STATS = {}
 
-def save_stats():
-    try:
-        with open(STATS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(PLAYER_STATS, f, ensure_ascii=False, indent=4)
-    except Exception as e:
-        print(f"Ошибка сохранения статистики: {e}")
+def inc(chat_id: int, uid: str, key: str, value: int = 1, name: str = None):
+    stats_store.inc(GAME, chat_id, uid, key, value, name=name)
 
-def inc(uid: str, key: str, value: int = 1):
-    if uid not in PLAYER_STATS:
-        PLAYER_STATS[uid] = {"games": 0, "wins": 0}
-    PLAYER_STATS[uid][key] = PLAYER_STATS[uid].get(key, 0) + value
-    # В реальном проекте: вызывать save_stats периодически, а не на каждое изменение.
\ No newline at end of file
+
+async def top(chat_id: int, limit: int = 15):
+    return await stats_store.leaderboard(GAME, chat_id, "wins", COUNTERS, limit)
@@ -1,25 +1,39 @@
+"""
+Хранилище игр Мафии.
+
+Игры живут в памяти (GAMES: chat_id -> MafiaGame), хендлеры работают с одним и
+тем же объектом. save_game только помечает игру «грязной», а фоновый flusher раз
+в FLUSH_INTERVAL секунд пишет на диск лишь изменённые игры — каждую в свой файл
+MAFIA_GAMES_DIR/<chat_id>.json через временный файл и os.replace, так что чаты не
+мешают друг другу и недописанный JSON не появляется. При старте бота игры
+восстанавливаются из этих файлов (и один раз переносятся из старого mafia_db.json).
+
+Для колбэков, которые читают и меняют игру через await, есть game_lock(chat_id).
+"""
+import asyncio
+import copy
 import json
+import logging
 import os
+from pathlib import Path
+
 from mafia.game import MafiaGame
 
-DB_FILE = "mafia_db.json"
+BASE_DIR = Path(__file__).resolve().parent.parent
+DB_FILE = str(BASE_DIR / "mafia_db.json")  # старый общий файл, читается только для переноса
+# В docker-compose — на томе bot_data, чтобы идущие игры переживали пересоздание контейнера
+GAMES_DIR = os.getenv("MAFIA_GAMES_DIR", str(BASE_DIR / "mafia_games"))
+FLUSH_INTERVAL = 1.0
 
-def _load_db():
-    if os.path.exists(DB_FILE):
-        with open(DB_FILE, 'r', encoding='utf-8') as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                return {}
-    return {}
+GAMES = {}
+_dirty = set()
+_deleted = set()
+_locks = {}
+_flusher_task = None
 
-def _save_db(db):
-    with open(DB_FILE, 'w', encoding='utf-8') as f:
-        json.dump(db, f, indent=4, ensure_ascii=False)
 
-def save_game(game: MafiaGame):
-    db = _load_db()
-    db[str(game.chat_id)] = {
+def _dump(game: MafiaGame) -> dict:
+    return {
         "chat_id": game.chat_id,
         "phase": game.phase,
         "lobby_open": game.lobby_open,
@@ -30,19 +44,17 @@ def save_game(game: MafiaGame):
         "vote_votes": game.vote_votes,
         "doctor_target": game.doctor_target,
         "sheriff_target": game.sheriff_target,
-        "sheriff_action_type": game.sheriff_action_type, 
+        "sheriff_action_type": game.sheriff_action_type,
         "settings": game.settings,
-        "creator_id": game.creator_id
+        "creator_id": game.creator_id,
+        "phase_action": game.phase_action,
+        "phase_deadline": game.phase_deadline,
+        "completed_step": game.completed_step
     }
-    _save_db(db)
 
-def load_game(chat_id: int):
-    db = _load_db()
-    g = db.get(str(chat_id))
-    if not g:
-        return None
 
-    game = MafiaGame(chat_id)
+def _restore(g: dict) -> MafiaGame:
+    game = MafiaGame(int(g["chat_id"]))
     game.phase = g.get("phase", "lobby")
     game.lobby_open = g.get("lobby_open", True)
     game.lobby_message_id = g.get("lobby_message_id")
@@ -55,26 +67,147 @@ def load_game(chat_id: int):
     game.sheriff_action_type = g.get("sheriff_action_type")
     game.settings = g.get("settings", game.settings)
     game.creator_id = g.get("creator_id")
-    
+    game.phase_action = g.get("phase_action")
+    game.phase_deadline = g.get("phase_deadline")
+    game.completed_step = g.get("completed_step")
+
     # Убедимся, что у всех игроков есть флаг last_word_allowed (для совместимости)
     for uid in game.players:
         if 'last_word_allowed' not in game.players[uid]:
-             game.players[uid]['last_word_allowed'] = False
+            game.players[uid]['last_word_allowed'] = False
 
     return game
 
+
+def _game_path(chat_id) -> str:
+    return os.path.join(GAMES_DIR, f"{chat_id}.json")
+
+
+def _write_files(snapshots: dict, deleted: set):
+    """Выполняется в потоке: пишет снимки игр и удаляет файлы завершённых."""
+    os.makedirs(GAMES_DIR, exist_ok=True)
+    for chat_id, data in snapshots.items():
+        path = _game_path(chat_id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    for chat_id in deleted:
+        try:
+            os.remove(_game_path(chat_id))
+        except FileNotFoundError:
+            pass
+
+
+# ---------- API для хендлеров ----------
+
+def game_lock(chat_id: int) -> asyncio.Lock:
+    """Замок игры чата: `async with storage.game_lock(chat_id): ...`"""
+    lock = _locks.get(chat_id)
+    if lock is None:
+        lock = _locks[chat_id] = asyncio.Lock()
+    return lock
+
+
+def save_game(game: MafiaGame):
+    GAMES[game.chat_id] = game
+    _dirty.add(game.chat_id)
+    _deleted.discard(game.chat_id)
+
+
+def load_game(chat_id: int):
+    return GAMES.get(chat_id)
+
+
 def delete_game(chat_id: int):
-    db = _load_db()
-    if str(chat_id) in db:
-        del db[str(chat_id)]
-        _save_db(db)
+    if GAMES.pop(chat_id, None) is not None:
+        _deleted.add(chat_id)
+    _dirty.discard(chat_id)
+    lock = _locks.get(chat_id)
+    if lock is not None and not lock.locked():
+        del _locks[chat_id]
+
 
 def get_all_games():
-    db = _load_db()
-    games = {}
-    for chat_id, data in db.items():
-        # Используем load_game для корректной десериализации
-        game = load_game(int(chat_id))
-        if game:
-            games[int(chat_id)] = game
-    return games
\ No newline at end of file
+    return dict(GAMES)
+
+
+# ---------- Загрузка и фоновая запись ----------
+
+def restore_games():
+    """Поднимает игры с диска в память. Вызывается один раз при старте бота."""
+    GAMES.clear()
+    first_start = not os.path.isdir(GAMES_DIR)
+    if not first_start:
+        for name in os.listdir(GAMES_DIR):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(GAMES_DIR, name), 'r', encoding='utf-8') as f:
+                    game = _restore(json.load(f))
+            except (OSError, ValueError, KeyError) as e:
+                logging.warning(f"Mafia: не удалось прочитать {name}: {e}")
+                continue
+            GAMES[game.chat_id] = game
+
+    # Перенос из старого общего файла — только при первом запуске с новым хранилищем
+    if first_start and os.path.exists(DB_FILE):
+        try:
+            with open(DB_FILE, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            legacy = {}
+        for data in legacy.values():
+            game = _restore(data)
+            if game.chat_id not in GAMES:
+                save_game(game)
+        os.makedirs(GAMES_DIR, exist_ok=True)
+
+    logging.info(f"Mafia: восстановлено игр — {len(GAMES)}")
+    return GAMES
+
+
+async def flush():
+    """Пишет на диск все изменённые с прошлого раза игры."""
+    if not _dirty and not _deleted:
+        return
+    # Снимок делаем в цикле событий, чтобы хендлеры не поменяли игру во время json.dump
+    snapshots = {
+        chat_id: copy.deepcopy(_dump(GAMES[chat_id]))
+        for chat_id in _dirty if chat_id in GAMES
+    }
+    deleted = set(_deleted)
+    _dirty.clear()
+    _deleted.clear()
+    try:
+        await asyncio.to_thread(_write_files, snapshots, deleted)
+    except OSError as e:
+        logging.error(f"Mafia: ошибка записи игр: {e}")
+        # Не теряем изменения: попробуем в следующий раз
+        _dirty.update(chat_id for chat_id in snapshots if chat_id in GAMES)
+        _deleted.update(deleted)
+
+
+async def _flush_loop():
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL)
+        await flush()
+
+
+async def start():
+    global _flusher_task
+    restore_games()
+    if _flusher_task is None or _flusher_task.done():
+        _flusher_task = asyncio.create_task(_flush_loop())
+
+
+async def stop():
+    global _flusher_task
+    if _flusher_task is not None:
+        _flusher_task.cancel()
+        try:
+            await _flusher_task
+        except asyncio.CancelledError:
+            pass
+        _flusher_task = None
+    await flush()
@@ -1,12 +1,12 @@
-import requests
-import os
 import asyncio
 import logging
 
-# Автоматически подтягиваем URL и исправляем его формат
-DJANGO_BASE_URL = os.getenv("DJANGO_API_BASE_URL", "http://backend/api/")
-# Гарантируем правильный адрес: убираем лишние слэши и добавляем нужный в конце
-BOT_AUTH_URL = f"{DJANGO_BASE_URL.rstrip('/')}/bot-auth/"
+import aiohttp
+
+from common import api_client
+
+# Адрес API берётся из DJANGO_API_BASE_URL (см. common/api_client.py)
+BOT_AUTH_PATH = "bot-auth/"
 
 async def verify_volunteer_password(access_type: str, entered_password: str) -> bool:
     payload = {
@@ -17,16 +17,11 @@ async def verify_volunteer_password(access_type: str, entered_password: str) ->
     try:
         # json=payload — это самый важный момент. 
         # Он сам скажет серверу, что это данные для проверки пароля.
-        response = await asyncio.to_thread(
-            requests.post, 
-            BOT_AUTH_URL, 
-            json=payload, 
-            timeout=5
-        )
+        response = await api_client.post(BOT_AUTH_PATH, json=payload, timeout=5)
 
         # Если статус 200 — пароль подошел, всё остальное — отказ
-        return response.status_code == 200
+        return response.status == 200
 
-    except Exception as e:
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
         logging.error(f"Ошибка связи: {e}")
-        return False
\ No newline at end of file
+        return False
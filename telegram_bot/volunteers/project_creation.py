@@ -1,7 +1,3 @@
-import io
-import requests
-import asyncio
-import os
 import re
 import logging
 from datetime import datetime
@@ -10,13 +6,16 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
+from common import api_client
+from common.ref_cache import RefCache
+
 router = Router()
 
-# Конфигурация API
-DJANGO_API_BASE_URL = os.getenv("DJANGO_API_BASE_URL", "http://backend:8000/api/")
+# Пути относительно DJANGO_API_BASE_URL (см. common/api_client.py)
 # Важно: В Django в конце URL должен быть слеш /
-PROJECT_CREATE_ENDPOINT = f"{DJANGO_API_BASE_URL}/projects/create"
-DIRECTIONS_API_URL = f"{DJANGO_API_BASE_URL}/project-directions/"
+PROJECT_CREATE_PATH = "projects/create/"
+DIRECTIONS_API_PATH = "project-directions/"
+DIRECTIONS_TTL = 300
 
 class ProjectCreateSteps(StatesGroup):
     waiting_name = State()
@@ -40,35 +39,43 @@ def is_valid_datetime(date_str):
     except ValueError:
         return False
 
-async def fetch_directions():
+async def _load_directions():
     """
     Получаем список направлений с API.
-    Возвращаем пустой список только если реально ошибка соединения или сервер вернул не JSON.
+    None — ошибка соединения или сервер вернул не JSON (кэш оставит прежний список).
     """
     try:
-        response = await asyncio.to_thread(requests.get, DIRECTIONS_API_URL, timeout=5)
-        logging.info(f"[fetch_directions] URL={DIRECTIONS_API_URL} status={response.status_code}")
+        response = await api_client.get(DIRECTIONS_API_PATH, timeout=5)
+        logging.info(f"[fetch_directions] URL={api_client.url_for(DIRECTIONS_API_PATH)} status={response.status}")
 
         # Проверяем контент
-        content_type = response.headers.get("Content-Type", "")
-        if response.status_code != 200:
-            logging.error(f"[fetch_directions] Неверный статус: {response.status_code} body={response.text[:200]}")
-            return []
+        content_type = response.content_type
+        if response.status != 200:
+            logging.error(f"[fetch_directions] Неверный статус: {response.status} body={response.text[:200]}")
+            return None
 
         if "application/json" not in content_type:
             logging.error(f"[fetch_directions] Ожидался JSON, пришёл {content_type} body={response.text[:200]}")
-            return []
+            return None
 
         data = response.json()
         if not isinstance(data, list):
             logging.error(f"[fetch_directions] Некорректный формат JSON: {data}")
-            return []
+            return None
 
         return data
 
     except Exception as e:
         logging.exception(f"[fetch_directions] Ошибка соединения или парсинга: {e}")
-        return []
+        return None
+
+
+DIRECTIONS_CACHE = RefCache("project_directions", _load_directions, ttl=DIRECTIONS_TTL)
+
+
+async def fetch_directions():
+    """Направления проектов из кэша с TTL; пустой список, если API недоступен и кэша нет."""
+    return await DIRECTIONS_CACHE.get() or []
 
 # --- Логика сбора данных ---
 
@@ -183,12 +190,9 @@ async def process_final_send(message: types.Message, state: FSMContext, bot: Bot
     status_msg = await message.answer("⏳ Сохранение проекта, подождите...")
 
     photo_id = message.photo[-1].file_id
-    file_info = await bot.get_file(photo_id)
-    buffer = io.BytesIO()
-    await bot.download_file(file_info.file_path, destination=buffer)
-    buffer.seek(0)
+    buffer = await api_client.download_telegram_file(bot, photo_id)
     
-    files = {'image': ('project.jpg', buffer.read(), 'image/jpeg')}
+    files = {'image': ('project.jpg', buffer, 'image/jpeg')}
     
     # Ключи должны строго совпадать с полями в Django Serializer
     submit_data = {
@@ -204,23 +208,21 @@ async def process_final_send(message: types.Message, state: FSMContext, bot: Bot
     }
 
     try:
-        response = await asyncio.to_thread(
-            requests.post, PROJECT_CREATE_ENDPOINT, data=submit_data, files=files, timeout=20
-        )
+        response = await api_client.post(PROJECT_CREATE_PATH, fields=submit_data, files=files, timeout=20)
         
-        if response.status_code in [200, 201]:
+        if response.status in [200, 201]:
             await status_msg.edit_text("🚀 <b>Проект успешно создан!</b>", parse_mode="HTML")
             await state.clear()
         else:
             # Проверяем, не HTML ли пришел в ответ
-            content_type = response.headers.get('Content-Type', '')
+            content_type = response.content_type
             
             if 'text/html' in content_type:
-                await status_msg.edit_text(f"❌ <b>Ошибка сервера (HTML):</b> Код {response.status_code}. Проверьте URL эндпоинта.")
+                await status_msg.edit_text(f"❌ <b>Ошибка сервера (HTML):</b> Код {response.status}. Проверьте URL эндпоинта.")
             else:
                 # Если это JSON ошибка от DRF, выводим её аккуратно
                 error_text = response.text[:200]
-                await status_msg.edit_text(f"❌ <b>Ошибка API ({response.status_code}):</b>\n<code>{error_text}</code>", parse_mode="HTML")
+                await status_msg.edit_text(f"❌ <b>Ошибка API ({response.status}):</b>\n<code>{error_text}</code>", parse_mode="HTML")
                 
     except Exception as e:
         # Здесь мы убираем parse_mode="HTML", так как в тексте ошибки 'e' могут быть < >
@@ -1,9 +1,6 @@
 import asyncio
 import logging
-import requests
-import os
 import re
-import io 
 from datetime import datetime, timezone, timedelta 
 
 # Импорт TelegramBadRequest для более точной обработки ошибок при редактировании
@@ -15,6 +12,10 @@ from aiogram.exceptions import TelegramBadRequest
 # ---> ИСПРАВЛЕНИЕ: Импорт StateFilter для корректной работы хендлера /cancel
 from aiogram.filters.state import StateFilter
 from dotenv import load_dotenv
+import aiohttp
+
+from common import api_client
+from common.ref_cache import RefCache
 
 load_dotenv()
 
@@ -36,15 +37,15 @@ def get_current_time_aware():
     return datetime.now(BISHKEK_TIMEZONE)
 
 # --- КОНФИГУРАЦИЯ API И БОТА ---
-# Считаем, что сервис Django в docker-compose назван 'backend'
-DJANGO_API_BASE_URL = os.getenv("DJANGO_API_URL", "http://backend:8000/api/") 
-APPLICATION_ENDPOINT = f"{DJANGO_API_BASE_URL}applications/"
-DIRECTIONS_ENDPOINT = f"{DJANGO_API_BASE_URL}volunteer-directions/"
+# Адрес Django API (DJANGO_API_URL / DJANGO_API_BASE_URL) и сессия — в common/api_client.py
+APPLICATION_PATH = "applications/"
+DIRECTIONS_PATH = "volunteer-directions/"
 
 REQUEST_TIMEOUT = 10 
+# Направления перечитываются раз в 5 минут (и сразу — по сигналу backend)
+DIRECTIONS_TTL = 300
 
 application_router = Router()
-DIRECTIONS_CACHE = {} 
 
 # --- КЛАВИАТУРЫ ---
 YES_NO_KB = InlineKeyboardMarkup(inline_keyboard=[
@@ -110,24 +111,27 @@ class ApplicationSteps(StatesGroup):
 
 
 # --- ФУНКЦИИ ---
-async def fetch_directions():
-    """Загружает список направлений из Django API (кэширование)."""
-    global DIRECTIONS_CACHE
-    if DIRECTIONS_CACHE:
-        return DIRECTIONS_CACHE
-        
+async def _load_directions():
+    """Загружает {id: name} направлений из Django API. None — ошибка (кэш оставит старое)."""
     try:
-        response = await asyncio.to_thread(
-            requests.get, DIRECTIONS_ENDPOINT, timeout=REQUEST_TIMEOUT
-        )
-        response.raise_for_status()
-        DIRECTIONS_CACHE = {
+        response = await api_client.get(DIRECTIONS_PATH, timeout=REQUEST_TIMEOUT)
+        if response.status != 200:
+            logging.error(f"Не удалось загрузить направления из API ({DIRECTIONS_PATH}): код {response.status}")
+            return None
+        return {
             d['id']: d['name'] for d in response.json()
         }
-        return DIRECTIONS_CACHE
-    except requests.RequestException as e:
-        logging.error(f"Не удалось загрузить направления из API ({DIRECTIONS_ENDPOINT}): {e}")
-        return {}
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        logging.error(f"Не удалось загрузить направления из API ({DIRECTIONS_PATH}): {e}")
+        return None
+
+
+DIRECTIONS_CACHE = RefCache("volunteer_directions", _load_directions, ttl=DIRECTIONS_TTL)
+
+
+async def fetch_directions():
+    """Направления из кэша с TTL; пустой словарь, если API недоступен и кэша нет."""
+    return await DIRECTIONS_CACHE.get() or {}
 
 
 async def submit_application_to_django(bot, data: dict):
@@ -159,32 +163,17 @@ async def submit_application_to_django(bot, data: dict):
         "ready_travel": data.get('ready_travel', False),
         "feedback": data.get('feedback'),
         
-        # Requests корректно обрабатывает список в 'data' даже при наличии 'files'
+        # Список уходит повторяющимися полями multipart (directions=1&directions=2)
         "directions": directions_ids, 
     }
 
     files = {}
     
-    # Обработка фото (ИСПРАВЛЕНО: Добавлен seek(0))
+    # Обработка фото: буфер из Telegram уходит в multipart кусками, без копии в bytes
     if photo_file_id:
         try:
-            # Получаем путь файла на сервере Telegram
-            file_info = await bot.get_file(photo_file_id)
-            file_path = file_info.file_path
-            
-            # Создаем буфер в памяти
-            buffer = io.BytesIO()
-            # Скачиваем файл в память (BytesIO)
-            await bot.download_file(file_path, destination=buffer)
-            
-            # !!! ВАЖНО: Возвращаем курсор в начало файла перед чтением !!!
-            buffer.seek(0)
-            
-            # Получаем байты
-            photo_bytes = buffer.read()
-            
-            # Собираем объект для requests.post. 
-            files['photo'] = ('volunteer_photo.jpg', photo_bytes, 'image/jpeg')
+            buffer = await api_client.download_telegram_file(bot, photo_file_id)
+            files['photo'] = ('volunteer_photo.jpg', buffer, 'image/jpeg')
             logging.info("Фото успешно скачано и добавлено для отправки.") 
             
         except Exception as e:
@@ -194,24 +183,23 @@ async def submit_application_to_django(bot, data: dict):
 
     try:
         # Отправка данных и файла
-        response = await asyncio.to_thread(
-            requests.post, 
-            APPLICATION_ENDPOINT, 
-            data=submit_data, 
-            files=files if files else None, # Передаем None, если файлов нет
+        response = await api_client.post(
+            APPLICATION_PATH,
+            fields=submit_data,
+            files=files,
             timeout=REQUEST_TIMEOUT
         )
         
         # Проверка статуса
-        if response.status_code in [200, 201]:
+        if response.status in [200, 201]:
             logging.info("Заявка успешно создана.")
             return True
         else:
             # Выводим тело ответа ошибки
-            logging.error(f"Ошибка API (Код {response.status_code}): {response.text}")
+            logging.error(f"Ошибка API (Код {response.status}): {response.text}")
             return False
             
-    except requests.exceptions.RequestException as e:
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
         logging.error(f"Ошибка API при отправке заявки: {e}")
         return False
 
@@ -456,7 +444,8 @@ async def process_directions_selection(call: types.CallbackQuery, state: FSMCont
     data = await state.get_data()
     selected_ids = data.get('selected_directions_ids', [])
     
-    direction_name = DIRECTIONS_CACHE.get(dir_id, "Неизвестное направление")
+    directions = await fetch_directions()
+    direction_name = directions.get(dir_id, "Неизвестное направление")
 
     if dir_id in selected_ids:
         selected_ids.remove(dir_id)
@@ -474,7 +463,7 @@ async def process_directions_selection(call: types.CallbackQuery, state: FSMCont
     current_names = []
     
     # Повторное создание клавиатуры с учетом текущего выбора
-    for pk, name in DIRECTIONS_CACHE.items():
+    for pk, name in directions.items():
         if pk in selected_ids:
             # Выбранное направление помечаем
             new_buttons.append([InlineKeyboardButton(text=f"[{name}]", callback_data=f"select_dir_{pk}")])
@@ -511,7 +500,7 @@ async def process_directions_finish(call: types.CallbackQuery, state: FSMContext
     data = await state.get_data()
     selected_ids = data.get('selected_directions_ids', [])
     
-    if not selected_ids and DIRECTIONS_CACHE:
+    if not selected_ids and await fetch_directions():
         await call.answer("Обязательно. Пожалуйста, выберите хотя бы одно направление.", show_alert=True) 
         return
         
@@ -1,11 +1,13 @@
 from django.contrib import admin
 from django.db.models import Q, Count
 from django.utils.html import format_html
+from interact.images import get_rendition_url
 from django.urls import reverse
 from .models import (
     ChatSession, ChatMessage, Volunteer, VolunteerApplication, VolunteerArchive, 
     ActivityTask, ActivitySubmission, BotAccessConfig,
-    Attendance, YellowCard, AppSettings, MiniTeam, MiniTeamMembership, SponsorTask
+    Attendance, YellowCard, AppSettings, MiniTeam, MiniTeamMembership, SponsorTask,
+    Season, SeasonVolunteerStat
 )
 
 # --- НАСТРОЙКИ ШАПКИ АДМИНКИ ---
@@ -128,12 +130,12 @@ class VolunteerAdmin(admin.ModelAdmin):
 
     def get_avatar(self, obj):
         if obj.image:
-            return format_html('<img src="{}" style="width: 35px; height: 35px; border-radius: 50%; object-fit: cover;" />', obj.image.url)
+            return format_html('<img src="{}" style="width: 35px; height: 35px; border-radius: 50%; object-fit: cover;" />', get_rendition_url(obj.image, 'thumb'))
         return "👤"
 
     def get_avatar_large(self, obj):
         if obj.image:
-            return format_html('<img src="{}" style="max-height: 200px; border-radius: 10px;" />', obj.image.url)
+            return format_html('<img src="{}" style="max-height: 200px; border-radius: 10px;" />', get_rendition_url(obj.image, 'small'))
         return "Нет фото"
 
     def name_display(self, obj):
@@ -256,6 +258,34 @@ class YellowCardAdmin(admin.ModelAdmin):
     autocomplete_fields = ['volunteer', 'issued_by']
 
 
+class SeasonVolunteerStatInline(admin.TabularInline):
+    model = SeasonVolunteerStat
+    extra = 0
+    fields = ('volunteer_name', 'directions', 'points', 'submissions_approved',
+              'attendance_present', 'attendance_late', 'attendance_excused', 'attendance_absent', 'yellow_cards')
+    readonly_fields = fields
+    can_delete = False
+    classes = ('collapse',)
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Season)
+class SeasonAdmin(admin.ModelAdmin):
+    list_display = ('title', 'started_at', 'ended_at')
+    readonly_fields = ('started_at', 'ended_at')
+    inlines = [SeasonVolunteerStatInline]
+
+
+@admin.register(SeasonVolunteerStat)
+class SeasonVolunteerStatAdmin(admin.ModelAdmin):
+    list_display = ('volunteer_name', 'season', 'points', 'submissions_approved', 'yellow_cards')
+    list_filter = ('season',)
+    search_fields = ('volunteer_name',)
+    raw_id_fields = ('volunteer',)
+
+
 @admin.register(VolunteerApplication)
 class VolunteerApplicationAdmin(admin.ModelAdmin):
     list_display = ('full_name', 'direction', 'status', 'created_at')
@@ -0,0 +1,46 @@
+"""
+Общая часть ответа /api/discovery/ (справочник направлений и каталог заданий).
+
+Она одинакова для всех волонтёров и меняется редко, поэтому собирается один раз
+и лежит в общем кэше под ключом с версией. Сигналы на ActivityTask, Command и
+VolunteerDirection (см. users/models.py) меняют версию после коммита — старый
+блоб просто перестаёт читаться и истекает сам.
+"""
+from interact.cache import bump_cache_version, get_cache_version, shared_cache
+
+DISCOVERY_VERSION_KEY = "users:discovery:version"
+DISCOVERY_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _catalog_cache_key(version):
+    return f"users:discovery:catalog:{version}"
+
+
+def bump_discovery_version():
+    bump_cache_version(DISCOVERY_VERSION_KEY)
+
+
+def get_discovery_version():
+    return get_cache_version(DISCOVERY_VERSION_KEY)
+
+
+def build_discovery_catalog():
+    from directions.models import VolunteerDirection
+    from .models import ActivityTask
+    from .serializers import ActivityTaskSerializer, VolunteerDirectionSerializer
+
+    # select_related('command'): command_name и direction_id без запроса на каждое задание
+    tasks = ActivityTask.objects.select_related('command')
+    return {
+        "all_directions": VolunteerDirectionSerializer(VolunteerDirection.objects.all(), many=True).data,
+        "available_tasks": ActivityTaskSerializer(tasks, many=True).data,
+    }
+
+
+def get_discovery_catalog():
+    key = _catalog_cache_key(get_discovery_version())
+    data = shared_cache.get(key)
+    if data is None:
+        data = build_discovery_catalog()
+        shared_cache.set(key, data, DISCOVERY_CACHE_TIMEOUT)
+    return data
@@ -0,0 +1,172 @@
+"""
+Автораспределение волонтёров по направлениям (Пристав баз).
+
+Задача — назначение с ограничением вместимости: каждый волонтёр попадает ровно
+в одно направление, в направлении не больше capacity человек, суммарная
+«стоимость» (место направления в списке желаний) минимальна.
+
+Решаем как min-cost flow методом последовательных кратчайших путей (как в
+венгерском алгоритме): волонтёры добавляются по одному, и каждый раз мы ищем
+кратчайшую цепочку «новый волонтёр → направление → пересадка уже назначенного
+волонтёра → ... → направление со свободным местом». Направлений мало (≈8),
+поэтому граф пересадок сжат до направлений, а лучшего кандидата на пересадку
+между парой направлений держим в куче — одно добавление стоит O(D³ + D·log N).
+"""
+import heapq
+import random
+
+MAX_PREFERENCES = 4
+# Стоимость направления, которого нет в списке желаний волонтёра.
+# При такой шкале минимальная стоимость = максимальный score (см. _summarize)
+UNRANKED_COST = MAX_PREFERENCES
+
+
+def load_distribution_input():
+    """Все данные для распределения тремя запросами, без N+1 по preferred_directions."""
+    from directions.models import VolunteerDirection
+    from .models import Volunteer
+
+    volunteers = list(
+        Volunteer.objects.filter(is_active=True, role='volunteer')
+        .order_by('id')
+        .values_list('id', 'name', 'login')
+    )
+    direction_ids = list(VolunteerDirection.objects.order_by('id').values_list('id', flat=True))
+
+    # Порядок выбора = порядок добавления в M2M (id строки промежуточной таблицы)
+    through = Volunteer.preferred_directions.through
+    preferences = {}
+    rows = (
+        through.objects.filter(volunteer__is_active=True, volunteer__role='volunteer')
+        .order_by('id')
+        .values_list('volunteer_id', 'volunteerdirection_id')
+    )
+    for vol_id, dir_id in rows:
+        preferences.setdefault(vol_id, []).append(dir_id)
+
+    return volunteers, direction_ids, preferences
+
+
+def default_capacity(volunteer_count, direction_count):
+    return (volunteer_count // direction_count) + 1
+
+
+def solve_distribution(volunteer_ids, direction_ids, preferences, capacity=None, seed=None):
+    """
+    volunteer_ids — список id, direction_ids — список id направлений,
+    preferences — {volunteer_id: [dir_id по убыванию желания]}.
+    Возвращает dict: mapping {vol_id: dir_id}, counts, score, rank_histogram.
+    При одинаковом seed результат детерминирован.
+    """
+    dir_count = len(direction_ids)
+    if not dir_count:
+        raise ValueError("Нет направлений")
+    if capacity is None:
+        capacity = default_capacity(len(volunteer_ids), dir_count)
+    if capacity * dir_count < len(volunteer_ids):
+        raise ValueError("Суммарной вместимости направлений не хватает на всех волонтёров")
+
+    dir_index = {dir_id: i for i, dir_id in enumerate(direction_ids)}
+
+    # Компактная матрица стоимостей: costs[v][d] — место d в списке желаний v
+    costs = []
+    for vol_id in volunteer_ids:
+        row = [UNRANKED_COST] * dir_count
+        for rank, dir_id in enumerate(preferences.get(vol_id, [])[:MAX_PREFERENCES]):
+            d = dir_index.get(dir_id)
+            if d is not None and row[d] == UNRANKED_COST:
+                row[d] = rank
+        costs.append(row)
+
+    order = list(range(len(volunteer_ids)))
+    random.Random(seed).shuffle(order)
+
+    assigned = [-1] * len(volunteer_ids)
+    load = [0] * dir_count
+    # moves[a][b] — куча (выигрыш от пересадки a→b, номер волонтёра) для волонтёров из a
+    moves = [[[] for _ in range(dir_count)] for _ in range(dir_count)]
+
+    def place(v, d):
+        assigned[v] = d
+        row = costs[v]
+        base = row[d]
+        for b in range(dir_count):
+            if b != d:
+                heapq.heappush(moves[d][b], (row[b] - base, v))
+
+    def best_move(a, b):
+        heap = moves[a][b]
+        while heap and assigned[heap[0][1]] != a:
+            heapq.heappop(heap)  # волонтёр уже пересажен — запись устарела
+        return heap[0] if heap else None
+
+    for v in order:
+        row = costs[v]
+        dist = row[:]
+        parent = [None] * dir_count
+
+        # Беллман-Форд по графу направлений; отрицательных циклов нет,
+        # т.к. текущее частичное назначение уже оптимально
+        for _ in range(dir_count):
+            changed = False
+            for a in range(dir_count):
+                da = dist[a]
+                for b in range(dir_count):
+                    if a == b:
+                        continue
+                    move = best_move(a, b)
+                    if move is not None and da + move[0] < dist[b]:
+                        dist[b] = da + move[0]
+                        parent[b] = (a, move[1])
+                        changed = True
+            if not changed:
+                break
+
+        # При равной стоимости — в самое пустое направление (как раньше делал жадный проход)
+        target = min(
+            (d for d in range(dir_count) if load[d] < capacity),
+            key=lambda d: (dist[d], load[d], d),
+        )
+        load[target] += 1
+
+        # Разворачиваем цепочку пересадок от свободного направления к новому волонтёру
+        d = target
+        while parent[d] is not None:
+            prev, moved = parent[d]
+            place(moved, d)
+            d = prev
+        place(v, d)
+
+    return _summarize(volunteer_ids, direction_ids, preferences, costs, assigned)
+
+
+def _summarize(volunteer_ids, direction_ids, preferences, costs, assigned):
+    mapping = {}
+    counts = {dir_id: 0 for dir_id in direction_ids}
+    histogram = {str(rank + 1): 0 for rank in range(MAX_PREFERENCES)}
+    histogram["other"] = 0
+    histogram["no_preferences"] = 0
+    score = 0
+
+    for v, vol_id in enumerate(volunteer_ids):
+        dir_id = direction_ids[assigned[v]]
+        mapping[vol_id] = dir_id
+        counts[dir_id] += 1
+
+        rank = costs[v][assigned[v]]
+        if not preferences.get(vol_id):
+            histogram["no_preferences"] += 1
+        elif rank < MAX_PREFERENCES:
+            histogram[str(rank + 1)] += 1
+            # 1-й выбор = 4 балла удовлетворённости, 4-й = 1
+            score += MAX_PREFERENCES - rank
+        else:
+            histogram["other"] += 1
+
+    return {
+        "mapping": mapping,
+        "counts": counts,
+        "score": score,
+        "max_score": MAX_PREFERENCES * sum(1 for vol_id in volunteer_ids if preferences.get(vol_id)),
+        "rank_histogram": histogram,
+    }
@@ -0,0 +1,45 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.distribution import MAX_PREFERENCES, solve_distribution
+
+
+class Command(BaseCommand):
+    help = "Бенчмарк автораспределения на синтетических данных (без БД)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--volunteers", type=int, default=2000)
+        parser.add_argument("--directions", type=int, default=8)
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        volunteer_ids = list(range(1, options["volunteers"] + 1))
+        direction_ids = list(range(1, options["directions"] + 1))
+
+        # Популярность направлений неравномерная, как в реальном наборе
+        weights = [1 / (i + 1) for i in range(len(direction_ids))]
+        preferences = {}
+        for vol_id in volunteer_ids:
+            prefs = []
+            while len(prefs) < min(MAX_PREFERENCES, len(direction_ids)):
+                dir_id = rng.choices(direction_ids, weights)[0]
+                if dir_id not in prefs:
+                    prefs.append(dir_id)
+            preferences[vol_id] = prefs
+
+        timings = []
+        for run in range(options["runs"]):
+            started = time.perf_counter()
+            result = solve_distribution(volunteer_ids, direction_ids, preferences, seed=options["seed"])
+            timings.append(time.perf_counter() - started)
+
+        self.stdout.write(
+            f"{len(volunteer_ids)} волонтёров × {len(direction_ids)} направлений, прогонов: {len(timings)}"
+        )
+        self.stdout.write(f"лучшее: {min(timings) * 1000:.1f} мс, среднее: {sum(timings) / len(timings) * 1000:.1f} мс")
+        self.stdout.write(f"score: {result['score']} из {result['max_score']}")
+        self.stdout.write(f"по местам в списке: {result['rank_histogram']}")
@@ -0,0 +1,54 @@
+# Generated by Django 5.1.4 on 2026-10-19 17:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_volunteer_point_goal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Season',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=100, verbose_name='Название')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Начало')),
+                ('ended_at', models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Завершён')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Сезон',
+                'verbose_name_plural': 'Сезоны',
+                'ordering': ['-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SeasonVolunteerStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('volunteer_name', models.CharField(blank=True, max_length=255, verbose_name='ФИО')),
+                ('directions', models.CharField(blank=True, max_length=255, verbose_name='Направления')),
+                ('points', models.DecimalField(decimal_places=1, default=0, max_digits=10, verbose_name='Баллы')),
+                ('submissions_approved', models.PositiveIntegerField(default=0, verbose_name='Принято заданий')),
+                ('tasks', models.JSONField(blank=True, default=dict, verbose_name='Задания')),
+                ('attendance_present', models.PositiveIntegerField(default=0, verbose_name='П')),
+                ('attendance_late', models.PositiveIntegerField(default=0, verbose_name='Оп')),
+                ('attendance_excused', models.PositiveIntegerField(default=0, verbose_name='УП')),
+                ('attendance_absent', models.PositiveIntegerField(default=0, verbose_name='Н')),
+                ('yellow_cards', models.PositiveIntegerField(default=0, verbose_name='Желтые карточки')),
+                ('season', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='volunteer_stats', to='users.season', verbose_name='Сезон')),
+                ('volunteer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='season_stats', to=settings.AUTH_USER_MODEL, verbose_name='Волонтер')),
+            ],
+            options={
+                'verbose_name': 'Итог сезона',
+                'verbose_name_plural': 'Итоги сезонов',
+                'ordering': ['-points'],
+                'unique_together': {('season', 'volunteer')},
+            },
+        ),
+    ]
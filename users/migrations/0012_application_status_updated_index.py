@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-19 17:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_seasons'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='volunteerapplication',
+            index=models.Index(fields=['status', 'updated_at'], name='users_app_status_upd_idx'),
+        ),
+    ]
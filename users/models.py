@@ -1,6 +1,9 @@
+import copy
 import random
 import string
-from django.db import models
+import threading
+import time
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.db.models.signals import post_save, post_delete
@@ -10,6 +13,7 @@ from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseU
 from django.db.models.functions import Coalesce
 
 from directions.models import VolunteerDirection
+from interact.cache import bump_cache_version, get_cache_version
 
 
 # --- МЕНЕДЖЕР ПОЛЬЗОВАТЕЛЕЙ ---
@@ -34,6 +38,16 @@ class VolunteerManager(BaseUserManager):
         extra_fields.setdefault('is_superuser', True)
         return self.create_user(login, password, **extra_fields)
 
+# Настройки читаются почти в каждом запросе кабинета, поэтому держим их в памяти процесса.
+# Актуальность сверяем с версией в общем кэше (не чаще раза в секунду на воркер),
+# а save() меняет версию — переключатель из админки доходит до всех воркеров gunicorn за ~1 сек.
+APP_SETTINGS_VERSION_KEY = "users:app_settings:version"
+APP_SETTINGS_CHECK_INTERVAL = 1.0
+
+_app_settings_local = {"obj": None, "version": None, "checked_at": 0.0}
+_app_settings_lock = threading.RLock()
+
+
 class AppSettings(models.Model):
     is_direction_selection_open = models.BooleanField("Открыт выбор направлений", default=False)
     is_registration_open = models.BooleanField("Открыта регистрация", default=True) 
@@ -46,12 +60,35 @@ class AppSettings(models.Model):
     def save(self, *args, **kwargs):
         if not self.pk and AppSettings.objects.exists():
             raise ValidationError('Может быть только одна запись с настройками')
-        return super().save(*args, **kwargs)
+        result = super().save(*args, **kwargs)
+        transaction.on_commit(AppSettings.bump_version)
+        return result
+
+    @classmethod
+    def bump_version(cls):
+        bump_cache_version(APP_SETTINGS_VERSION_KEY)
+        with _app_settings_lock:
+            _app_settings_local["checked_at"] = 0.0
+
+    @classmethod
+    def get_version(cls):
+        return get_cache_version(APP_SETTINGS_VERSION_KEY)
 
     @classmethod
     def get_settings(cls):
-        obj, created = cls.objects.get_or_create(pk=1)
-        return obj
+        with _app_settings_lock:
+            now = time.monotonic()
+            local = _app_settings_local
+
+            if local["obj"] is None or now - local["checked_at"] >= APP_SETTINGS_CHECK_INTERVAL:
+                version = cls.get_version()
+                if local["obj"] is None or version != local["version"]:
+                    local["obj"], _ = cls.objects.get_or_create(pk=1)
+                    local["version"] = version
+                local["checked_at"] = now
+
+            # Копия — чтобы правки в одном запросе (до save) не протекали в другие
+            return copy.copy(local["obj"])
 
 # --- МОДЕЛЬ ВОЛОНТЕРА (ПОЛЬЗОВАТЕЛЬ) ---
 class Volunteer(AbstractBaseUser, PermissionsMixin):
@@ -296,6 +333,10 @@ class VolunteerApplication(models.Model):
     class Meta:
         verbose_name = "Анкета кандидата"
         verbose_name_plural = "Анкеты кандидатов"
+        indexes = [
+            # Канбан набора: колонки по статусу и дельта-синхронизация по updated_at
+            models.Index(fields=['status', 'updated_at'], name='users_app_status_upd_idx'),
+        ]
 
 class VolunteerArchive(models.Model):
     full_name = models.CharField("ФИО", max_length=200)
@@ -347,7 +388,56 @@ class YellowCard(models.Model):
 
     def __str__(self):
         return f"Yellow Card for {self.volunteer.name}"
-    
+
+
+# --- СЕЗОНЫ (архив итогов вместо безвозвратного сброса) ---
+class Season(models.Model):
+    title = models.CharField("Название", max_length=100)
+    # null — первый сезон, начался до появления архива
+    started_at = models.DateTimeField("Начало", null=True, blank=True)
+    ended_at = models.DateTimeField("Завершён", null=True, blank=True, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Сезон"
+        verbose_name_plural = "Сезоны"
+        ordering = ['-id']
+
+    def __str__(self):
+        return self.title
+
+
+class SeasonVolunteerStat(models.Model):
+    """Компактный итог волонтёра за закрытый сезон: одна строка вместо всех заявок и отметок."""
+    season = models.ForeignKey(Season, on_delete=models.CASCADE, related_name='volunteer_stats', verbose_name="Сезон")
+    volunteer = models.ForeignKey(
+        Volunteer, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='season_stats', verbose_name="Волонтер"
+    )
+    # Имя и направления копируем: отчёт не должен меняться вместе с профилем
+    volunteer_name = models.CharField("ФИО", max_length=255, blank=True)
+    directions = models.CharField("Направления", max_length=255, blank=True)
+
+    points = models.DecimalField("Баллы", max_digits=10, decimal_places=1, default=0)
+    submissions_approved = models.PositiveIntegerField("Принято заданий", default=0)
+    # {название задания: {"count": n, "points": "12.5"}}
+    tasks = models.JSONField("Задания", default=dict, blank=True)
+
+    attendance_present = models.PositiveIntegerField("П", default=0)
+    attendance_late = models.PositiveIntegerField("Оп", default=0)
+    attendance_excused = models.PositiveIntegerField("УП", default=0)
+    attendance_absent = models.PositiveIntegerField("Н", default=0)
+    yellow_cards = models.PositiveIntegerField("Желтые карточки", default=0)
+
+    class Meta:
+        verbose_name = "Итог сезона"
+        verbose_name_plural = "Итоги сезонов"
+        unique_together = ('season', 'volunteer')
+        ordering = ['-points']
+
+    def __str__(self):
+        return f"{self.volunteer_name} — {self.season}"
+
 class ChatSession(models.Model):
     session_id = models.CharField(max_length=100, unique=True, verbose_name="ID Сессии")
     created_at = models.DateTimeField(default=timezone.now, verbose_name="Создано")
@@ -478,3 +568,14 @@ def recalc_volunteer_points(volunteer_id):
             
     # Принудительно обновляем счет волонтера
     Volunteer.objects.filter(id=volunteer_id).update(point=total_points)
+
+
+# --- СБРОС КЭША /api/discovery/ ---
+from .discovery import bump_discovery_version
+
+
+@receiver([post_save, post_delete], sender=ActivityTask)
+@receiver([post_save, post_delete], sender='commands.Command')
+@receiver([post_save, post_delete], sender='directions.VolunteerDirection')
+def invalidate_discovery_catalog(sender, **kwargs):
+    transaction.on_commit(bump_discovery_version)
@@ -0,0 +1,121 @@
+"""
+Закрытие сезона (Пристав баз, действие distribute_and_reset).
+
+Перед сбросом прогресса итоги каждого волонтёра сворачиваются в одну строку
+SeasonVolunteerStat: баллы, разбивка по заданиям, сводка посещаемости и
+жёлтые карточки за сезон. Всё считается агрегирующими запросами (GROUP BY),
+без обхода заявок в Python, и пишется одним bulk_create. После этого живые
+таблицы содержат только текущий сезон, а прошлые доступны через /api/seasons/.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import (
+    ActivitySubmission, Attendance, Season, SeasonVolunteerStat, Volunteer, YellowCard
+)
+
+ATTENDANCE_FIELDS = {
+    'present': 'attendance_present',
+    'late': 'attendance_late',
+    'excused': 'attendance_excused',
+    'absent': 'attendance_absent',
+}
+
+
+def _submission_points():
+    # Та же формула, что в recalc_volunteer_points: ручные баллы или баллы задания × количество
+    return Coalesce(
+        'points_awarded',
+        ExpressionWrapper(
+            F('task__points') * Coalesce('quantity', Value(1)),
+            output_field=DecimalField(max_digits=10, decimal_places=1),
+        ),
+        output_field=DecimalField(max_digits=10, decimal_places=1),
+    )
+
+
+def build_season_stats(season, volunteer_ids, until):
+    """Строки SeasonVolunteerStat (не сохранённые) для волонтёров за период сезона."""
+    volunteer_ids = list(volunteer_ids)
+    stats = {}
+    for vol_id, name, login, point in (
+        Volunteer.objects.filter(id__in=volunteer_ids).values_list('id', 'name', 'login', 'point')
+    ):
+        stats[vol_id] = SeasonVolunteerStat(
+            season=season, volunteer_id=vol_id, volunteer_name=name or login or '', points=point or 0
+        )
+
+    directions = {}
+    for vol_id, dir_name in (
+        Volunteer.direction.through.objects.filter(volunteer_id__in=stats)
+        .order_by('id').values_list('volunteer_id', 'volunteerdirection__name')
+    ):
+        directions.setdefault(vol_id, []).append(dir_name)
+    for vol_id, names in directions.items():
+        stats[vol_id].directions = ", ".join(names)[:255]
+
+    task_rows = (
+        ActivitySubmission.objects.filter(volunteer_id__in=stats, status='approved')
+        .values('volunteer_id', 'task__title')
+        .annotate(count=Count('id'), total=Sum(_submission_points()))
+        .order_by()
+    )
+    for row in task_rows:
+        stat = stats[row['volunteer_id']]
+        stat.submissions_approved += row['count']
+        stat.tasks[row['task__title']] = {
+            "count": row['count'],
+            "points": str(row['total'] or Decimal('0')),
+        }
+
+    # Посещаемость и карточки живут дольше сезона, поэтому берём только его период.
+    # Даты в них локальные (Asia/Bishkek), а границы сезона — aware UTC: сравниваем по локальной дате.
+    # Интервал полуоткрытый [начало, конец): следующий сезон начинается в тот же момент сброса,
+    # и день сброса относится только к нему, а не к обоим
+    until_date = timezone.localdate(until)
+    attendance = Attendance.objects.filter(volunteer_id__in=stats, date__lt=until_date)
+    cards = YellowCard.objects.filter(volunteer_id__in=stats, date_issued__lt=until_date)
+    if season.started_at:
+        started_date = timezone.localtime(season.started_at).date()
+        attendance = attendance.filter(date__gte=started_date)
+        cards = cards.filter(date_issued__gte=started_date)
+
+    for row in attendance.values('volunteer_id', 'status').annotate(count=Count('id')).order_by():
+        field = ATTENDANCE_FIELDS.get(row['status'])
+        if field:
+            setattr(stats[row['volunteer_id']], field, row['count'])
+
+    for row in cards.values('volunteer_id').annotate(count=Count('id')).order_by():
+        stats[row['volunteer_id']].yellow_cards = row['count']
+
+    return list(stats.values())
+
+
+def close_season(volunteer_ids, next_title=None):
+    """
+    Архивирует итоги текущего сезона для volunteer_ids, закрывает его и открывает следующий.
+    Сам сброс заявок и баллов делает вызывающий код (apply_distribution) — после архивации.
+    Возвращает закрытый сезон.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        # Блокируем открытый сезон: два одновременных сброса не заархивируют его дважды
+        season = Season.objects.select_for_update().filter(ended_at__isnull=True).order_by('-id').first()
+        if season is None:
+            season = Season.objects.create(title=f"Сезон до {timezone.localdate():%Y-%m}")
+
+        SeasonVolunteerStat.objects.bulk_create(
+            build_season_stats(season, volunteer_ids, now), batch_size=500, ignore_conflicts=True
+        )
+
+        season.ended_at = now
+        season.save(update_fields=['ended_at'])
+        Season.objects.create(
+            title=next_title or f"Сезон {timezone.localdate():%Y-%m}",
+            started_at=now,
+        )
+    return season
@@ -1,9 +1,13 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
-from .models import Attendance, Volunteer, VolunteerApplication, ActivityTask, ActivitySubmission
+from .models import (
+    Attendance, Volunteer, VolunteerApplication, ActivityTask, ActivitySubmission,
+    Season, SeasonVolunteerStat,
+)
 from directions.models import VolunteerDirection
 from commands.models import Command
 from commands.serializers import QuestionSerializer
+from interact.images import RenditionsField
 
 # --- Регистрация ---
 class VolunteerRegisterSerializer(serializers.ModelSerializer):
@@ -31,6 +35,7 @@ class CommandSerializer(serializers.ModelSerializer):
 
 class VolunteerSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField(read_only=True)
+    image_renditions = RenditionsField(source='image', sizes=('thumb', 'small'))
     direction = VolunteerDirectionSerializer(many=True, read_only=True)
     commands = CommandSerializer(source='volunteer_commands', many=True, read_only=True)
     role_display = serializers.CharField(source='get_role_display', read_only=True)
@@ -44,7 +49,7 @@ class VolunteerSerializer(serializers.ModelSerializer):
         model = Volunteer
         fields = [
             'id', 'login', 'name', 'phone_number', 'email', 
-            'image', 'image_url', 
+            'image', 'image_url', 'image_renditions',
             'role', 'role_display', 'direction', 'commands', 
             'point', 
             'yellow_card_count', # 🔥 2. Обязательно добавляем в список полей
@@ -83,8 +88,9 @@ class ActivityTaskSerializer(serializers.ModelSerializer):
         ]
 
     def get_direction_id(self, obj):
-        if obj.command and obj.command.direction:
-            return obj.command.direction.id
+        # direction_id берём с команды, не загружая само направление
+        if obj.command:
+            return obj.command.direction_id
         return None
 
 class ActivitySubmissionSerializer(serializers.ModelSerializer):
@@ -183,6 +189,22 @@ class BulkAttendanceSerializer(serializers.Serializer):
         child=serializers.DictField()
     )
 
+class SeasonSerializer(serializers.ModelSerializer):
+    volunteers_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Season
+        fields = ['id', 'title', 'started_at', 'ended_at', 'volunteers_count']
+
+class SeasonVolunteerStatSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SeasonVolunteerStat
+        fields = [
+            'id', 'volunteer', 'volunteer_name', 'directions', 'points', 'submissions_approved',
+            'tasks', 'attendance_present', 'attendance_late', 'attendance_excused',
+            'attendance_absent', 'yellow_cards',
+        ]
+
 
 from rest_framework import serializers
 from .models import MiniTeam, MiniTeamMembership, SponsorTask
@@ -1,3 +1,230 @@
-from django.test import TestCase
+import itertools
+import random
+from datetime import date, datetime, timedelta, timezone as dt_timezone
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from directions.models import VolunteerDirection
+from users.models import Attendance, Season, SeasonVolunteerStat, Volunteer, VolunteerApplication, YellowCard
+from users.distribution import MAX_PREFERENCES, UNRANKED_COST, solve_distribution
+from users.seasons import build_season_stats
+
+
+def local_dt(*args):
+    # Asia/Bishkek (UTC+6): около полуночи локальная дата и дата в UTC расходятся.
+    # Возвращаем в UTC, как timezone.now() и значения из базы
+    return timezone.make_aware(datetime(*args)).astimezone(dt_timezone.utc)
+
+
+class SeasonBoundaryTests(TestCase):
+    def setUp(self):
+        self.volunteer = Volunteer.objects.create_user("volunteer", "pw", name="Айбек Асанов")
+        self.direction = VolunteerDirection.objects.create(name="Экология")
+        # 1 марта 00:30 по Бишкеку — это ещё 28 февраля в UTC
+        self.season = Season.objects.create(title="Весна", started_at=local_dt(2026, 3, 1, 0, 30))
+
+    def _attend(self, day, status="present"):
+        Attendance.objects.create(volunteer=self.volunteer, direction=self.direction, date=day, status=status)
+
+    def _card(self, day):
+        card = YellowCard.objects.create(volunteer=self.volunteer)
+        # auto_now_add не даёт задать дату при создании
+        YellowCard.objects.filter(pk=card.pk).update(date_issued=day)
+
+    def _stat(self, until):
+        stats = build_season_stats(self.season, [self.volunteer.id], until)
+        self.assertEqual(len(stats), 1)
+        return stats[0]
+
+    def test_start_uses_local_date(self):
+        self._attend(date(2026, 2, 28), status="absent")  # прошлый сезон
+        self._attend(date(2026, 3, 1))
+        self._card(date(2026, 2, 28))
+
+        stat = self._stat(until=local_dt(2026, 5, 31, 12, 0))
+
+        self.assertEqual(stat.attendance_present, 1)
+        self.assertEqual(stat.attendance_absent, 0)
+        self.assertEqual(stat.yellow_cards, 0)
+
+    def test_reset_day_belongs_to_next_season(self):
+        # 1 июня 02:00 по Бишкеку — это ещё 31 мая в UTC. Конец сезона не включается:
+        # отметки 31 мая — в архиве, 1 июня — уже в следующем сезоне, начатом в тот же момент
+        reset_at = local_dt(2026, 6, 1, 2, 0)
+        self._attend(date(2026, 5, 31), status="late")
+        self._attend(date(2026, 6, 1))
+        self._card(date(2026, 6, 1))
+
+        archived = self._stat(until=reset_at)
+        self.assertEqual((archived.attendance_late, archived.attendance_present, archived.yellow_cards), (1, 0, 0))
+
+        self.season = Season.objects.create(title="Лето", started_at=reset_at)
+        current = self._stat(until=local_dt(2026, 9, 1, 2, 0))
+        self.assertEqual((current.attendance_late, current.attendance_present, current.yellow_cards), (0, 1, 1))
+
+    def test_first_season_without_start(self):
+        self.season.started_at = None
+        self.season.save(update_fields=["started_at"])
+        self._attend(date(2025, 9, 1))
+        self._card(date(2025, 9, 1))
+
+        stat = self._stat(until=local_dt(2026, 6, 1, 2, 0))
+
+        self.assertEqual(stat.attendance_present, 1)
+        self.assertEqual(stat.yellow_cards, 1)
+
+
+
+@override_settings(ROOT_URLCONF="users.urls")
+class SeasonStatsViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(Volunteer.objects.create_user("bailiff", "pw", role="bailiff_base"))
+        self.season = Season.objects.create(title="Весна")
+        volunteer = Volunteer.objects.create_user("volunteer", "pw")
+        SeasonVolunteerStat.objects.create(season=self.season, volunteer=volunteer, volunteer_name="Айбек")
+        self.volunteer = volunteer
+
+    def _stats(self, volunteer):
+        return self.client.get(reverse("season-stats", args=[self.season.pk]), {"volunteer": volunteer})
+
+    def test_filter_by_volunteer(self):
+        response = self._stats(self.volunteer.pk)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["volunteer_name"] for row in response.json()], ["Айбек"])
+
+    def test_bad_volunteer_is_400(self):
+        self.assertEqual(self._stats("abc").status_code, 400)
+
+
+
+@override_settings(ROOT_URLCONF="users.urls")
+class EquityBulkIssueTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(Volunteer.objects.create_user("officer", "pw", role="equity_officer"))
+        self.volunteers = [Volunteer.objects.create_user(f"volunteer{i}", "pw") for i in range(2)]
+
+    def _issue(self, volunteer_ids, **kwargs):
+        return self.client.post(reverse("equity-bulk-issue"), {"volunteer_ids": volunteer_ids}, **kwargs)
+
+    def test_string_is_rejected(self):
+        # Раньше "12" превращалось в id 1 и 2
+        response = self._issue(str(self.volunteers[0].pk), format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(YellowCard.objects.exists())
+
+    def test_json_list(self):
+        ids = [volunteer.pk for volunteer in self.volunteers]
+
+        response = self._issue(ids, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.json()["issued"]), ids)
+
+    def test_form_repeated_field(self):
+        ids = [volunteer.pk for volunteer in self.volunteers]
+
+        response = self._issue(ids)
+
+        self.assertEqual(sorted(response.json()["issued"]), ids)
+
+
+
+@override_settings(ROOT_URLCONF="users.urls")
+class VolunteerColumnsSyncTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(Volunteer.objects.create_user("recruiter", "pw", role="admin"))
+        self.application = VolunteerApplication.objects.create(full_name="Айбек Асанов", phone_number="0555")
+
+    def test_row_committed_during_request_is_not_missed(self):
+        board = self.client.get(reverse("columns-list")).json()
+        self.assertEqual(board["submitted"][0]["id"], self.application.pk)
+
+        # Транзакция, закоммиченная после нашей выборки, но с updated_at до ответа
+        commit_started = timezone.now() - timedelta(seconds=5)
+        VolunteerApplication.objects.filter(pk=self.application.pk).update(status="interview", updated_at=commit_started)
+
+        changed = self.client.get(reverse("columns-list"), {"since": board["synced_at"]}).json()["changed"]
+        self.assertEqual([(card["id"], card["status"]) for card in changed], [(self.application.pk, "interview")])
+
+    def test_bad_since(self):
+        self.assertEqual(self.client.get(reverse("columns-list"), {"since": "yesterday"}).status_code, 400)
+
+
+class SolveDistributionTests(SimpleTestCase):
+    """Оптимальность решателя сверяем с полным перебором на маленьких задачах."""
+
+    def _cost(self, preferences, vol_id, dir_id):
+        ranked = preferences.get(vol_id, [])[:MAX_PREFERENCES]
+        return ranked.index(dir_id) if dir_id in ranked else UNRANKED_COST
+
+    def _brute_force(self, volunteer_ids, direction_ids, preferences, capacity):
+        best = None
+        for assignment in itertools.product(direction_ids, repeat=len(volunteer_ids)):
+            if any(assignment.count(dir_id) > capacity for dir_id in direction_ids):
+                continue
+            total = sum(self._cost(preferences, v, d) for v, d in zip(volunteer_ids, assignment))
+            best = total if best is None else min(best, total)
+        return best
+
+    def _check(self, volunteer_ids, direction_ids, preferences, capacity, seed=0):
+        result = solve_distribution(volunteer_ids, direction_ids, preferences, capacity=capacity, seed=seed)
+        mapping = result["mapping"]
+
+        self.assertEqual(set(mapping), set(volunteer_ids))
+        self.assertTrue(all(count <= capacity for count in result["counts"].values()))
+        total = sum(self._cost(preferences, v, d) for v, d in mapping.items())
+        self.assertEqual(total, self._brute_force(volunteer_ids, direction_ids, preferences, capacity))
+        return result
+
+    def test_matches_brute_force_on_random_instances(self):
+        rng = random.Random(31)
+        for _ in range(150):
+            dir_count = rng.randint(1, 4)
+            volunteer_count = rng.randint(0, 7)
+            direction_ids = list(range(100, 100 + dir_count))
+            volunteer_ids = list(range(1, volunteer_count + 1))
+            # Желания частично пустые, бывают повторы и несуществующие направления
+            preferences = {
+                v: [rng.choice(direction_ids + [999]) for _ in range(rng.randint(0, MAX_PREFERENCES + 1))]
+                for v in volunteer_ids
+            }
+            min_capacity = -(-volunteer_count // dir_count)
+            capacity = rng.randint(min_capacity, volunteer_count + 1)
+            with self.subTest(preferences=preferences, capacity=capacity):
+                self._check(volunteer_ids, direction_ids, preferences, capacity, seed=rng.random())
+
+    def test_ties_all_want_the_same_direction(self):
+        preferences = {v: [1, 2, 3] for v in range(1, 7)}
+
+        result = self._check(list(range(1, 7)), [1, 2, 3], preferences, capacity=2)
+
+        self.assertEqual(result["counts"], {1: 2, 2: 2, 3: 2})
+        self.assertEqual(result, solve_distribution(list(range(1, 7)), [1, 2, 3], preferences, capacity=2, seed=0))
+
+    def test_exactly_full_capacity(self):
+        preferences = {1: [1], 2: [1], 3: [1], 4: [2]}
+
+        result = self._check([1, 2, 3, 4], [1, 2], preferences, capacity=2)
+
+        self.assertEqual(result["counts"], {1: 2, 2: 2})
+
+    def test_more_volunteers_than_seats(self):
+        with self.assertRaises(ValueError):
+            solve_distribution([1, 2, 3], [1], {}, capacity=2)
+
+    def test_zero_capacity(self):
+        with self.assertRaises(ValueError):
+            solve_distribution([1], [1, 2], {1: [1]}, capacity=0)
+        self.assertEqual(solve_distribution([], [1, 2], {}, capacity=0)["mapping"], {})
+
+    def test_no_directions(self):
+        with self.assertRaises(ValueError):
+            solve_distribution([1], [], {})
@@ -21,6 +21,7 @@ from users.views import (
     # --- НОВОЕ ДЛЯ МИНИ-КОМАНД И СПОНСОРОВ ---
     MiniTeamViewSet,
     SponsorTaskViewSet,
+    SeasonViewSet,
     # --- ИМПОРТЫ ДЛЯ КАСТОМНОЙ АДМИН-ПАНЕЛИ ---
 )
 
@@ -35,6 +36,7 @@ router = DefaultRouter()
 # /api/equity/
 # /api/miniteams/
 # /api/sponsors/
+# /api/seasons/
 router.register(r'volunteers', VolunteerViewSet, basename='volunteer')
 router.register(r'applications', VolunteerApplicationViewSet, basename='application')
 router.register(r'activities', VolunteerActivityViewSet, basename='vol-activity')
@@ -46,6 +48,9 @@ router.register(r'equity', EquityViewSet, basename='equity')
 router.register(r'miniteams', MiniTeamViewSet, basename='miniteam')
 router.register(r'sponsors', SponsorTaskViewSet, basename='sponsor')
 
+# Архив закрытых сезонов (итоги до distribute_and_reset)
+router.register(r'seasons', SeasonViewSet, basename='season')
+
 
 urlpatterns = [
     # --- API Эндпоинты ---
@@ -56,7 +61,7 @@ urlpatterns = [
     
     path('api/list/', VolunteerListView.as_view(), name='volunteer-list'),
 
-    # Канбан-доска
+    # Канбан-доска (api/columns/ — старый адрес, оставлен для совместимости)
     path('api/board-columns/', VolunteerColumnsView.as_view(), name='columns-list'),
     path('api/columns/', VolunteerColumnsView.as_view(), name='columns'),
 
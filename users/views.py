@@ -1,6 +1,8 @@
+import hashlib
 import io
 import os
 import random
+from datetime import timedelta
 from decimal import Decimal, InvalidOperation
 
 from django.http import JsonResponse
@@ -12,6 +14,8 @@ from django.conf import settings
 from django.http import FileResponse
 from django.shortcuts import get_object_or_404
 from django.views.generic import TemplateView
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.db.models import Sum, Value, Q, DecimalField, Count, F, Prefetch
 from django.db.models.functions import Coalesce
 
@@ -24,7 +28,7 @@ from rest_framework import viewsets, generics, status, permissions
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import action, api_view, authentication_classes, permission_classes
 from rest_framework.exceptions import PermissionDenied
 from rest_framework_simplejwt.tokens import RefreshToken
 
@@ -49,15 +53,19 @@ from commands.models import Command
 from .models import (
     AppSettings, Attendance, Volunteer, VolunteerApplication, BotAccessConfig, 
     ActivityTask, ActivitySubmission, YellowCard, ChatSession, ChatMessage, 
-    MiniTeam, MiniTeamMembership, SponsorTask
+    MiniTeam, MiniTeamMembership, SponsorTask, Season, SeasonVolunteerStat
 )
 
 from commands.models import  Application
+from .distribution import load_distribution_input, solve_distribution
+from .seasons import close_season
+from .discovery import get_discovery_catalog
 from .serializers import (
     BulkAttendanceSerializer, VolunteerSerializer, VolunteerLoginSerializer, VolunteerRegisterSerializer,
-    VolunteerApplicationSerializer, ActivityTaskSerializer, 
+    VolunteerApplicationSerializer,
     ActivitySubmissionSerializer, VolunteerDirectionSerializer, CommandSerializer,
-    VolunteerListSerializer, MiniTeamSerializer, SponsorTaskSerializer
+    VolunteerListSerializer, MiniTeamSerializer, SponsorTaskSerializer,
+    SeasonSerializer, SeasonVolunteerStatSerializer
 )
 from django.contrib.auth.mixins import UserPassesTestMixin
 
@@ -153,10 +161,16 @@ class VolunteerProfileView(generics.RetrieveUpdateAPIView):
 def volunteer_direction_preferences(request):
     settings = AppSettings.get_settings()
     
+    # Порядок выбора (1-й, 2-й...) хранится как порядок строк в промежуточной таблице
+    preferences_through = Volunteer.preferred_directions.through
+
     if request.method == 'GET':
         return Response({
             "is_open": settings.is_direction_selection_open,
-            "preferred": list(request.user.preferred_directions.values_list('id', flat=True))
+            "preferred": list(
+                preferences_through.objects.filter(volunteer=request.user)
+                .order_by('id').values_list('volunteerdirection_id', flat=True)
+            )
         })
 
     if not settings.is_direction_selection_open:
@@ -167,8 +181,24 @@ def volunteer_direction_preferences(request):
     if len(direction_ids) > 4:
         return Response({"error": "Можно выбрать максимум 4 направления."}, status=400)
 
-    valid_ids = VolunteerDirection.objects.filter(id__in=direction_ids).values_list('id', flat=True)
-    request.user.preferred_directions.set(valid_ids)
+    try:
+        direction_ids = [int(dir_id) for dir_id in direction_ids]
+    except (TypeError, ValueError):
+        return Response({"error": "Некорректный список направлений."}, status=400)
+
+    existing_ids = set(VolunteerDirection.objects.filter(id__in=direction_ids).values_list('id', flat=True))
+    valid_ids = []
+    for dir_id in direction_ids:
+        if dir_id in existing_ids and dir_id not in valid_ids:
+            valid_ids.append(dir_id)
+
+    # bulk_create в порядке выбора: .set() теряет порядок, а по нему считается приоритет
+    with transaction.atomic():
+        preferences_through.objects.filter(volunteer=request.user).delete()
+        preferences_through.objects.bulk_create([
+            preferences_through(volunteer=request.user, volunteerdirection_id=dir_id)
+            for dir_id in valid_ids
+        ])
     
     return Response({"message": "Ваши предпочтения успешно сохранены!", "saved": valid_ids})
 
@@ -300,17 +330,16 @@ class DiscoveryListView(APIView):
         user = request.user
         settings = AppSettings.get_settings()
         
-        all_directions = VolunteerDirection.objects.all()
-        # Важно: prefetch_related позволит нам получить участников (members) каждой команды
-        user_commands = user.volunteer_commands.all().prefetch_related('members')
+        # Справочники общие для всех — из кэша; здесь только то, что относится к пользователю
+        catalog = get_discovery_catalog()
+        user_commands = user.volunteer_commands.all().prefetch_related('questions')
         user_directions = user.direction.all()
 
         return Response({
-            "all_directions": VolunteerDirectionSerializer(all_directions, many=True).data,
+            "all_directions": catalog["all_directions"],
             "my_direction": VolunteerDirectionSerializer(user_directions, many=True).data,
-            # В CommandSerializer убедись, что поле members добавлено!
             "my_commands": CommandSerializer(user_commands, many=True).data, 
-            "available_tasks": ActivityTaskSerializer(ActivityTask.objects.all(), many=True).data,
+            "available_tasks": catalog["available_tasks"],
             "is_points_submission_open": settings.is_points_submission_open 
         })
 
@@ -802,6 +831,8 @@ class BailiffPanelView(TemplateView):
 
 class EquityViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
+    MAX_CARDS = 4
+    ISSUER_ROLES = ['equity_officer', 'admin', 'curator', 'president']
 
     @action(detail=False, methods=['get'])
     def board(self, request):
@@ -809,15 +840,21 @@ class EquityViewSet(viewsets.ViewSet):
         if not direction_id:
             return Response({"error": "Нужен direction_id"}, status=400)
 
+        # Карточки всех волонтёров направления одним prefetch-запросом, а не по запросу на человека
         volunteers = Volunteer.objects.filter(
             direction__id=direction_id, 
             role='volunteer'
+        ).only('id', 'name', 'login').prefetch_related(
+            Prefetch(
+                'yellow_cards',
+                queryset=YellowCard.objects.only('id', 'volunteer_id', 'date_issued', 'reason').order_by('date_issued', 'id'),
+                to_attr='card_list',
+            )
         ).order_by('name')
 
         data = []
         for vol in volunteers:
-            cards = YellowCard.objects.filter(volunteer=vol).order_by('date_issued')
-            card_data = [{"id": c.id, "date": c.date_issued, "reason": c.reason} for c in cards]
+            card_data = [{"id": c.id, "date": c.date_issued, "reason": c.reason} for c in vol.card_list]
             
             data.append({
                 "id": vol.id,
@@ -830,41 +867,89 @@ class EquityViewSet(viewsets.ViewSet):
 
     @action(detail=False, methods=['post'])
     def toggle_card(self, request):
-        if request.user.role not in ['equity_officer', 'admin', 'curator', 'president']:
+        if request.user.role not in self.ISSUER_ROLES:
              return Response({"error": "Нет прав"}, status=403)
 
         vol_id = request.data.get('volunteer_id')
         action_type = request.data.get('action') 
 
-        try:
-            volunteer = Volunteer.objects.get(id=vol_id)
-        except Volunteer.DoesNotExist:
-            return Response({"error": "Волонтер не найден"}, status=404)
+        if action_type not in ['add', 'remove']:
+            return Response({"error": "Неверное действие"}, status=400)
 
-        current_count = YellowCard.objects.filter(volunteer=volunteer).count()
+        with transaction.atomic():
+            # Блокировка строки волонтёра: параллельные клики по одному человеку идут по очереди,
+            # поэтому проверка лимита и выдача не разъезжаются
+            try:
+                volunteer = Volunteer.objects.select_for_update().only('id').get(id=vol_id)
+            except (Volunteer.DoesNotExist, ValueError, TypeError):
+                return Response({"error": "Волонтер не найден"}, status=404)
 
-        if action_type == 'add':
-            if current_count >= 4:
-                return Response({"error": "Максимум 4 карточки!"}, status=400)
-            
-            YellowCard.objects.create(
-                volunteer=volunteer,
-                issued_by=request.user,
-                reason=request.data.get('reason', 'Нарушение')
-            )
-            return Response({"message": "Карточка выдана", "new_count": current_count + 1})
+            current_count = YellowCard.objects.filter(volunteer=volunteer).count()
+
+            if action_type == 'add':
+                if current_count >= self.MAX_CARDS:
+                    return Response({"error": f"Максимум {self.MAX_CARDS} карточки!"}, status=400)
+                
+                YellowCard.objects.create(
+                    volunteer=volunteer,
+                    issued_by=request.user,
+                    reason=request.data.get('reason', 'Нарушение')
+                )
+                return Response({"message": "Карточка выдана", "new_count": current_count + 1})
 
-        elif action_type == 'remove':
             if current_count == 0:
                 return Response({"error": "У волонтера нет карточек"}, status=400)
             
-            last_card = YellowCard.objects.filter(volunteer=volunteer).last()
-            if last_card:
-                last_card.delete()
-            
+            YellowCard.objects.filter(
+                id__in=YellowCard.objects.filter(volunteer=volunteer).order_by('-id').values('id')[:1]
+            ).delete()
             return Response({"message": "Карточка снята", "new_count": current_count - 1})
 
-        return Response({"error": "Неверное действие"}, status=400)
+    @action(detail=False, methods=['post'])
+    def bulk_issue(self, request):
+        """Выдать карточку сразу нескольким волонтёрам (например, всем опоздавшим на собрание)."""
+        if request.user.role not in self.ISSUER_ROLES:
+             return Response({"error": "Нет прав"}, status=403)
+
+        # Форма присылает id повторяющимся полем, JSON — списком. Строку не перебираем
+        # посимвольно: "12" — это не id 1 и 2
+        if hasattr(request.data, 'getlist'):
+            raw_ids = request.data.getlist('volunteer_ids')
+        else:
+            raw_ids = request.data.get('volunteer_ids', [])
+        if not isinstance(raw_ids, list):
+            return Response({"error": "volunteer_ids должен быть списком id"}, status=400)
+        try:
+            vol_ids = {int(v) for v in raw_ids}
+        except (TypeError, ValueError):
+            return Response({"error": "volunteer_ids должен быть списком id"}, status=400)
+        if not vol_ids:
+            return Response({"error": "Нужен volunteer_ids"}, status=400)
+
+        reason = request.data.get('reason', 'Нарушение')
+
+        with transaction.atomic():
+            # Блокируем всех разом в порядке id — встречные bulk_issue не уйдут в дедлок
+            locked_ids = list(
+                Volunteer.objects.select_for_update().filter(id__in=vol_ids).order_by('id').values_list('id', flat=True)
+            )
+            counts = dict(
+                YellowCard.objects.filter(volunteer_id__in=locked_ids)
+                .values('volunteer_id').annotate(count=Count('id')).order_by()
+                .values_list('volunteer_id', 'count')
+            )
+            issued = [vol_id for vol_id in locked_ids if counts.get(vol_id, 0) < self.MAX_CARDS]
+            issued_set = set(issued)
+            YellowCard.objects.bulk_create([
+                YellowCard(volunteer_id=vol_id, issued_by=request.user, reason=reason) for vol_id in issued
+            ])
+
+        return Response({
+            "message": f"Выдано карточек: {len(issued)}",
+            "issued": issued,
+            "limit_reached": [vol_id for vol_id in locked_ids if vol_id not in issued_set],
+            "not_found": sorted(vol_ids - set(locked_ids)),
+        })
     
 class EquityPanelView(TemplateView):
     template_name = "volunteers/equity_panel.html"
@@ -917,17 +1002,53 @@ class DownloadAcceptedNamesView(DownloadPDFBase):
 
 # ---------------- HTML VIEWS ----------------
 class VolunteerColumnsView(APIView):
+    """
+    Канбан набора. Без параметров — все три колонки одним запросом.
+    С ?since=<synced_at из прошлого ответа> — только карточки, изменённые после этого момента
+    (в том числе ушедшие с доски, например в rejected): клиент переносит их по полю status.
+
+    Дельта может повторить уже полученные карточки (см. SYNC_OVERLAP) — клиент
+    заменяет карточку по id. Удаления (только из админки) в дельту не попадают:
+    при открытии доски клиент загружает её целиком, без since.
+    """
     permission_classes = [IsAuthenticated]
+    BOARD_STATUSES = ['submitted', 'interview', 'accepted']
+    CARD_FIELDS = ['id', 'full_name', 'phone_number', 'direction_id', 'status']
+    # updated_at ставится до COMMIT, поэтому строка, закоммиченная во время нашей выборки,
+    # может иметь updated_at раньше synced_at. Запас больше таймаута воркера gunicorn (30 с):
+    # транзакция запроса дольше не живёт
+    SYNC_OVERLAP = timedelta(seconds=60)
 
     def get(self, request):
-        from .models import VolunteerApplication
-        columns = {
-            "submitted": VolunteerApplicationSerializer(VolunteerApplication.objects.filter(status='submitted'), many=True).data,
-            "interview": VolunteerApplicationSerializer(VolunteerApplication.objects.filter(status='interview'), many=True).data,
-            "accepted": VolunteerApplicationSerializer(VolunteerApplication.objects.filter(status='accepted'), many=True).data,
-        }
+        synced_at = timezone.now() - self.SYNC_OVERLAP
+        since_param = request.query_params.get('since')
+
+        if since_param:
+            # «+» из смещения часового пояса в неэкранированном query string превращается в пробел
+            since = parse_datetime(since_param.replace(' ', '+'))
+            if since is None:
+                return Response({"error": "Неверный формат since (нужен ISO 8601)"}, status=400)
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+            cards = VolunteerApplication.objects.filter(updated_at__gt=since).order_by('updated_at', 'id')
+            return Response({
+                "changed": [self._card(row) for row in cards.values(*self.CARD_FIELDS)],
+                "synced_at": synced_at,
+            })
+
+        columns = {status_key: [] for status_key in self.BOARD_STATUSES}
+        cards = VolunteerApplication.objects.filter(status__in=self.BOARD_STATUSES).order_by('id')
+        for row in cards.values(*self.CARD_FIELDS):
+            columns[row['status']].append(self._card(row))
+        columns["synced_at"] = synced_at
         return Response(columns)
 
+    @staticmethod
+    def _card(row):
+        # Тот же формат, что у VolunteerApplicationSerializer, но без создания объектов модели
+        row['direction'] = row.pop('direction_id')
+        return row
+
 # ==========================================
 # ЛОГИКА ПРИСТАВА БАЗ (РАСПРЕДЕЛЕНИЕ)
 # ==========================================
@@ -937,66 +1058,62 @@ def generate_auto_distribution(request):
     if request.user.role not in ['bailiff_base', 'admin', 'president']:
         return Response({"error": "Нет прав"}, status=403)
 
-    volunteers = list(Volunteer.objects.filter(is_active=True, role='volunteer'))
-    directions = list(VolunteerDirection.objects.all())
-    
-    if not directions:
-        return Response({"error": "Нет направлений в базе"}, status=400)
+    volunteers, direction_ids, preferences = load_distribution_input()
 
-    target_capacity = (len(volunteers) // len(directions)) + 1 
-    
-    direction_counts = {d.id: 0 for d in directions}
-    final_mapping = {} 
-    unassigned_volunteers = volunteers[:]
-    
-    random.shuffle(unassigned_volunteers)
+    if not direction_ids:
+        return Response({"error": "Нет направлений в базе"}, status=400)
 
-    for priority_index in range(4):
-        still_unassigned = []
-        for vol in unassigned_volunteers:
-            prefs = list(vol.preferred_directions.all()) 
-            
-            assigned = False
-            if priority_index < len(prefs):
-                chosen_dir = prefs[priority_index]
-                if direction_counts[chosen_dir.id] < target_capacity:
-                    final_mapping[vol.id] = chosen_dir.id
-                    direction_counts[chosen_dir.id] += 1
-                    assigned = True
-            
-            if not assigned:
-                still_unassigned.append(vol)
-        
-        unassigned_volunteers = still_unassigned
-
-    for vol in unassigned_volunteers:
-        emptiest_dir_id = min(direction_counts, key=direction_counts.get)
-        final_mapping[vol.id] = emptiest_dir_id
-        direction_counts[emptiest_dir_id] += 1
-
-    distribution_result = []
-    all_vols = Volunteer.objects.filter(is_active=True, role='volunteer')
-    for v in all_vols:
-        distribution_result.append({
-            "volunteer_id": v.id,
-            "volunteer_name": v.name or v.login,
-            "assigned_direction_id": final_mapping.get(v.id)
-        })
+    # seed передаётся, чтобы пристав мог повторить тот же вариант распределения
+    seed = request.query_params.get('seed')
+    if seed is None:
+        seed = random.randrange(1_000_000)
+    try:
+        seed = int(seed)
+    except ValueError:
+        return Response({"error": "seed должен быть числом"}, status=400)
+
+    result = solve_distribution(
+        [vol_id for vol_id, _, _ in volunteers], direction_ids, preferences, seed=seed
+    )
+
+    distribution_result = [
+        {
+            "volunteer_id": vol_id,
+            "volunteer_name": name or login,
+            "assigned_direction_id": result["mapping"].get(vol_id)
+        }
+        for vol_id, name, login in volunteers
+    ]
 
     return Response({
         "distribution": distribution_result, 
-        "counts": direction_counts
+        "counts": result["counts"],
+        "score": result["score"],
+        "max_score": result["max_score"],
+        "rank_histogram": result["rank_histogram"],
+        "seed": seed,
     })
 
 @api_view(['GET'])
 @permission_classes([AllowAny]) 
+@authentication_classes([])  # публичный эндпоинт: без JWT не ходим в БД за пользователем
 def get_app_settings(request):
     settings = AppSettings.get_settings()
-    return Response({
+    data = {
         "is_registration_open": settings.is_registration_open,
         "is_direction_selection_open": settings.is_direction_selection_open,
         "is_points_submission_open": settings.is_points_submission_open 
-    })
+    }
+
+    etag = '"%s"' % hashlib.md5(json.dumps(data, sort_keys=True).encode()).hexdigest()
+    if request.headers.get('If-None-Match') == etag:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(data)
+
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -1122,38 +1239,59 @@ def apply_distribution(request):
     if action not in ['save_only', 'distribute', 'distribute_and_reset']:
         return Response({"error": "Неизвестное действие"}, status=400)
 
-    with transaction.atomic():
-        for item in mapping:
-            vol_id = item.get('vol_id')
-            dir_id = item.get('dir_id')
-            
-            try:
-                vol = Volunteer.objects.get(id=vol_id)
-            except Volunteer.DoesNotExist:
-                continue
+    # Всё делаем наборами: один запрос на волонтёров и направления, дальше bulk-операции
+    requested = {}
+    for item in mapping:
+        try:
+            vol_id = int(item.get('vol_id'))
+        except (TypeError, ValueError):
+            continue
+        try:
+            requested[vol_id] = int(item.get('dir_id'))
+        except (TypeError, ValueError):
+            requested[vol_id] = None  # пустой dir_id — снять направление
+
+    vol_ids = set(Volunteer.objects.filter(id__in=requested).values_list('id', flat=True))
+    valid_dir_ids = set(VolunteerDirection.objects.filter(
+        id__in=[d for d in requested.values() if d is not None]
+    ).values_list('id', flat=True))
+    assignments = {
+        vol_id: dir_id if dir_id in valid_dir_ids else None
+        for vol_id, dir_id in requested.items() if vol_id in vol_ids
+    }
 
-            # 1. Просто сохранение черновика
-            if action == 'save_only':
-                vol.draft_direction_id = dir_id if dir_id else None
-                vol.save()
-                
-            # 2. Логика для распределения (сброс или без сброса)
-            elif action in ['distribute', 'distribute_and_reset']:
-                # Меняем основное направление
-                vol.direction.clear()
-                if dir_id:
-                    vol.direction.add(dir_id)
-                
-                # Очищаем черновик, так как распределение завершено
-                vol.draft_direction = None
-
-                # Если это полный сброс, обнуляем прогресс волонтера
-                if action == 'distribute_and_reset':
-                    vol.point = 0
-                    vol.preferred_directions.clear() 
-                    vol.submissions.all().delete() 
-                    
-                vol.save()
+    with transaction.atomic():
+        # 1. Просто сохранение черновика
+        if action == 'save_only':
+            volunteers = Volunteer.objects.filter(id__in=assignments).only('id', 'draft_direction')
+            for vol in volunteers:
+                vol.draft_direction_id = assignments[vol.id]
+            Volunteer.objects.bulk_update(volunteers, ['draft_direction'], batch_size=500)
+
+        # 2. Логика для распределения (сброс или без сброса)
+        else:
+            # Меняем основное направление: одно удаление из M2M и одна вставка
+            direction_through = Volunteer.direction.through
+            direction_through.objects.filter(volunteer_id__in=assignments).delete()
+            direction_through.objects.bulk_create([
+                direction_through(volunteer_id=vol_id, volunteerdirection_id=dir_id)
+                for vol_id, dir_id in assignments.items() if dir_id
+            ], batch_size=500)
+
+            # Черновик очищаем, так как распределение завершено
+            reset_fields = {'draft_direction': None}
+
+            # Если это полный сброс, обнуляем прогресс волонтеров
+            if action == 'distribute_and_reset':
+                # Сначала сворачиваем итоги сезона в архив — история не теряется
+                close_season(assignments, next_title=request.data.get('season_title'))
+                Volunteer.preferred_directions.through.objects.filter(volunteer_id__in=assignments).delete()
+                # QuerySet.delete() не вызывает ActivitySubmission.delete(), поэтому
+                # без пересчёта баллов на каждую заявку — баллы обнуляем одним UPDATE ниже
+                ActivitySubmission.objects.filter(volunteer_id__in=assignments).delete()
+                reset_fields['point'] = 0
+
+            Volunteer.objects.filter(id__in=assignments).update(**reset_fields)
                 
     # Закрываем выбор направлений для обоих вариантов финального распределения
     if action in ['distribute', 'distribute_and_reset']:
@@ -1163,6 +1301,28 @@ def apply_distribution(request):
 
     return Response({"message": f"Успешно выполнено: {action}"})
 
+class SeasonViewSet(viewsets.ReadOnlyModelViewSet):
+    """Архив сезонов для отчётов: /api/seasons/ и /api/seasons/<id>/stats/"""
+    permission_classes = [IsAuthenticated]
+    serializer_class = SeasonSerializer
+
+    def get_queryset(self):
+        if self.request.user.role not in ['bailiff_base', 'admin', 'president']:
+            raise PermissionDenied("Нет прав")
+        return Season.objects.annotate(volunteers_count=Count('volunteer_stats'))
+
+    @action(detail=True, methods=['get'])
+    def stats(self, request, pk=None):
+        season = self.get_object()
+        stats = SeasonVolunteerStat.objects.filter(season=season)
+        volunteer_id = request.query_params.get('volunteer')
+        if volunteer_id:
+            if not volunteer_id.isdigit():
+                return Response({"error": "volunteer должен быть числом"}, status=400)
+            stats = stats.filter(volunteer_id=int(volunteer_id))
+        return Response(SeasonVolunteerStatSerializer(stats, many=True).data)
+
+
 class MiniTeamViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = MiniTeamSerializer